@@ -0,0 +1,118 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+
+# 棋盘内层循环的编译版本，与 kernels.py 中的纯 Python 实现逐一对应、结果完全相同。
+# 棋盘是按行优先存放的连续字节缓冲区（bytearray / NumPy uint8），0 表示空格；
+# 方块形状同样是按行优先的字节串，另给出形状宽度。
+# 构建：python build_kernels.py
+
+
+def collides(const unsigned char[::1] board, Py_ssize_t width,
+             const unsigned char[::1] shape, Py_ssize_t shape_width, Py_ssize_t row, Py_ssize_t col):
+    cdef Py_ssize_t height = board.shape[0] // width
+    cdef Py_ssize_t shape_height = shape.shape[0] // shape_width
+    cdef Py_ssize_t i, j, r, c
+    for i in range(shape_height):
+        for j in range(shape_width):
+            if shape[i * shape_width + j]:
+                r = row + i
+                c = col + j
+                if r >= height or c < 0 or c >= width:
+                    return True
+                if r >= 0 and board[r * width + c]:
+                    return True
+    return False
+
+
+def merge(unsigned char[::1] board, Py_ssize_t width,
+          const unsigned char[::1] shape, Py_ssize_t shape_width, Py_ssize_t row, Py_ssize_t col,
+          unsigned char color):
+    cdef Py_ssize_t shape_height = shape.shape[0] // shape_width
+    cdef Py_ssize_t i, j, r
+    cdef int written = 0
+    # 下面的写入不检查下标，越界必须在这里挡住
+    if col < 0 or col + shape_width > width or row + shape_height > board.shape[0] // width:
+        raise ValueError(f'shape at ({row}, {col}) is outside the board')
+    for i in range(shape_height):
+        r = row + i
+        if r < 0:
+            continue
+        for j in range(shape_width):
+            if shape[i * shape_width + j]:
+                board[r * width + col + j] = color
+                written += 1
+    return written
+
+
+cdef inline bint _row_full(const unsigned char[::1] board, Py_ssize_t offset, Py_ssize_t width):
+    cdef Py_ssize_t c
+    for c in range(width):
+        if not board[offset + c]:
+            return False
+    return True
+
+
+def full_rows(const unsigned char[::1] board, Py_ssize_t width):
+    cdef Py_ssize_t height = board.shape[0] // width
+    cdef Py_ssize_t r
+    return [r for r in range(height) if _row_full(board, r * width, width)]
+
+
+def clear_full_rows(unsigned char[::1] board, Py_ssize_t width):
+    cdef Py_ssize_t height = board.shape[0] // width
+    cdef Py_ssize_t r, c, write = height - 1
+    for r in range(height - 1, -1, -1):
+        if _row_full(board, r * width, width):
+            continue
+        if write != r:
+            for c in range(width):
+                board[write * width + c] = board[r * width + c]
+        write -= 1
+    for r in range(write + 1):
+        for c in range(width):
+            board[r * width + c] = 0
+    return write + 1
+
+
+def drop_distance(const unsigned char[::1] board, Py_ssize_t width,
+                  const unsigned char[::1] shape, Py_ssize_t shape_width, Py_ssize_t row, Py_ssize_t col):
+    cdef Py_ssize_t height = board.shape[0] // width
+    cdef Py_ssize_t shape_height = shape.shape[0] // shape_width
+    cdef Py_ssize_t distance = height
+    cdef Py_ssize_t i, j, bottom, start, r
+    for j in range(shape_width):
+        bottom = -1
+        for i in range(shape_height - 1, -1, -1):
+            if shape[i * shape_width + j]:
+                bottom = i
+                break
+        if bottom < 0:
+            continue
+        start = row + bottom + 1
+        r = start
+        while r < height and (r < 0 or not board[r * width + col + j]):
+            r += 1
+        if r - start < distance:
+            distance = r - start
+    return distance
+
+
+def board_features(const unsigned char[::1] board, Py_ssize_t width):
+    cdef Py_ssize_t height = board.shape[0] // width
+    cdef Py_ssize_t r, c, top, h, previous = 0
+    cdef long total = 0, holes = 0, bumpiness = 0, highest = 0
+    for c in range(width):
+        top = -1
+        for r in range(height):
+            if board[r * width + c]:
+                if top < 0:
+                    top = r
+            elif top >= 0:
+                holes += 1
+        h = 0 if top < 0 else height - top
+        total += h
+        if h > highest:
+            highest = h
+        if c:
+            bumpiness += h - previous if h > previous else previous - h
+        previous = h
+    return total, holes, bumpiness, highest
@@ -0,0 +1,281 @@
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+import tracing
+from tracing import CountingSurface
+
+# 每帧内存分配统计：每帧结束时取一次 tracemalloc 快照，与上一帧比较，
+# 得到这一帧新增（帧结束时仍然存活）的内存块和分配位置。快照比较看不到帧内分配又释放的
+# 临时对象，所以另外统计：本帧分配的容器对象数（第 0 代 GC 计数的增量，加上帧内回收清零前的计数）、
+# 本帧内的内存峰值（每帧重置）、Python 代码中 pygame.Surface 的构造次数（按调用位置）
+# 以及垃圾回收的次数和耗时。
+# 开启方式：TETRIS_ALLOC_PROFILE=1（或输出文件路径），退出时写出 JSON 报告。
+#
+# 也可以作为回归检查单独运行：无窗口地按固定种子自动游戏若干帧，
+# 每帧平均分配超过预算时以非零状态退出：
+#   python allocprofile.py --frames 600 --budget-blocks 5 --budget-objects 400 --budget-gc 0.5
+
+TOP_LINES = 20            # 报告中列出的分配位置数
+TRACEBACK_DEPTH = 1       # 只按直接分配的那一行归类
+WARMUP_FRAMES = 120       # 独立运行时不计入统计的预热帧（填充各种缓存）
+PROFILE_FRAMES = 600
+BUDGET_BLOCKS = 5         # 每帧平均新增内存块数的默认预算
+BUDGET_SURFACES = 0.1     # 每帧平均 Surface 构造次数的默认预算（缓存首次填充时允许少量构造）
+BUDGET_OBJECTS = 400      # 每帧平均分配的容器对象数的默认预算
+BUDGET_GC = 0.5           # 每帧平均垃圾回收次数的默认预算
+BUDGET_PEAK_BYTES = 64 * 1024  # 每帧平均内存峰值（相对帧开始时）的默认预算
+KEY_RATE = 3.0            # 自动游戏每秒按键次数
+FRAME_MS = 1000 / 60
+
+
+def _summary(values):
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        'mean': round(sum(values) / len(values), 3),
+        'p50': values[len(values) // 2],
+        'p99': values[min(len(values) - 1, len(values) * 99 // 100)],
+        'max': values[-1],
+    }
+
+
+class NullAllocProfiler:
+    """未开启分配统计时使用的空实现"""
+    enabled = False
+
+    def mark_frame(self):
+        pass
+
+    def write(self, path=None):
+        return None
+
+
+class AllocProfiler:
+    enabled = True
+
+    def __init__(self, path=None, top=TOP_LINES):
+        self.path = path
+        self.top = top
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(TRACEBACK_DEPTH)
+        tracing.install_surface_counter()
+        if CountingSurface.sites is None:
+            CountingSurface.sites = Counter()
+        # 统计代码自身（以及 tracemalloc 的快照比较）分配的内存不计入游戏
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ]
+        self._gc_start = None
+        gc.callbacks.append(self._on_gc)
+        self.reset()
+
+    def reset(self):
+        """丢弃已有统计（如预热结束时），从现在开始计数"""
+        self.frames = []   # 每帧 (新增块数, 新增字节, 峰值字节, Surface 构造次数, GC 次数, GC 毫秒, 分配对象数)
+        self.lines = {}    # 分配位置 -> [块数, 字节, 出现的帧数]
+        self._surface_base = dict(CountingSurface.sites)
+        self._surfaces = CountingSurface.created
+        self._gc_count = 0
+        self._gc_ms = 0.0
+        self._collected_objects = 0
+        self._objects = gc.get_count()[0]
+        self._snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        tracemalloc.reset_peak()
+        self._traced = tracemalloc.get_traced_memory()[0]
+
+    def _on_gc(self, phase, info):
+        if phase == 'start':
+            # 回收会把第 0 代计数清零，先记下清零前分配的对象数
+            self._collected_objects += gc.get_count()[0]
+            self._gc_start = time.perf_counter()
+        elif self._gc_start is not None:
+            self._gc_count += 1
+            self._gc_ms += (time.perf_counter() - self._gc_start) * 1000
+            self._gc_start = None
+
+    def mark_frame(self):
+        """一帧结束：统计自上一次调用以来的分配"""
+        objects = self._collected_objects + gc.get_count()[0] - self._objects
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        blocks = size = 0
+        for stat in snapshot.compare_to(self._snapshot, 'lineno'):
+            if stat.count_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            site = f'{frame.filename}:{frame.lineno}'
+            added = max(0, stat.size_diff)
+            blocks += stat.count_diff
+            size += added
+            entry = self.lines.get(site)
+            if entry is None:
+                entry = self.lines[site] = [0, 0, 0]
+            entry[0] += stat.count_diff
+            entry[1] += added
+            entry[2] += 1
+        self._snapshot = snapshot
+
+        surfaces = CountingSurface.created - self._surfaces
+        self._surfaces = CountingSurface.created
+        self.frames.append((blocks, size, max(0, peak - self._traced), surfaces,
+                            self._gc_count, round(self._gc_ms, 3), max(0, objects)))
+        self._gc_count = 0
+        self._gc_ms = 0.0
+        self._collected_objects = 0
+        tracemalloc.reset_peak()
+        self._traced = tracemalloc.get_traced_memory()[0]
+        self._objects = gc.get_count()[0]
+
+    def close(self):
+        """停止统计：移除 GC 回调，并停止由自己开启的 tracemalloc"""
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def report(self):
+        columns = list(zip(*self.frames)) or [()] * 7
+        top_lines = sorted(self.lines.items(), key=lambda item: item[1][0], reverse=True)[:self.top]
+        surface_sites = {site: count - self._surface_base.get(site, 0)
+                         for site, count in CountingSurface.sites.items()}
+        return {
+            'frames': len(self.frames),
+            'per_frame': {
+                'blocks': _summary(columns[0]),
+                'objects': _summary(columns[6]),
+                'bytes': _summary(columns[1]),
+                'peak_bytes': _summary(columns[2]),
+                'surfaces': _summary(columns[3]),
+                'gc_collections': _summary(columns[4]),
+                'gc_ms': _summary(columns[5]),
+            },
+            'top_lines': [{'site': site, 'blocks': blocks, 'bytes': size, 'frames': frames}
+                          for site, (blocks, size, frames) in top_lines],
+            'surface_sites': [{'site': site, 'count': count}
+                              for site, count in sorted(surface_sites.items(), key=lambda item: -item[1])
+                              if count > 0],
+        }
+
+    def write(self, path=None):
+        """写出 JSON 报告，返回文件路径"""
+        path = path or self.path or time.strftime('allocs-%Y%m%d-%H%M%S.json')
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Allocation profile written to {path}")
+        return path
+
+
+def check_budget(report, blocks=BUDGET_BLOCKS, surfaces=BUDGET_SURFACES, objects=BUDGET_OBJECTS,
+                 gc_collections=BUDGET_GC, peak_bytes=BUDGET_PEAK_BYTES):
+    """按每帧平均值检查预算，返回超出的项目（空列表表示通过）"""
+    failures = []
+    per_frame = report['per_frame']
+    budgets = (('blocks', blocks), ('surfaces', surfaces), ('objects', objects),
+               ('gc_collections', gc_collections), ('peak_bytes', peak_bytes))
+    for name, budget in budgets:
+        if per_frame[name] and per_frame[name]['mean'] > budget:
+            failures.append(f"{name} per frame {per_frame[name]['mean']} > {budget}")
+    return failures
+
+
+def create_profiler():
+    """根据环境变量 TETRIS_ALLOC_PROFILE 创建分配统计器（值为输出文件路径或 1）"""
+    setting = os.environ.get('TETRIS_ALLOC_PROFILE')
+    if not setting:
+        return NullAllocProfiler()
+    return AllocProfiler(path=None if setting == '1' else setting)
+
+
+def profile_scripted_play(frames=PROFILE_FRAMES, warmup=WARMUP_FRAMES, seed=0, top=TOP_LINES):
+    """无窗口地按固定种子自动游戏，返回分配报告"""
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    os.environ['TETRIS_RENDERER'] = 'surface'
+    import pygame
+    clock = [1000.0]
+    get_ticks = pygame.time.get_ticks
+    pygame.time.get_ticks = lambda: int(clock[0])
+    import main
+
+    try:
+        game = main.Tetris()
+        game.save_high_score = lambda: None
+        game.reset_game(seed=seed)
+        rng = random.Random(seed)
+        keys = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE)
+        profiler = AllocProfiler(top=top)
+        try:
+            for frame in range(warmup + frames):
+                if frame == warmup:
+                    profiler.reset()
+                clock[0] += FRAME_MS
+                # 与 loadtest 一样把脚本按键作为事件交给 step_frame，走真实的每帧流程
+                events = []
+                if rng.random() < KEY_RATE / 60:
+                    events.append(pygame.event.Event(pygame.KEYDOWN, key=rng.choice(keys)))
+                game.step_frame(events)
+                if game.state == main.GameState.GAME_OVER:
+                    game.reset_game(seed=rng.randrange(2 ** 31))
+                profiler.mark_frame()
+        finally:
+            profiler.close()
+    finally:
+        pygame.time.get_ticks = get_ticks
+    return profiler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile per-frame allocations during scripted play')
+    parser.add_argument('-o', '--output', help='write the JSON report to this file')
+    parser.add_argument('--frames', type=int, default=PROFILE_FRAMES)
+    parser.add_argument('--warmup', type=int, default=WARMUP_FRAMES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--top', type=int, default=TOP_LINES)
+    parser.add_argument('--budget-blocks', type=float, default=BUDGET_BLOCKS,
+                        help='maximum mean new memory blocks per frame')
+    parser.add_argument('--budget-surfaces', type=float, default=BUDGET_SURFACES,
+                        help='maximum mean Surface constructions per frame')
+    parser.add_argument('--budget-objects', type=float, default=BUDGET_OBJECTS,
+                        help='maximum mean container objects allocated per frame')
+    parser.add_argument('--budget-gc', type=float, default=BUDGET_GC,
+                        help='maximum mean garbage collections per frame')
+    parser.add_argument('--budget-peak-bytes', type=float, default=BUDGET_PEAK_BYTES,
+                        help='maximum mean peak traced bytes within a frame')
+    args = parser.parse_args()
+
+    profiler = profile_scripted_play(args.frames, args.warmup, args.seed, args.top)
+    report = profiler.report()
+    if args.output:
+        profiler.write(args.output)
+
+    per_frame = report['per_frame']
+    print(f"{report['frames']} frames: {per_frame['blocks']['mean']} blocks retained, "
+          f"{per_frame['objects']['mean']} objects allocated, {per_frame['peak_bytes']['mean']} peak bytes, "
+          f"{per_frame['surfaces']['mean']} surfaces, "
+          f"{per_frame['gc_collections']['mean']} collections per frame (mean)")
+    for line in report['top_lines'][:10]:
+        print(f"{line['blocks']:>8} blocks {line['bytes']:>10} bytes  {line['site']}")
+    for site in report['surface_sites'][:10]:
+        print(f"{site['count']:>8} surfaces  {site['site']}")
+
+    failures = check_budget(report, args.budget_blocks, args.budget_surfaces, args.budget_objects,
+                            args.budget_gc, args.budget_peak_bytes)
+    for failure in failures:
+        print(f"Budget exceeded: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
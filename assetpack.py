@@ -0,0 +1,196 @@
+import io
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+# 资源包：把 assets 目录打成一个文件，运行时整体内存映射，
+# 按名字取出零拷贝的 memoryview 交给 pygame.image.load / mixer.Sound。
+# 单文件打包（PyInstaller --onefile）不再需要在每次启动时把资源解压到临时目录。
+#
+# 文件格式（小端）：
+#   头部   magic 'TPAK' | 版本 u8 | 保留 u8 u16 | 条目数 u32 | 索引偏移 u64
+#   数据   各条目依次存放，起始位置按 ALIGNMENT 对齐
+#   索引   每条：名字长度 u16 | 标志 u8 | 保留 u8 | 偏移 u64 | 存储大小 u64 | 原始大小 u64 | 名字 utf-8
+
+PACK_MAGIC = b'TPAK'
+PACK_VERSION = 1
+PACK_FILE = 'assets.pak'
+ALIGNMENT = 64
+
+FLAG_ZLIB = 1
+
+# 已经压缩过的格式不再尝试 zlib
+COMPRESSED_EXTS = {'.png', '.jpg', '.jpeg', '.mp3', '.ogg', '.ico', '.gz', '.zip'}
+MIN_COMPRESSION_GAIN = 0.9  # 压缩后不小于原来的 90% 就原样存储
+
+_HEADER = struct.Struct('<4sBBHIQ')
+_ENTRY = struct.Struct('<HBBQQQ')
+
+
+def _pad(f):
+    f.write(b'\0' * (-f.tell() % ALIGNMENT))
+
+
+def build_pack(source_dir, output, compress=True):
+    """把 source_dir 下的所有文件打包到 output，返回条目数"""
+    names = []
+    for root, _, files in os.walk(source_dir):
+        for filename in files:
+            if filename.startswith('.'):
+                continue
+            path = os.path.join(root, filename)
+            names.append(os.path.relpath(path, source_dir).replace(os.sep, '/'))
+    names.sort()
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp_path = output + '.tmp'
+    index = []
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, 0, 0, 0))
+        for name in names:
+            with open(os.path.join(source_dir, name), 'rb') as src:
+                data = src.read()
+            flags = 0
+            stored = data
+            if compress and os.path.splitext(name)[1].lower() not in COMPRESSED_EXTS:
+                packed = zlib.compress(data, 9)
+                if len(packed) < len(data) * MIN_COMPRESSION_GAIN:
+                    flags, stored = FLAG_ZLIB, packed
+            _pad(f)
+            index.append((name, flags, f.tell(), len(stored), len(data)))
+            f.write(stored)
+
+        _pad(f)
+        index_offset = f.tell()
+        for name, flags, offset, stored_size, size in index:
+            encoded = name.encode('utf-8')
+            f.write(_ENTRY.pack(len(encoded), flags, 0, offset, stored_size, size))
+            f.write(encoded)
+        f.seek(0)
+        f.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, 0, len(index), index_offset))
+    os.replace(tmp_path, output)
+    return len(index)
+
+
+class AssetReader(io.RawIOBase):
+    """只读文件对象，直接从映射的内存中读取，不复制整个资源"""
+
+    def __init__(self, view, name):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), len(self._view) - self._pos)
+        buffer[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+class AssetPack:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # 不支持 mmap 的平台（如部分 Web 构建）整体读入内存
+                self._data = f.read()
+        self._view = memoryview(self._data)
+        magic, version, _, _, count, index_offset = _HEADER.unpack_from(self._view)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f'Not an asset pack or unsupported version: {path}')
+
+        self._entries = {}
+        offset = index_offset
+        for _ in range(count):
+            name_len, flags, _, data_offset, stored_size, size = _ENTRY.unpack_from(self._view, offset)
+            offset += _ENTRY.size
+            name = bytes(self._view[offset:offset + name_len]).decode('utf-8')
+            offset += name_len
+            self._entries[name] = (flags, data_offset, stored_size, size)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def names(self):
+        return list(self._entries)
+
+    def info(self, name):
+        """(标志, 偏移, 存储大小, 原始大小)"""
+        return self._entries[name]
+
+    def view(self, name):
+        """返回资源内容：未压缩的条目是映射内存上的零拷贝视图"""
+        flags, offset, stored_size, _ = self._entries[name]
+        data = self._view[offset:offset + stored_size]
+        if flags & FLAG_ZLIB:
+            return memoryview(zlib.decompress(data))
+        return data
+
+    def open(self, name):
+        """以文件对象的形式打开资源，可直接传给 pygame.image.load 和 mixer.Sound"""
+        return AssetReader(self.view(name), name)
+
+
+def find_pack(filename=PACK_FILE):
+    """查找资源包：环境变量 TETRIS_ASSET_PACK、可执行文件旁边、当前目录"""
+    candidates = [os.environ.get('TETRIS_ASSET_PACK')]
+    if getattr(sys, 'frozen', False):
+        candidates.append(os.path.join(os.path.dirname(sys.executable), filename))
+    candidates.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename))
+    candidates.append(os.path.abspath(filename))
+    for path in candidates:
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+def open_pack(path=None):
+    """打开资源包，找不到或已损坏时返回 None（回退到散文件）"""
+    path = path or find_pack()
+    if not path:
+        return None
+    try:
+        return AssetPack(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Warning: Could not open asset pack {path}: {e}")
+        return None
+
+
+if __name__ == '__main__':
+    #   python assetpack.py build [assets] [assets.pak]
+    #   python assetpack.py list [assets.pak]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    if command == 'build':
+        source = sys.argv[2] if len(sys.argv) > 2 else 'assets'
+        output = sys.argv[3] if len(sys.argv) > 3 else PACK_FILE
+        count = build_pack(source, output)
+        print(f"Packed {count} files into {output} ({os.path.getsize(output)} bytes)")
+    elif command == 'list':
+        pack = AssetPack(sys.argv[2] if len(sys.argv) > 2 else PACK_FILE)
+        for name in pack.names():
+            flags, offset, stored_size, size = pack.info(name)
+            print(f"{offset:>10} {stored_size:>10} {size:>10} {'zlib' if flags & FLAG_ZLIB else '':<4} {name}")
+    else:
+        sys.exit(f'Unknown command: {command}')
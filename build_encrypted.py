@@ -1,6 +1,7 @@
 import os
 import shutil
 from pyarmor.pyarmor import main as pyarmor_main
+from assetpack import build_pack, PACK_FILE
 
 def encrypt_and_build():
     # 清理之前的构建
@@ -17,18 +18,17 @@ def encrypt_and_build():
                  '--advanced', '2',
                  'main.py'])
     
-    # 复制资源文件
-    shutil.copytree('assets', os.path.join('dist', 'assets'))
-    
     # 使用 PyInstaller 打包加密后的代码
     os.system('pyinstaller --name="疯狂俄罗斯方块" '
              '--windowed '
              '--onefile '
-             '--add-data "dist/assets;assets" '
              '--icon=assets/textures/app_icon.ico '
              '--clean '
              '--noconfirm '
              'dist/main.py')
+    
+    # 资源打包成一个文件放在 exe 旁边（运行时内存映射，不再解压）
+    build_pack('assets', os.path.join('dist', PACK_FILE))
 
 if __name__ == '__main__':
     encrypt_and_build()
@@ -0,0 +1,19 @@
+import os
+
+from Cython.Build import cythonize
+from setuptools import Extension, setup
+
+# 构建可选的 Cython 内核扩展 _kernels（见 kernels.py），生成的模块放在源码旁边。
+# 没有编译器或 Cython 的平台（如网页版）不需要构建，kernels.py 会自动使用纯 Python 实现。
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+os.chdir(current_dir)
+
+setup(
+    name='tetris-kernels',
+    ext_modules=cythonize(
+        [Extension('_kernels', ['_kernels.pyx'], extra_compile_args=['-O2'] if os.name != 'nt' else [])],
+        language_level=3,
+    ),
+    script_args=['build_ext', '--inplace'],
+)
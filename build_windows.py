@@ -1,5 +1,6 @@
 import PyInstaller.__main__
 import os
+from assetpack import build_pack, PACK_FILE
 
 # 获取当前目录
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,8 +13,11 @@ PyInstaller.__main__.run([
     '--name=疯狂俄罗斯方块',
     '--windowed',
     '--onefile',
-    f'--add-data={assets_dir}{os.pathsep}assets',
     '--icon=assets/textures/app_icon.ico',  # 如果你有图标的话
     '--clean',
     '--noconfirm',
 ])
+
+# 资源打包成一个文件放在 exe 旁边，运行时内存映射读取，
+# 不再通过 --add-data 在每次启动时解压到临时目录
+build_pack(assets_dir, os.path.join(current_dir, 'dist', PACK_FILE))
@@ -5,11 +5,10 @@ title = 硕哥的俄罗斯方块
 package.name = tetris
 package.domain = org.game
 
-# 源代码设置
+# 源代码设置（资源先用 python assetpack.py build 打包成 assets.pak）
 source.dir = .
-source.include_exts = py,png,jpg,wav,mp3,json
-source.include_patterns = assets/*
-source.exclude_dirs = tests, bin, venv, .buildozer
+source.include_exts = py,json,pak
+source.exclude_dirs = tests, bin, venv, .buildozer, assets
 
 # 版本信息
 version = 1.0
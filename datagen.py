@@ -0,0 +1,242 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import struct
+import sys
+import time
+
+import numpy as np
+
+from headless import GRID_HEIGHT, GRID_WIDTH, HeadlessGame, POLICIES, policy_cache_stats, random_policy
+
+# 训练数据导出：用无界面规则引擎按策略跑固定种子的对局，每一次落子写成一条定长记录
+# （打包的网格、当前和下一个方块、选择的落点、消行数、本局最终得分）。
+# 记录顺序写入 NumPy .npy 分片，达到大小上限后换下一个分片，另有一个小的 index.json。
+# 读取时用 np.load(path, mmap_mode='r') 直接映射，不需要解析也不复制数据。
+#
+#   python datagen.py -o data/ --games 10000 -j 8
+#   python datagen.py -o data/ --games 100 --policy random --shard-mb 16
+#
+# 分片在写入期间是 .npy.tmp，写完并回填头部的记录数后才改名，所以目录中可见的分片都是完整的。
+
+DATA_VERSION = 1
+SHARD_BYTES = 256 * 2 ** 20   # 单个分片的大小上限
+MAX_PIECES = 1000             # 每局最多落子数（启发式策略可能玩很久）
+EPSILON = 0.05                # 以此概率随机选择落点，增加数据的多样性
+INDEX_FILE = 'index.json'
+
+GRID_BYTES = (GRID_WIDTH * GRID_HEIGHT + 7) // 8
+
+RECORD_DTYPE = np.dtype([
+    ('grid', np.uint8, (GRID_BYTES,)),  # 占用位图，按行优先 np.packbits
+    ('current_piece', np.uint8),
+    ('next_piece', np.uint8),
+    ('orientation', np.uint8),          # 落子前当前方块的旋转状态（相对初始形状，0-3）
+    ('rotation', np.uint8),             # 动作：旋转次数
+    ('column', np.uint8),               # 动作：落下的列（形状最左一列）
+    ('row', np.uint8),                  # 落地行（形状最上一行）
+    ('lines_cleared', np.uint8),        # 这一步消除的行数
+    ('score', '<u4'),                   # 这一步之前的分数
+    ('final_score', '<u4'),             # 本局最终得分
+    ('game', '<u4'),                    # 对局编号
+    ('step', '<u2'),                    # 本局第几次落子
+])
+
+
+def _npy_header_dict(count):
+    return repr({'descr': np.lib.format.dtype_to_descr(RECORD_DTYPE),
+                 'fortran_order': False, 'shape': (count,)})
+
+
+# .npy 头部固定为按最大记录数计算、对齐到 64 字节的长度，写完后可以原地回填记录数
+NPY_HEADER_SIZE = (10 + len(_npy_header_dict(2 ** 64)) + 1 + 63) // 64 * 64
+
+
+def _npy_header(count):
+    """版本 1.0 的 .npy 头部，补齐到 NPY_HEADER_SIZE，记录数变化时长度不变"""
+    header = _npy_header_dict(count).ljust(NPY_HEADER_SIZE - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+class ShardWriter:
+    """顺序写入记录，超过大小上限时切换到下一个分片"""
+
+    def __init__(self, directory, prefix='shard', shard_bytes=SHARD_BYTES):
+        self.directory = directory
+        self.prefix = prefix
+        self.capacity = max(1, (shard_bytes - NPY_HEADER_SIZE) // RECORD_DTYPE.itemsize)
+        self.shards = []   # [{'file': 文件名, 'records': 记录数}]
+        self._file = None
+        self._path = None
+        self._count = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _open(self):
+        name = f'{self.prefix}-{len(self.shards):05d}.npy'
+        self._path = os.path.join(self.directory, name)
+        self._file = open(self._path + '.tmp', 'wb')
+        self._file.write(_npy_header(0))
+        self._count = 0
+
+    def _finish(self):
+        self._file.seek(0)
+        self._file.write(_npy_header(self._count))
+        self._file.close()
+        os.replace(self._path + '.tmp', self._path)
+        self.shards.append({'file': os.path.basename(self._path), 'records': self._count})
+        self._file = None
+
+    def write(self, records):
+        offset = 0
+        while offset < len(records):
+            if self._file is None:
+                self._open()
+            n = min(len(records) - offset, self.capacity - self._count)
+            self._file.write(records[offset:offset + n].tobytes())
+            self._count += n
+            offset += n
+            if self._count >= self.capacity:
+                self._finish()
+
+    def close(self):
+        if self._file is not None:
+            if self._count:
+                self._finish()
+            else:
+                self._file.close()
+                os.remove(self._path + '.tmp')
+                self._file = None
+        return self.shards
+
+
+def play_game(game_id, seed, policy, epsilon=EPSILON, max_pieces=MAX_PIECES):
+    """按策略玩完一局，返回这一局的记录数组"""
+    game = HeadlessGame(seed=seed * 2 ** 32 + game_id)
+    rng = random.Random(f'{seed}-{game_id}')
+    boards, rows = [], []
+    while not game.game_over and game.pieces_placed < max_pieces:
+        if epsilon and rng.random() < epsilon:
+            action = random_policy(game, rng)
+        else:
+            action = policy(game, rng)
+        if action is None:
+            break
+        piece = game.current_piece
+        boards.append(tuple(game.grid))
+        before = (piece, game.next_piece, game.orientations[piece], action[0], action[1], game.score)
+        lines = game.place(*action)
+        rows.append(before + (game.last_row, lines))
+
+    records = np.zeros(len(rows), RECORD_DTYPE)
+    if rows:
+        occupancy = np.array(boards, dtype=bool).reshape(len(rows), -1)
+        records['grid'] = np.packbits(occupancy, axis=1)
+        columns = list(zip(*rows))
+        for name, values in zip(('current_piece', 'next_piece', 'orientation', 'rotation',
+                                 'column', 'score', 'row', 'lines_cleared'), columns):
+            records[name] = values
+        records['final_score'] = game.score
+        records['game'] = game_id
+        records['step'] = np.arange(len(rows))
+    return records
+
+
+def generate(directory, games, seed=0, policy='heuristic', epsilon=EPSILON,
+             max_pieces=MAX_PIECES, shard_bytes=SHARD_BYTES, prefix='shard'):
+    """生成 games（对局编号的 range）中的所有对局，返回 (分片列表, 局数, 策略缓存统计)"""
+    writer = ShardWriter(directory, prefix, shard_bytes)
+    policy_fn = POLICIES[policy]
+    for game_id in games:
+        writer.write(play_game(game_id, seed, policy_fn, epsilon, max_pieces))
+    return writer.close(), len(games), policy_cache_stats()
+
+
+def _generate_worker(args):
+    return generate(*args)
+
+
+def write_index(directory, shards, **info):
+    """写出分片索引（先写临时文件再改名）"""
+    index = {
+        'version': DATA_VERSION,
+        'dtype': np.lib.format.dtype_to_descr(RECORD_DTYPE),
+        'record_size': RECORD_DTYPE.itemsize,
+        'grid_shape': [GRID_HEIGHT, GRID_WIDTH],
+        **info,
+        'records': sum(shard['records'] for shard in shards),
+        'shards': shards,
+    }
+    path = os.path.join(directory, INDEX_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(path + '.tmp', path)
+    return index
+
+
+def run(directory, games, seed=0, policy='heuristic', epsilon=EPSILON, max_pieces=MAX_PIECES,
+        shard_bytes=SHARD_BYTES, workers=1):
+    """把对局分给多个进程，每个进程写自己的分片序列，最后汇总索引"""
+    workers = max(1, min(workers, games))
+    bounds = [games * k // workers for k in range(workers + 1)]
+    jobs = [(directory, range(bounds[k], bounds[k + 1]), seed, policy, epsilon, max_pieces,
+             shard_bytes, f'shard-{k:02d}') for k in range(workers)]
+    if workers == 1:
+        results = [_generate_worker(jobs[0])]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(_generate_worker, jobs)
+    shards = [shard for worker_shards, _, _ in results for shard in worker_shards]
+    info = {}
+    cache = [stats for _, _, stats in results if stats]
+    if cache:
+        probes = sum(stats['probes'] for stats in cache)
+        hits = sum(stats['hits'] for stats in cache)
+        info['cache'] = {'probes': probes, 'hits': hits,
+                         'hit_rate': round(hits / probes, 4) if probes else 0.0}
+    return write_index(directory, shards, games=games, seed=seed, policy=policy,
+                       epsilon=epsilon, max_pieces=max_pieces, **info)
+
+
+def open_dataset(directory):
+    """按索引以只读内存映射打开所有分片，返回数组列表"""
+    with open(os.path.join(directory, INDEX_FILE)) as f:
+        index = json.load(f)
+    if index.get('version') != DATA_VERSION:
+        raise ValueError(f'Unsupported dataset version: {index.get("version")}')
+    return [np.load(os.path.join(directory, shard['file']), mmap_mode='r') for shard in index['shards']]
+
+
+def unpack_grids(records):
+    """把记录中的打包网格还原为 (N, GRID_HEIGHT, GRID_WIDTH) 的布尔数组"""
+    bits = np.unpackbits(records['grid'], axis=-1, count=GRID_HEIGHT * GRID_WIDTH)
+    return bits.reshape(-1, GRID_HEIGHT, GRID_WIDTH).astype(bool)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export (board, piece, action, outcome) training records')
+    parser.add_argument('-o', '--output', required=True, help='output directory')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='heuristic')
+    parser.add_argument('--epsilon', type=float, default=EPSILON, help='probability of a random placement')
+    parser.add_argument('--max-pieces', type=int, default=MAX_PIECES)
+    parser.add_argument('--shard-mb', type=float, default=SHARD_BYTES / 2 ** 20)
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    start = time.time()
+    index = run(args.output, args.games, args.seed, args.policy, args.epsilon, args.max_pieces,
+                int(args.shard_mb * 2 ** 20), args.workers)
+    elapsed = time.time() - start
+    print(f"{index['records']} records from {args.games} games in {len(index['shards'])} shards "
+          f"({elapsed:.1f} s, {index['records'] / max(elapsed, 1e-9):.0f} records/s)", file=sys.stderr)
+    if 'cache' in index:
+        cache = index['cache']
+        print(f"Transposition table: {cache['hits']}/{cache['probes']} hits ({cache['hit_rate']:.1%})",
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
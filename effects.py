@@ -0,0 +1,73 @@
+import math
+import pygame
+
+# 过渡特效：预先分配闪光/淡入淡出遮罩，预渲染升级文字的缩放帧，
+# 避免动画播放期间每帧创建 Surface 和字体。
+
+LEVEL_UP_FRAME_COUNT = 24  # 升级文字缩放曲线的预渲染帧数
+LEVEL_UP_FONT_SIZE = 72
+
+
+class OverlayPool:
+    """纯色遮罩池：每种尺寸和颜色只分配一次，透明度通过 set_alpha 调整"""
+
+    def __init__(self):
+        self._surfaces = {}
+
+    def get(self, size, color, alpha):
+        key = (tuple(size), tuple(color))
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface(size)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            surface.fill(color)
+            self._surfaces[key] = surface
+        surface.set_alpha(max(0, min(255, alpha)))
+        return surface
+
+
+class LevelUpFrames:
+    """升级文字动画：按 1 + sin(progress * pi) * 0.3 的缩放曲线预渲染若干帧。
+    下一级的帧在平时由 prepare 每帧渲染一点，升级那一帧直接取用"""
+
+    def __init__(self, frame_count=LEVEL_UP_FRAME_COUNT):
+        self.frame_count = frame_count
+        self._font = None
+        self._texts = {}    # (等级, 颜色) -> 未缩放的文字
+        self._frames = {}   # (等级, 颜色) -> 已渲染的缩放帧
+
+    def prepare(self, level, color=(255, 255, 255), budget=1):
+        """预渲染某一级的缩放帧，每次最多渲染 budget 帧；全部渲染完时返回 True"""
+        key = (level, tuple(color))
+        frames = self._frames.get(key)
+        if frames is None:
+            # 只保留正在显示的一级和下一级
+            for old in [k for k in self._frames if k[0] not in (level - 1, level)]:
+                del self._frames[old]
+                self._texts.pop(old, None)
+            if self._font is None:
+                self._font = pygame.font.Font(None, LEVEL_UP_FONT_SIZE)
+            self._texts[key] = self._font.render(f'LEVEL {level}!', True, color)
+            frames = self._frames[key] = []
+            budget -= 1  # 文字本身也算一次渲染
+        text = self._texts[key]
+        width, height = text.get_size()
+        while budget > 0 and len(frames) < self.frame_count:
+            progress = (len(frames) + 0.5) / self.frame_count
+            scale = 1 + math.sin(progress * math.pi) * 0.3
+            frames.append(pygame.transform.smoothscale(
+                text, (int(width * scale), int(height * scale))))
+            budget -= 1
+        return len(frames) == self.frame_count
+
+    def frame(self, level, progress, color=(255, 255, 255)):
+        """返回给定进度 (0~1) 对应的预渲染文字帧，没有预渲染完时先补齐"""
+        self.prepare(level, color, budget=self.frame_count + 1)
+        frames = self._frames[(level, tuple(color))]
+        index = min(self.frame_count - 1, max(0, int(progress * self.frame_count)))
+        return frames[index]
+
+
+# 全局共享的遮罩池（Surface 与对局状态无关，可以跨实例复用）
+overlay_pool = OverlayPool()
@@ -0,0 +1,397 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import kernels
+from headless import GRID_HEIGHT, GRID_WIDTH, HeadlessGame
+
+# 多进程环境池：用于强化学习和参数调优。每个工作进程用无界面规则引擎（headless.HeadlessGame）
+# 运行一组对局，观测、奖励和结束标志直接写进 multiprocessing.shared_memory 上的 NumPy 数组，
+# 训练进程读取时不经过 pickle，也不复制数据。
+# 动作是 旋转次数 * 宽度 + 列（与 HeadlessGame.place 相同），action_mask 标出当前合法的动作；
+# 非法动作直接结束这一局。奖励是这一步的得分增量。
+# 对局结束（或达到 max_pieces 被截断）时立即开始下一局：done / truncated 置位，
+# episode_score / episode_length 记录刚结束的那一局，观测已经是新一局的。
+# 每个工作进程有一个唤醒信号量，所有进程共用一个完成信号量，每一步只有这两次同步：
+#   同步   - pool.step(actions) 等所有环境走完一步
+#   异步   - pool.send(actions, env_ids) 后 pool.recv() 返回先走完的那些环境（按工作进程分批）
+# 返回的数组都是共享内存的视图，下一步会被覆盖，需要保留时自己复制。
+#
+#   python envpool.py --envs 64 -j 4 --steps 500          # 同步和异步模式的吞吐量
+#   python envpool.py --envs 64 -j 4 --steps 500 --pipe   # 另外对比用管道传递观测的方式
+
+MAX_PIECES = 1000        # 每局最多落子数，达到后截断
+RECV_TIMEOUT = 1.0       # 等待工作进程时每隔这么久检查一次它们是否还活着（秒）
+BENCH_ENVS = 64
+BENCH_STEPS = 500
+
+# 工作进程命令
+STEP, RESET, CLOSE = 0, 1, 2
+
+# 训练进程读取的数组（EnvPool 上同名的属性）
+OBSERVATION_FIELDS = ('board', 'current_piece', 'next_piece', 'action_mask', 'reward', 'done',
+                      'truncated', 'episode_score', 'episode_length')
+
+
+def _layout(num_envs, workers, width, height):
+    """共享内存中的数组：[(名字, 类型, 形状)]"""
+    return [
+        ('board', np.uint8, (num_envs, height, width)),   # 0 为空，1-7 为方块颜色
+        ('current_piece', np.int8, (num_envs,)),
+        ('next_piece', np.int8, (num_envs,)),
+        ('action_mask', np.bool_, (num_envs, 4 * width)),
+        ('reward', np.float32, (num_envs,)),
+        ('done', np.bool_, (num_envs,)),
+        ('truncated', np.bool_, (num_envs,)),
+        ('episode_score', np.int32, (num_envs,)),
+        ('episode_length', np.int32, (num_envs,)),
+        ('actions', np.int32, (num_envs,)),
+        ('pending', np.bool_, (num_envs,)),       # 本次唤醒需要处理的环境
+        ('command', np.int8, (workers,)),
+        ('ready', np.bool_, (workers,)),          # 工作进程已经处理完
+    ]
+
+
+def _buffer_size(layout):
+    size = 0
+    for _, dtype, shape in layout:
+        size = (size + 7) // 8 * 8 + int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return size
+
+
+def _views(buf, layout):
+    """按布局在共享内存上建立数组视图（每个数组对齐到 8 字节）"""
+    arrays = {}
+    offset = 0
+    for name, dtype, shape in layout:
+        offset = (offset + 7) // 8 * 8
+        arrays[name] = np.ndarray(shape, dtype, buffer=buf, offset=offset)
+        offset += arrays[name].nbytes
+    return arrays
+
+
+class _Envs:
+    """一个工作进程负责的对局，结果直接写入 arrays（按全局环境编号索引）"""
+
+    def __init__(self, env_ids, arrays, seed, max_pieces, width, height):
+        self.env_ids = env_ids
+        self.arrays = arrays
+        self.max_pieces = max_pieces
+        self.width = width
+        self.height = height
+        # 每个环境的对局种子序列只取决于总种子和环境编号，与工作进程数无关
+        self.rngs = {i: random.Random(f'{seed}-{i}') for i in env_ids}
+        self.games = {i: HeadlessGame(self.rngs[i].randrange(2 ** 31), width, height) for i in env_ids}
+
+    def reset(self, i):
+        self.games[i].reset(self.rngs[i].randrange(2 ** 31))
+        a = self.arrays
+        a['reward'][i] = 0
+        a['done'][i] = a['truncated'][i] = False
+        self.observe(i)
+
+    def step(self, i):
+        a = self.arrays
+        game = self.games[i]
+        rotation, col = divmod(int(a['actions'][i]), self.width)
+        before = game.score
+        try:
+            game.place(rotation, col)
+        except ValueError:
+            game.game_over = True  # 非法动作结束这一局
+        a['reward'][i] = game.score - before
+        done = game.game_over
+        truncated = not done and game.pieces_placed >= self.max_pieces
+        a['done'][i] = done
+        a['truncated'][i] = truncated
+        if done or truncated:
+            a['episode_score'][i] = game.score
+            a['episode_length'][i] = game.pieces_placed
+            game.reset(self.rngs[i].randrange(2 ** 31))
+        self.observe(i)
+
+    def observe(self, i):
+        """写出对局 i 当前的观测：网格、当前和下一个方块、合法动作"""
+        a = self.arrays
+        game = self.games[i]
+        a['board'][i] = np.frombuffer(kernels.board_buffer(game.grid), np.uint8).reshape(self.height, self.width)
+        a['current_piece'][i] = game.current_piece
+        a['next_piece'][i] = game.next_piece
+        mask = a['action_mask'][i]
+        mask[:] = False
+        if not game.game_over:
+            for rotation, col, _ in game.placements():
+                mask[rotation * self.width + col] = True
+
+    def handle(self, command):
+        """处理所有标记为待处理的环境"""
+        pending = self.arrays['pending']
+        for i in self.env_ids:
+            if pending[i]:
+                pending[i] = False
+                if command == RESET:
+                    self.reset(i)
+                else:
+                    self.step(i)
+
+
+def _worker(index, env_ids, shm_name, layout, seed, max_pieces, width, height, wake, completed):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    arrays = _views(shm.buf, layout)
+    try:
+        envs = _Envs(env_ids, arrays, seed, max_pieces, width, height)
+        for i in env_ids:
+            envs.observe(i)
+        command, ready = arrays['command'], arrays['ready']
+        while True:
+            ready[index] = True
+            completed.release()
+            wake.acquire()
+            if command[index] == CLOSE:
+                break
+            envs.handle(command[index])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        arrays = envs = command = ready = None  # 关闭共享内存前先释放所有视图
+        shm.close()
+
+
+class EnvPool:
+    def __init__(self, num_envs, workers=None, seed=0, max_pieces=MAX_PIECES,
+                 width=GRID_WIDTH, height=GRID_HEIGHT):
+        workers = max(1, min(workers or os.cpu_count() or 1, num_envs))
+        self.num_envs = num_envs
+        self.workers = workers
+        self.width = width
+        self.num_actions = 4 * width
+        layout = _layout(num_envs, workers, width, height)
+        self._shm = shared_memory.SharedMemory(create=True, size=_buffer_size(layout))
+        self._arrays = _views(self._shm.buf, layout)
+        for name in OBSERVATION_FIELDS:
+            setattr(self, name, self._arrays[name])
+
+        bounds = [num_envs * k // workers for k in range(workers + 1)]
+        self._sent = [np.arange(bounds[k], bounds[k + 1]) for k in range(workers)]  # 每个工作进程本次处理的环境
+        self._worker_of = np.repeat(np.arange(workers), np.diff(bounds))
+        self._in_flight = set(range(workers))  # 启动后每个工作进程先报告一次就绪
+        self._wake = [multiprocessing.Semaphore(0) for _ in range(workers)]
+        self._completed = multiprocessing.Semaphore(0)
+        self._processes = [
+            multiprocessing.Process(
+                target=_worker, daemon=True, name=f'envpool-{k}',
+                args=(k, list(range(bounds[k], bounds[k + 1])), self._shm.name, layout, seed,
+                      max_pieces, width, height, self._wake[k], self._completed))
+            for k in range(workers)
+        ]
+        try:
+            for process in self._processes:
+                process.start()
+            self._wait(set(range(workers)))
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _dispatch(self, command, env_ids, actions=None):
+        """写入动作、标记待处理的环境并唤醒对应的工作进程"""
+        targets = set(self._worker_of[env_ids].tolist())
+        busy = targets & self._in_flight
+        if busy:
+            raise ValueError(f'Environments of worker(s) {sorted(busy)} are still stepping; call recv() first')
+        if actions is not None:
+            self._arrays['actions'][env_ids] = actions
+        self._arrays['pending'][env_ids] = True
+        workers = self._worker_of[env_ids]
+        for k in targets:
+            self._sent[k] = env_ids[workers == k]
+            self._arrays['ready'][k] = False
+            self._arrays['command'][k] = command
+            self._in_flight.add(k)
+            self._wake[k].release()
+
+    def _collect(self):
+        """阻塞到至少一个在途的工作进程完成，返回完成的工作进程"""
+        if not self._in_flight:
+            raise ValueError('Nothing to receive; call send() first')
+        ready = self._arrays['ready']
+        while True:
+            # 就绪标志先于信号量设置，多出来的信号量计数会让下一次等待立即返回，再检查一遍即可
+            if not self._completed.acquire(timeout=RECV_TIMEOUT):
+                dead = [p.name for p in self._processes if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f'Environment worker(s) exited: {", ".join(dead)}')
+                continue
+            while self._completed.acquire(block=False):
+                pass
+            finished = {k for k in self._in_flight if ready[k]}
+            if finished:
+                self._in_flight -= finished
+                return finished
+
+    def _wait(self, workers):
+        while workers & self._in_flight:
+            self._collect()
+
+    def reset(self):
+        """所有环境开始新的一局，返回网格数组"""
+        self._wait(set(self._in_flight))
+        self._dispatch(RESET, np.arange(self.num_envs))
+        self._wait(set(range(self.workers)))
+        return self.board
+
+    def step(self, actions):
+        """同步模式：所有环境执行一步，返回 (网格, 奖励, 结束, 截断)，都是共享内存的视图"""
+        self.send(actions)
+        self._wait(set(range(self.workers)))
+        return self.board, self.reward, self.done, self.truncated
+
+    def send(self, actions, env_ids=None):
+        """异步模式：让 env_ids（默认全部）执行对应的动作，立即返回"""
+        env_ids = np.arange(self.num_envs) if env_ids is None else np.asarray(env_ids)
+        self._dispatch(STEP, env_ids, actions)
+
+    def recv(self):
+        """异步模式：等待先走完的工作进程，返回它们这一步处理的环境编号"""
+        finished = self._collect()
+        return np.concatenate([self._sent[k] for k in sorted(finished)])
+
+    def close(self):
+        if self._shm is None:
+            return
+        try:
+            self._wait(set(self._in_flight))
+        except RuntimeError:
+            pass
+        for k, process in enumerate(self._processes):
+            if process.is_alive():
+                self._arrays['command'][k] = CLOSE
+                self._wake[k].release()
+        for process in self._processes:
+            if process.pid is None:
+                continue  # 没有启动成功
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        # 关闭共享内存前先释放所有视图
+        for name in self._arrays:
+            self.__dict__.pop(name, None)
+        self._arrays = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+
+def _pipe_worker(conn, env_ids, layout, seed, max_pieces, width, height):
+    """对比用：同样的对局，但观测经过管道（pickle）传回"""
+    arrays = {name: np.zeros(shape, dtype) for name, dtype, shape in layout}
+    envs = _Envs(env_ids, arrays, seed, max_pieces, width, height)
+    lo, hi = env_ids[0], env_ids[-1] + 1
+    for i in env_ids:
+        envs.observe(i)
+    conn.send({name: arrays[name][lo:hi] for name in OBSERVATION_FIELDS})
+    while True:
+        actions = conn.recv()
+        if actions is None:
+            break
+        arrays['actions'][lo:hi] = actions
+        for i in env_ids:
+            envs.step(i)
+        conn.send({name: arrays[name][lo:hi] for name in OBSERVATION_FIELDS})
+
+
+def random_actions(rng, mask):
+    """每个环境在合法动作中均匀随机选一个"""
+    scores = rng.random(mask.shape)
+    scores[~mask] = -1
+    return scores.argmax(axis=1)
+
+
+def benchmark(mode, num_envs=BENCH_ENVS, workers=None, steps=BENCH_STEPS, seed=0):
+    """随机合法动作下每秒的环境步数；mode 为 sync / async / pipe"""
+    rng = np.random.default_rng(seed)
+    total = steps * num_envs
+    if mode == 'pipe':
+        return _benchmark_pipe(rng, num_envs, workers, steps, seed)
+    with EnvPool(num_envs, workers, seed) as pool:
+        pool.reset()
+        start = time.perf_counter()
+        if mode == 'sync':
+            for _ in range(steps):
+                pool.step(random_actions(rng, pool.action_mask))
+        else:
+            pool.send(random_actions(rng, pool.action_mask))
+            done = 0
+            while done < total:
+                env_ids = pool.recv()
+                done += len(env_ids)
+                pool.send(random_actions(rng, pool.action_mask[env_ids]), env_ids)
+            total = done
+        elapsed = time.perf_counter() - start
+    return total / elapsed
+
+
+def _benchmark_pipe(rng, num_envs, workers, steps, seed):
+    workers = max(1, min(workers or os.cpu_count() or 1, num_envs))
+    layout = _layout(num_envs, workers, GRID_WIDTH, GRID_HEIGHT)
+    bounds = [num_envs * k // workers for k in range(workers + 1)]
+    conns, processes = [], []
+    for k in range(workers):
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_pipe_worker, daemon=True,
+            args=(child, list(range(bounds[k], bounds[k + 1])), layout, seed, MAX_PIECES,
+                  GRID_WIDTH, GRID_HEIGHT))
+        process.start()
+        conns.append(parent)
+        processes.append(process)
+    arrays = {name: np.zeros(shape, dtype) for name, dtype, shape in layout}
+
+    def gather():
+        for k, conn in enumerate(conns):
+            for name, values in conn.recv().items():
+                arrays[name][bounds[k]:bounds[k + 1]] = values
+
+    gather()
+    start = time.perf_counter()
+    for _ in range(steps):
+        actions = random_actions(rng, arrays['action_mask'])
+        for k, conn in enumerate(conns):
+            conn.send(actions[bounds[k]:bounds[k + 1]])
+        gather()
+    elapsed = time.perf_counter() - start
+    for conn, process in zip(conns, processes):
+        conn.send(None)
+        process.join()
+    return steps * num_envs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure environment pool throughput with random legal actions')
+    parser.add_argument('--envs', type=int, default=BENCH_ENVS)
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--steps', type=int, default=BENCH_STEPS, help='steps per environment')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pipe', action='store_true', help='also measure pipe-based observation transfer')
+    args = parser.parse_args()
+
+    modes = ('sync', 'async', 'pipe') if args.pipe else ('sync', 'async')
+    print(f"{args.envs} environments, {args.workers} workers, {args.steps} steps each", file=sys.stderr)
+    for mode in modes:
+        rate = benchmark(mode, args.envs, args.workers, args.steps, args.seed)
+        print(f"{mode:<6}{rate:>12.0f} steps/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import pygame
+
+# 触摸手势识别：每帧只记录手指的最新位置，帧末一次性计算净位移并分类手势，
+# 无论触摸屏每帧产生多少 FINGERMOTION 事件，处理开销都保持不变。
+
+# 手势动作
+MOVE = 'move'            # 参数：净移动列数（正数向右）
+SOFT_DROP = 'soft_drop'  # 参数：下移行数
+ROTATE = 'rotate'        # 轻点
+HARD_DROP = 'hard_drop'  # 快速下滑
+HOLD = 'hold'            # 长按
+
+TAP_MAX_DURATION = 250    # 轻点的最长按下时间（毫秒）
+HOLD_MIN_DURATION = 600   # 长按的最短按下时间（毫秒）
+FLICK_MIN_VELOCITY = 1.5  # 快速下滑的最低速度（逻辑像素/毫秒）
+
+# 手势识别用不到、只会占用事件队列的事件类型（触摸时 SDL 还会额外合成鼠标事件）
+UNUSED_EVENTS = [
+    pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+    pygame.MOUSEWHEEL, pygame.TEXTINPUT, pygame.TEXTEDITING,
+    pygame.JOYAXISMOTION, pygame.JOYBALLMOTION, pygame.JOYHATMOTION,
+    pygame.MULTIGESTURE,
+]
+
+
+class GestureRecognizer:
+    def __init__(self, to_logical, cell_size):
+        self.to_logical = to_logical  # 归一化窗口坐标 -> 逻辑坐标
+        self.cell_size = cell_size
+        self.finger = None      # 当前跟踪的手指 id
+        self.start = None       # 按下位置
+        self.start_time = 0
+        self.anchor = None      # 已经换算成移动后的参考位置
+        self.current = None     # 本帧最新位置
+        self.moved = False      # 是否已经产生过移动
+        self.held = False       # 长按是否已经触发
+        self._released = None   # 本帧抬起时的 (位置, 时间)
+
+    def feed(self, event, now):
+        """记录一个触摸事件；同一帧内的多次移动只保留最后的位置"""
+        if event.type == pygame.FINGERDOWN:
+            if self.finger is not None:
+                return  # 只跟踪第一根手指
+            self.finger = event.finger_id
+            self.start = self.anchor = self.current = self.to_logical(event.x, event.y)
+            self.start_time = now
+            self.moved = self.held = False
+        elif event.finger_id != self.finger:
+            return
+        elif event.type == pygame.FINGERMOTION:
+            self.current = self.to_logical(event.x, event.y)
+        elif event.type == pygame.FINGERUP:
+            self.current = self.to_logical(event.x, event.y)
+            self._released = (self.current, now)
+
+    def update(self, now):
+        """每帧调用一次，返回本帧识别出的动作列表 [(动作, 参数)]"""
+        if self.finger is None:
+            return []
+        actions = []
+
+        # 按整格换算拖动的净位移
+        columns = int((self.current[0] - self.anchor[0]) / self.cell_size)
+        rows = int((self.current[1] - self.anchor[1]) / self.cell_size)
+        if columns:
+            actions.append((MOVE, columns))
+            self.anchor = (self.anchor[0] + columns * self.cell_size, self.anchor[1])
+            self.moved = True
+
+        if self._released is not None:
+            _, up_time = self._released
+            duration = max(1, up_time - self.start_time)
+            dx = self.current[0] - self.start[0]
+            dy = self.current[1] - self.start[1]
+            small = abs(dx) < self.cell_size and abs(dy) < self.cell_size
+            if dy > 2 * self.cell_size and dy / duration >= FLICK_MIN_VELOCITY and abs(dx) < dy:
+                actions.append((HARD_DROP, None))
+            elif rows > 0:
+                actions.append((SOFT_DROP, rows))
+            elif small and not self.moved and not self.held and duration <= TAP_MAX_DURATION:
+                actions.append((ROTATE, None))
+            self.finger = None
+            self._released = None
+            return actions
+
+        if rows > 0:
+            actions.append((SOFT_DROP, rows))
+            self.anchor = (self.anchor[0], self.anchor[1] + rows * self.cell_size)
+            self.moved = True
+
+        # 没有移动且按住足够久视为长按，只触发一次
+        if not self.moved and not self.held and now - self.start_time >= HOLD_MIN_DURATION:
+            dx = self.current[0] - self.start[0]
+            dy = self.current[1] - self.start[1]
+            if abs(dx) < self.cell_size and abs(dy) < self.cell_size:
+                actions.append((HOLD, None))
+                self.held = True
+        return actions
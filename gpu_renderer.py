@@ -0,0 +1,235 @@
+import random
+
+import pygame
+
+from render_target import fit_rect, window_to_logical
+
+# 硬件加速渲染后端：烘焙好的方块材质在第一帧前全部上传为纹理（颜色集合在加载时
+# 已经固定，运行时不会再上传）；预览阴影和粒子使用白色模板纹理，绘制时通过
+# 颜色/透明度调制和旋转完成，混合与缩放交给 GPU。
+# 没有可用的加速渲染器时返回 None，游戏继续使用 Surface 软件绘制。
+
+try:
+    from pygame._sdl2.video import Window, Renderer, Texture
+except ImportError:  # 旧版 pygame 或不支持 _sdl2 的平台（如部分 Web 构建）
+    Window = Renderer = Texture = None
+
+# 渲染后端：surface（默认软件绘制）/ gpu（硬件加速）/ gpu-software（SDL 软件渲染器，用于 CI）
+RENDERER_MODES = ('surface', 'gpu', 'gpu-software')
+
+PARTICLE_TEXTURE_SIZE = 32  # 粒子模板纹理的边长，绘制时按粒子大小缩放
+
+
+def create_texture_renderer(mode, logical_size, game_module, title='', icon=None):
+    """按模式创建纹理渲染后端，不可用时返回 None 以回退到 Surface 绘制"""
+    if mode not in RENDERER_MODES:
+        raise ValueError(f'Unknown renderer: {mode}')
+    if mode == 'surface' or Renderer is None:
+        return None
+    try:
+        return TextureRenderer(logical_size, game_module, title, icon,
+                               accelerated=mode == 'gpu')
+    except Exception as e:
+        print(f"Warning: Texture renderer unavailable, using surface renderer: {e}")
+        return None
+
+
+class TextureRenderer:
+    def __init__(self, logical_size, game_module, title='', icon=None, accelerated=True):
+        self.logical_size = tuple(logical_size)
+        self.game_module = game_module  # 提供 BLOCK_SIZE、SHAPES 等常量的游戏模块
+        self.window = Window(title, self.logical_size, resizable=True)
+        if icon is not None:
+            self.window.set_icon(icon)
+        self.renderer = Renderer(self.window, accelerated=1 if accelerated else 0)
+        # SDL 负责保持宽高比缩放并留黑边
+        self.renderer.logical_size = self.logical_size
+
+        # 文字、等级提升和暂停遮罩画在这个透明表面上，变化时才重新上传
+        self.surface = pygame.Surface(self.logical_size, pygame.SRCALPHA)
+        self._hud_texture = None
+        self._hud_signature = None
+        self._static = {}      # 背景、网格等静态纹理 {名称: (源 Surface, Texture)}
+        self._sprites = None
+        self._blocks = None    # 方块材质纹理 {颜色键: Texture}，与 MaterialBaker 的烘焙结果一一对应
+
+    # 与 RenderTarget 相同的接口
+    def resize(self, window_size):
+        pass
+
+    def to_logical(self, x, y):
+        window_size = self.window.size
+        rect = fit_rect(self.logical_size, window_size)
+        return window_to_logical(self.logical_size, window_size, rect, x, y)
+
+    def present(self):
+        self.renderer.present()
+
+    def _texture(self, surface):
+        texture = Texture.from_surface(self.renderer, surface)
+        texture.blend_mode = pygame.BLENDMODE_BLEND
+        return texture
+
+    def _static_texture(self, name, surface):
+        """静态图层：源 Surface 不变时只上传一次"""
+        cached = self._static.get(name)
+        if cached is None or cached[0] is not surface:
+            cached = (surface, self._texture(surface))
+            self._static[name] = cached
+        return cached[1]
+
+    def _build_sprites(self, game):
+        """上传白色模板纹理，颜色在绘制时调制"""
+        m = self.game_module
+        size = m.BLOCK_SIZE
+        sprites = {}
+
+        fill = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.rect(fill, (255, 255, 255, 255), (2, 2, size - 4, size - 4))
+        sprites['ghost_fill'] = self._texture(fill)
+        border = pygame.Surface((size, size), pygame.SRCALPHA)
+        m.draw_dashed_border(border, (255, 255, 255, 255))
+        sprites['ghost_border'] = self._texture(border)
+        outline = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.rect(outline, (255, 255, 255, 255), (0, 0, size, size), 1)
+        sprites['ghost_outline'] = self._texture(outline)
+
+        p = PARTICLE_TEXTURE_SIZE
+        circle = pygame.Surface((p, p), pygame.SRCALPHA)
+        pygame.draw.circle(circle, (255, 255, 255, 255), (p // 2, p // 2), p // 2)
+        sprites['circle'] = self._texture(circle)
+        square = pygame.Surface((p, p), pygame.SRCALPHA)
+        pygame.draw.rect(square, (255, 255, 255, 255), (p // 4, p // 4, p // 2, p // 2))
+        sprites['square'] = self._texture(square)
+        return sprites
+
+    def _upload_blocks(self, game):
+        """把全部烘焙好的方块材质上传为纹理，之后绘制只查表"""
+        return {color: self._texture(surface) for color, surface in game.materials.items()}
+
+    def _draw_block(self, game, color, x, y):
+        texture = self._blocks[game.materials.key(color)]
+        texture.draw(dstrect=(x, y, self.game_module.BLOCK_SIZE, self.game_module.BLOCK_SIZE))
+
+    def _draw_particles(self, animation, glow_enabled):
+        circle = self._sprites['circle']
+        square = self._sprites['square']
+        for particle in animation.particles:
+            if particle.alpha <= 0:
+                continue
+            # 发光：半径为粒子大小两倍的半透明圆（低画质下省略）
+            if glow_enabled:
+                glow = particle.size * 2
+                circle.color = particle.color[:3]
+                circle.alpha = 50
+                circle.draw(dstrect=(int(particle.x - glow), int(particle.y - glow), glow * 2, glow * 2))
+            # 核心粒子，与 Particle.draw 一样随机选择方形或圆形
+            sprite = square if random.random() < 0.5 else circle
+            size = particle.size * 2
+            sprite.color = particle.color[:3]
+            sprite.alpha = particle.alpha
+            sprite.draw(dstrect=(int(particle.x - size / 2), int(particle.y - size / 2), size, size),
+                        angle=-particle.rotation)
+
+    def _draw_ghost(self, game):
+        m = self.game_module
+        if not game.show_ghost_piece or not game.current_piece:
+            return
+        ghost_pos = game.get_ghost_piece_position()
+        if not ghost_pos:
+            return
+        ghost_color, border_color = m.ghost_colors(m.COLORS[game.current_piece])
+        fill = self._sprites['ghost_fill']
+        border = self._sprites['ghost_border' if game.quality.tier.ghost_dashes else 'ghost_outline']
+        fill.color, fill.alpha = ghost_color[:3], ghost_color[3]
+        border.color, border.alpha = border_color[:3], border_color[3]
+        for i, row in enumerate(m.SHAPES[game.current_piece]):
+            for j, cell in enumerate(row):
+                if cell:
+                    rect = ((ghost_pos[1] + j) * m.BLOCK_SIZE, (ghost_pos[0] + i) * m.BLOCK_SIZE,
+                            m.BLOCK_SIZE, m.BLOCK_SIZE)
+                    fill.draw(dstrect=rect)
+                    border.draw(dstrect=rect)
+
+    def _draw_hud(self, game):
+        """HUD 内容没变时复用上一次上传的纹理"""
+        signature = (game.score, game.level, game.high_score, game.state, game.quality.index,
+                     game.profile_status)
+        if game.level_up_animation_start or signature != self._hud_signature:
+            self.surface.fill((0, 0, 0, 0))
+            game.draw_level_up_animation()
+            game.draw_hud()
+            if self._hud_texture is None:
+                self._hud_texture = self._texture(self.surface)
+            else:
+                self._hud_texture.update(self.surface)
+            self._hud_signature = signature
+        self._hud_texture.draw()
+
+    def draw(self, game):
+        """绘制一帧，与 Tetris.draw 的图层顺序相同"""
+        m = self.game_module
+        size = m.BLOCK_SIZE
+        tracer = game.tracer
+        start = tracer.begin()
+        if self._sprites is None:
+            self._sprites = self._build_sprites(game)
+            self._blocks = self._upload_blocks(game)
+            start = tracer.end('gpu.upload_textures', start)
+        renderer = self.renderer
+        renderer.draw_color = (0, 0, 0, 255)
+        renderer.clear()
+
+        # 背景和网格线
+        self._static_texture('background', game.background).draw()
+        if game.quality.tier.background_detail:
+            self._static_texture('grid', game.grid_surface).draw()
+        start = tracer.end('gpu.background', start)
+
+        # 已落下的方块
+        for y in range(m.GRID_HEIGHT):
+            row = game.grid[y]
+            for x in range(m.GRID_WIDTH):
+                if row[x]:
+                    self._draw_block(game, game.apply_rainbow_effect(m.COLORS[row[x] - 1]),
+                                     x * size, y * size)
+
+        # 当前方块
+        if game.current_piece is not None:
+            color = game.apply_rainbow_effect(m.COLORS[game.current_piece])
+            for y, row in enumerate(m.SHAPES[game.current_piece]):
+                for x, cell in enumerate(row):
+                    if cell:
+                        self._draw_block(game, color, (game.piece_pos[1] + x) * size,
+                                         (game.piece_pos[0] + y) * size)
+        start = tracer.end('gpu.board', start)
+
+        # 下一个方块预览
+        preview_x = m.GRID_WIDTH * size + size
+        preview_y = size
+        renderer.draw_color = (*m.GRAY, 255)
+        renderer.draw_rect((preview_x, preview_y, 4 * size, 4 * size))
+        if game.next_piece is not None:
+            for y, row in enumerate(m.SHAPES[game.next_piece]):
+                for x, cell in enumerate(row):
+                    if cell:
+                        self._draw_block(game, m.COLORS[game.next_piece],
+                                         preview_x + (x + 1) * size, preview_y + (y + 1) * size)
+        start = tracer.end('gpu.preview', start)
+
+        # 消除动画：闪光直接填充矩形，粒子用模板纹理
+        renderer.draw_blend_mode = pygame.BLENDMODE_BLEND
+        for animation in game.clear_animations:
+            flash_alpha = animation.flash_alpha()
+            if flash_alpha > 0:
+                renderer.draw_color = (255, 255, 255, flash_alpha)
+                renderer.fill_rect((0, animation.y, m.GRID_WIDTH * size, size))
+            self._draw_particles(animation, game.quality.tier.glow)
+        start = tracer.end('gpu.clear_animations', start)
+
+        self._draw_ghost(game)
+        start = tracer.end('gpu.ghost', start)
+        self._draw_hud(game)
+        start = tracer.end('gpu.hud', start)
+        renderer.present()
+        tracer.end('gpu.present', start)
@@ -0,0 +1,156 @@
+import os
+
+# 重力与锁定延迟：速度用 G（每帧下落的行数，按 60 FPS 计）表示，
+# 下落时间按小数累积，一次更新可以下落多行，并且只需要查一次到底的距离，
+# 20G 时方块生成后立即落到底。方块着地后经过锁定延迟才会锁定，
+# 期间移动或旋转可以重置计时，但每个方块的重置次数有上限。
+# 经典曲线保持原来的锁定方式：下一次下落的时间到了仍然着地就锁定，移动和旋转不推迟锁定。
+
+FRAME_MS = 1000 / 60
+MAX_GRAVITY = 20.0       # 20G：瞬间落到底
+LOCK_DELAY_MS = 500      # 着地后到锁定的时间
+MAX_LOCK_RESETS = 15     # 每个方块最多重置锁定计时的次数（到达更低的行时清零）
+COMPETITIVE_MAX_LEVEL = 20  # 指数曲线在这一级达到 20G，更高的等级按这一级计算（否则底数会变成负数）
+
+# 速度曲线
+#   classic     - 原来的曲线：每级快 100ms，10 级后保持每行 100ms
+#   competitive - 指数曲线，约 14 级超过 1G，20 级达到 20G
+#   数字        - 固定的 G 值（如 20 表示始终 20G，用于压力测试）
+GRAVITY_CURVES = ('classic', 'competitive')
+
+
+def drop_distance(grid, shape, row, col):
+    """方块从 (row, col) 最多还能下落几行：每列只从方块最低的格子向下找第一个障碍"""
+    height = len(grid)
+    distance = height
+    for j in range(len(shape[0])):
+        bottom = None
+        for i in range(len(shape) - 1, -1, -1):
+            if shape[i][j]:
+                bottom = i
+                break
+        if bottom is None:
+            continue
+        start = row + bottom + 1
+        r = start
+        while r < height and (r < 0 or not grid[r][col + j]):
+            r += 1
+        distance = min(distance, r - start)
+    return distance
+
+
+class GravityEngine:
+    def __init__(self, curve='classic', lock_delay=LOCK_DELAY_MS, max_resets=MAX_LOCK_RESETS):
+        self.curve = curve
+        self.lock_delay_ms = lock_delay
+        self.max_resets = max_resets
+        self.reset()
+
+    def reset(self):
+        """新方块生成时清空锁定状态"""
+        self.lock_start = None   # 着地时刻，None 表示没有着地
+        self.resets = 0
+        self.lowest_row = -1
+
+    def gravity(self, level):
+        """该等级下每帧下落的行数"""
+        if self.curve == 'classic':
+            g = FRAME_MS / self.ms_per_row(level)
+        elif self.curve == 'competitive':
+            level = max(1, min(level, COMPETITIVE_MAX_LEVEL))
+            seconds = (0.8 - (level - 1) * 0.007) ** (level - 1)
+            g = FRAME_MS / (seconds * 1000)
+        else:
+            g = float(self.curve)
+        return min(g, MAX_GRAVITY)
+
+    def ms_per_row(self, level):
+        if self.curve == 'classic':
+            return max(100, 1000 - (level - 1) * 100)  # 直接用整数毫秒，避免经过 G 换算的浮点误差
+        return FRAME_MS / self.gravity(level)
+
+    @property
+    def classic_lock(self):
+        """经典曲线：着地后在下一次下落时锁定，与原来的手感一致"""
+        return self.curve == 'classic'
+
+    def lock_delay(self, level):
+        """经典曲线下锁定延迟就是一行的下落时间"""
+        if self.classic_lock:
+            return self.ms_per_row(level)
+        return self.lock_delay_ms
+
+    def on_resume(self, game, paused_ms):
+        """暂停结束：下落和锁定计时整体推后暂停的时长，继续时不会一次补上整段暂停"""
+        game.fall_time += paused_ms
+        if self.lock_start is not None:
+            self.lock_start += paused_ms
+
+    def on_move(self, now):
+        """方块成功移动或旋转：着地状态下重置锁定计时（经典曲线不重置）"""
+        if self.classic_lock:
+            return
+        if self.lock_start is not None and self.resets < self.max_resets:
+            self.lock_start = now
+            self.resets += 1
+
+    def update(self, game, now):
+        """按经过的时间下落，着地超过锁定延迟后锁定"""
+        if game.current_piece is None:
+            return
+        distance = game.drop_distance()
+        g = self.gravity(game.level)
+
+        if distance > 0:
+            if self.lock_start is not None:
+                self.lock_start = None
+                if not self.classic_lock:
+                    # 移出了边缘，从现在开始重新下落（着地期间没有更新下落时间）
+                    game.fall_time = now
+            if g >= MAX_GRAVITY:
+                rows = distance
+            else:
+                # 加一个极小量，避免 ms_per_row 的浮点误差让刚好到时的一行推迟一帧
+                rows = int((now - game.fall_time) * g / FRAME_MS + 1e-9)
+            if rows:
+                rows = min(rows, distance)
+                game.apply_gravity(rows)
+                distance -= rows
+                # 只扣除实际下落所用的时间，余下的小数部分留给下一次
+                game.fall_time = now if distance == 0 else game.fall_time + rows * FRAME_MS / g
+            if game.piece_pos[0] > self.lowest_row:
+                self.lowest_row = game.piece_pos[0]
+                self.resets = 0
+
+        if distance == 0:
+            if self.classic_lock:
+                # 从上一次下落开始计时，到下一次下落时锁定
+                self.lock_start = game.fall_time
+            else:
+                game.fall_time = now  # 着地期间不累积下落时间
+                if self.lock_start is None:
+                    self.lock_start = now
+                    return
+            if now - self.lock_start >= self.lock_delay(game.level):
+                game.lock_piece()
+
+    def time_until_next(self, game, now):
+        """距离下一次下落或锁定的毫秒数，用于登记下一次更新"""
+        if self.lock_start is not None:
+            return self.lock_start + self.lock_delay(game.level) - now
+        if game.drop_distance() == 0:
+            return 0  # 已经着地，锁定计时还没开始
+        return game.fall_time + self.ms_per_row(game.level) - now
+
+
+def create_gravity():
+    """根据环境变量 TETRIS_GRAVITY（classic / competitive / 固定 G 值）创建重力引擎"""
+    curve = os.environ.get('TETRIS_GRAVITY', 'classic')
+    if curve not in GRAVITY_CURVES:
+        try:
+            if float(curve) <= 0:
+                raise ValueError(curve)
+        except ValueError:
+            print(f"Warning: Unknown gravity {curve!r}, using classic")
+            curve = 'classic'
+    return GravityEngine(curve)
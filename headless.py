@@ -0,0 +1,336 @@
+import random
+
+import kernels
+from gravity import drop_distance
+from zobrist import TranspositionTable, default_keys
+
+# 无界面的规则引擎：只有网格、方块序列、落点和计分，不依赖 pygame，
+# 用于批量生成训练数据等不需要画面和实时时钟的场合。
+# 规则与 main.Tetris 一致：方块序列由种子决定，旋转状态按方块保存并延续到下一次出现，
+# 方块从第 0 行居中生成，生成位置被占用时游戏结束。
+# 没有时钟，所以连击按“连续的落子都有消行”计算，而不是 COMBO_TIMEOUT 毫秒内。
+
+GRID_WIDTH = 10
+GRID_HEIGHT = 20
+COMBO_BONUS = 50
+
+# 与 main.SHAPES 的初始状态相同
+SHAPES = (
+    ((1, 1, 1, 1),),          # I
+    ((1, 0, 0), (1, 1, 1)),   # J
+    ((0, 0, 1), (1, 1, 1)),   # L
+    ((1, 1), (1, 1)),         # O
+    ((0, 1, 1), (1, 1, 0)),   # S
+    ((0, 1, 0), (1, 1, 1)),   # T
+    ((1, 1, 0), (0, 1, 1)),   # Z
+)
+
+
+def rotate(shape):
+    """顺时针旋转 90 度（与 main.Tetris.rotate_piece 相同）"""
+    return tuple(zip(*shape[::-1]))
+
+
+class HeadlessGame:
+    def __init__(self, seed=None, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.width = width
+        self.height = height
+        self.zobrist = default_keys(width, height, len(SHAPES))
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        self.seed = random.randrange(2 ** 31) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.grid = [(0,) * self.width] * self.height
+        self.board_hash = 0  # 网格的 Zobrist 哈希，随落子和消行增量更新
+        self.shapes = list(SHAPES)
+        self.orientations = [0] * len(SHAPES)  # 每种方块当前相对初始状态旋转了几次
+        self.score = 0
+        self.level = 1
+        self.lines_cleared = 0
+        self.combo_count = 0
+        self.pieces_placed = 0
+        self.game_over = False
+        self.last_row = None  # 上一次 place 的落地行（锁定后 piece_pos 已经是新方块的位置）
+        self.current_piece = None
+        self.next_piece = None
+        self.piece_pos = [0, 0]
+        self.new_piece()
+
+    def new_piece(self):
+        if self.next_piece is None:
+            self.next_piece = self.rng.randint(0, len(self.shapes) - 1)
+        self.current_piece = self.next_piece
+        self.next_piece = self.rng.randint(0, len(self.shapes) - 1)
+        self.piece_pos = [0, self.width // 2 - len(self.shapes[self.current_piece][0]) // 2]
+        if not self.fits(self.shapes[self.current_piece], *self.piece_pos):
+            self.game_over = True
+
+    def state_hash(self):
+        """局面（网格 + 当前方块 + 下一个方块）的 Zobrist 哈希"""
+        return self.zobrist.state(self.board_hash, self.current_piece, self.next_piece)
+
+    def fits(self, shape, row, col):
+        """方块放在 (row, col) 时是否在边界内且不与已有方块重叠"""
+        for i, cells in enumerate(shape):
+            for j, cell in enumerate(cells):
+                if cell:
+                    r, c = row + i, col + j
+                    if r >= self.height or c < 0 or c >= self.width or (r >= 0 and self.grid[r][c]):
+                        return False
+        return True
+
+    def placements(self):
+        """当前方块所有可以直接落下的位置：[(旋转次数, 列, 落地行)]，形状相同的旋转只保留一个"""
+        result = []
+        board = kernels.board_buffer(self.grid)
+        shape = self.shapes[self.current_piece]
+        seen = set()
+        for rotation in range(4):
+            if shape not in seen:
+                seen.add(shape)
+                cells, shape_width = kernels.shape_buffer(shape)
+                for col in range(self.width - shape_width + 1):
+                    if not kernels.collides(board, self.width, cells, shape_width, 0, col):
+                        row = kernels.drop_distance(board, self.width, cells, shape_width, 0, col)
+                        result.append((rotation, col, row))
+            shape = rotate(shape)
+        return result
+
+    def place(self, rotation, col):
+        """旋转 rotation 次后从 col 列落下并锁定，返回消除的行数"""
+        piece = self.current_piece
+        shape = self.shapes[piece]
+        for _ in range(rotation % 4):
+            shape = rotate(shape)
+        if not self.fits(shape, 0, col):
+            raise ValueError(f'Illegal placement: rotation {rotation}, column {col}')
+        self.shapes[piece] = shape
+        self.orientations[piece] = (self.orientations[piece] + rotation) % 4
+        row = drop_distance(self.grid, shape, 0, col)
+        self.piece_pos = [row, col]
+        self.last_row = row
+        return self.lock()
+
+    def lock(self):
+        """把当前方块合并到网格中，消行、计分并生成下一个方块"""
+        shape = self.shapes[self.current_piece]
+        row, col = self.piece_pos
+        color = self.current_piece + 1
+        affected = set()
+        for i, cells in enumerate(shape):
+            if row + i < 0:
+                continue
+            grid_row = list(self.grid[row + i])
+            for j, cell in enumerate(cells):
+                if cell:
+                    grid_row[col + j] = color
+                    self.board_hash ^= self.zobrist.cells[row + i][col + j]
+            self.grid[row + i] = tuple(grid_row)
+            affected.add(row + i)
+
+        lines = [r for r in sorted(affected) if all(self.grid[r])]
+        self.clear_lines(lines)
+        self.pieces_placed += 1
+        self.new_piece()
+        return len(lines)
+
+    def clear_lines(self, lines):
+        if not lines:
+            self.combo_count = 0
+            return
+        self.combo_count += 1
+        self.score += (len(lines) * 100 + self.combo_count * COMBO_BONUS) * self.level
+        self.lines_cleared += len(lines)
+        self.level = self.lines_cleared // 10 + 1
+        self.board_hash = self.zobrist.clear(self.board_hash, self.grid, lines)
+        cleared = set(lines)
+        self.grid = ([(0,) * self.width] * len(lines) +
+                     [row for r, row in enumerate(self.grid) if r not in cleared])
+
+
+# 落点策略：policy(game, rng) -> (旋转次数, 列)，没有合法落点时返回 None
+
+# 评估权重：总高度、消行数、空洞数、相邻列高度差（Dellacherie 风格的线性评估）
+HEURISTIC_WEIGHTS = (-0.51, 0.76, -0.36, -0.18)
+
+
+def grid_masks(grid):
+    """网格每一行的占用位掩码（第 c 列对应第 c 位）"""
+    return [sum(1 << c for c, cell in enumerate(row) if cell) for row in grid]
+
+
+def shape_masks(shape, col):
+    return [sum(1 << (col + j) for j, cell in enumerate(cells) if cell) for cells in shape]
+
+
+def evaluate_placement(grid, shape, row, col, weights=HEURISTIC_WEIGHTS):
+    """对落点打分：在占用位掩码上模拟锁定和消行后计算特征"""
+    width = len(grid[0])
+    full = (1 << width) - 1
+    masks = grid_masks(grid)
+    for i, bits in enumerate(shape_masks(shape, col)):
+        if row + i >= 0:
+            masks[row + i] |= bits
+    lines = sum(1 for m in masks if m == full)
+    masks = [m for m in masks if m != full]
+    return evaluate_board(masks, lines, width, weights)
+
+
+def evaluate_board(masks, lines, width, weights=HEURISTIC_WEIGHTS):
+    """消行后的网格（位掩码，不含被消除的行）加上本步消行数的评估值"""
+    heights = []
+    holes = 0
+    for c in range(width):
+        bit = 1 << c
+        top = None
+        for r, m in enumerate(masks):
+            if m & bit:
+                if top is None:
+                    top = r
+            elif top is not None:
+                holes += 1
+        heights.append(0 if top is None else len(masks) - top)
+    bumpiness = sum(abs(heights[c] - heights[c + 1]) for c in range(width - 1))
+    w_height, w_lines, w_holes, w_bumpiness = weights
+    return w_height * sum(heights) + w_lines * lines + w_holes * holes + w_bumpiness * bumpiness
+
+
+def evaluate_buffer(board, width, shape, shape_width, row, col, weights=HEURISTIC_WEIGHTS):
+    """与 evaluate_placement 相同，在 kernels 的棋盘缓冲区上计算（board 不会被修改）"""
+    trial = bytearray(board)
+    kernels.merge(trial, width, shape, shape_width, row, col, 1)
+    lines = kernels.clear_full_rows(trial, width)
+    total_height, holes, bumpiness, _ = kernels.board_features(trial, width)
+    w_height, w_lines, w_holes, w_bumpiness = weights
+    return w_height * total_height + w_lines * lines + w_holes * holes + w_bumpiness * bumpiness
+
+
+def heuristic_policy(game, rng):
+    """选择评估分最高的落点（分数相同时取第一个）"""
+    best = None
+    board = kernels.board_buffer(game.grid)
+    shape = game.shapes[game.current_piece]
+    rotated = [kernels.shape_buffer(shape)]
+    for _ in range(3):
+        shape = rotate(shape)
+        rotated.append(kernels.shape_buffer(shape))
+    for rotation, col, row in game.placements():
+        value = evaluate_buffer(board, game.width, *rotated[rotation], row, col)
+        if best is None or value > best[0]:
+            best = (value, rotation, col)
+    return None if best is None else best[1:]
+
+
+def random_policy(game, rng):
+    options = game.placements()
+    if not options:
+        return None
+    rotation, col, _ = rng.choice(options)
+    return rotation, col
+
+
+class LookaheadSearch:
+    """用已知的当前和下一个方块做多层搜索，局面的评估值和最佳着法缓存在置换表中。
+    着法记为 (绝对旋转状态, 列)，与搜索开始时方块的旋转状态无关，可以跨回合复用"""
+
+    def __init__(self, depth=2, table=None, weights=HEURISTIC_WEIGHTS):
+        self.depth = depth
+        self.table = table or TranspositionTable()
+        self.weights = weights
+        self._orientations = {}
+
+    def orientations(self, piece):
+        """方块的各个旋转状态 [(绝对旋转状态, 形状)]，相同形状只保留一个"""
+        result = self._orientations.get(piece)
+        if result is None:
+            result, seen, shape = [], set(), SHAPES[piece]
+            for k in range(4):
+                if shape not in seen:
+                    seen.add(shape)
+                    result.append((k, shape))
+                shape = rotate(shape)
+            self._orientations[piece] = result
+        return result
+
+    def best_move(self, game):
+        """返回 (旋转次数, 列)；没有合法落点时返回 None"""
+        self.table.new_search()
+        masks = grid_masks(game.grid)
+        pieces = (game.current_piece, game.next_piece)
+        _, move = self._search(masks, game.board_hash, pieces, self.depth, game.zobrist, game.width)
+        if move is None:
+            return None
+        orientation, col = move
+        return (orientation - game.orientations[game.current_piece]) % 4, col
+
+    def _search(self, masks, board_hash, pieces, depth, keys, width):
+        """返回 (评估值, 着法)。depth 为 0 或没有已知方块时对网格做静态评估，
+        以网格哈希为键缓存，不同着法顺序得到的相同网格只评估一次"""
+        if depth == 0 or not pieces:
+            key = keys.state(board_hash, None, None)
+            cached = self.table.lookup(key, 0)
+            if cached is None:
+                cached = (evaluate_board(masks, 0, width, self.weights), None)
+                self.table.store(key, 0, *cached)
+            return cached
+
+        key = keys.state(board_hash, pieces[0], pieces[1] if len(pieces) > 1 else None)
+        cached = self.table.lookup(key, depth)
+        if cached is not None:
+            return cached
+
+        full = (1 << width) - 1
+        height = len(masks)
+        w_lines = self.weights[1]
+        best = (None, None)
+        for orientation, shape in self.orientations(pieces[0]):
+            for col in range(width - len(shape[0]) + 1):
+                bits = shape_masks(shape, col)
+                if any(masks[i] & b for i, b in enumerate(bits)):
+                    continue  # 生成位置就被挡住
+                row = 0
+                while row + len(bits) < height and not any(masks[row + 1 + i] & b for i, b in enumerate(bits)):
+                    row += 1
+
+                placed = list(masks)
+                h = board_hash
+                for i, b in enumerate(bits):
+                    placed[row + i] |= b
+                    h ^= keys.rows[row + i][b]
+                lines = [r for r in range(row, row + len(bits)) if placed[r] == full]
+                if lines:
+                    h = keys.clear_masks(h, placed, lines)
+                    placed = [0] * len(lines) + [m for m in placed if m != full]
+
+                value = w_lines * len(lines) + self._search(placed, h, pieces[1:], depth - 1, keys, width)[0]
+                if best[0] is None or value > best[0]:
+                    best = (value, (orientation, col))
+
+        if best[0] is None:
+            best = (float('-inf'), None)
+        self.table.store(key, depth, *best)
+        return best
+
+
+_lookahead = None
+
+
+def lookahead_policy(game, rng):
+    """两层搜索（当前和下一个方块），进程内共享一个置换表"""
+    global _lookahead
+    if _lookahead is None:
+        _lookahead = LookaheadSearch()
+    return _lookahead.best_move(game)
+
+
+def policy_cache_stats():
+    """前瞻策略置换表的统计（命中率等）；本进程没有用过前瞻策略时返回 None"""
+    return None if _lookahead is None else _lookahead.table.stats()
+
+
+POLICIES = {
+    'heuristic': heuristic_policy,
+    'lookahead': lookahead_policy,
+    'random': random_policy,
+}
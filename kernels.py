@@ -0,0 +1,269 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+# 棋盘内层循环：碰撞检测、合并方块、满行检测与压缩、下落距离和评估用的棋盘特征。
+# 棋盘是按行优先存放的连续字节缓冲区（bytearray，0 表示空格），方块形状是按行优先的字节串加宽度，
+# 见 board_buffer / shape_buffer。
+# 导入时优先使用 Cython 编译的 _kernels 扩展（python build_kernels.py 构建），
+# 没有构建或 TETRIS_KERNELS=python 时使用这里的纯 Python 实现，两者结果完全相同：
+#   python kernels.py              # 随机局面上逐一比较两种实现，并报告加速比
+#   python kernels.py --cases 20000 --seed 1
+
+PARITY_CASES = 5000
+BENCH_SECONDS = 0.5   # 每个函数每种实现的计时时长
+
+
+def board_buffer(grid):
+    """把网格（行的序列）转换为按行优先的 bytearray，非 0 的格子记为方块颜色"""
+    return bytearray(cell for row in grid for cell in row)
+
+
+def shape_buffer(shape):
+    """把方块形状转换为 (字节串, 宽度)"""
+    return bytes(1 if cell else 0 for row in shape for cell in row), len(shape[0])
+
+
+# 纯 Python 实现（也是编译版本的参照）
+
+def collides(board, width, shape, shape_width, row, col):
+    """形状放在 (row, col) 时是否越界或与已有方块重叠（row 为负时只检查左右边界）"""
+    height = len(board) // width
+    for i in range(len(shape) // shape_width):
+        for j in range(shape_width):
+            if shape[i * shape_width + j]:
+                r, c = row + i, col + j
+                if r >= height or c < 0 or c >= width:
+                    return True
+                if r >= 0 and board[r * width + c]:
+                    return True
+    return False
+
+
+def merge(board, width, shape, shape_width, row, col, color):
+    """把形状写入棋盘（跳过棋盘上方的部分），返回写入的格子数；超出左右或下边界时抛出 ValueError"""
+    shape_height = len(shape) // shape_width
+    if col < 0 or col + shape_width > width or row + shape_height > len(board) // width:
+        raise ValueError(f'shape at ({row}, {col}) is outside the board')
+    written = 0
+    for i in range(shape_height):
+        r = row + i
+        if r < 0:
+            continue
+        for j in range(shape_width):
+            if shape[i * shape_width + j]:
+                board[r * width + col + j] = color
+                written += 1
+    return written
+
+
+def full_rows(board, width):
+    """所有满行的行号，从上到下"""
+    return [r for r in range(len(board) // width) if all(board[r * width:(r + 1) * width])]
+
+
+def clear_full_rows(board, width):
+    """原地删除满行，上方的行下移、顶部补空行，返回删除的行数"""
+    height = len(board) // width
+    rows = [board[r * width:(r + 1) * width] for r in range(height)]
+    remaining = [row for row in rows if not all(row)]
+    cleared = height - len(remaining)
+    if cleared:
+        board[:] = bytes(cleared * width) + b''.join(remaining)
+    return cleared
+
+
+def drop_distance(board, width, shape, shape_width, row, col):
+    """形状从 (row, col) 最多还能下落几行（与 gravity.drop_distance 相同）"""
+    height = len(board) // width
+    shape_height = len(shape) // shape_width
+    distance = height
+    for j in range(shape_width):
+        bottom = -1
+        for i in range(shape_height - 1, -1, -1):
+            if shape[i * shape_width + j]:
+                bottom = i
+                break
+        if bottom < 0:
+            continue
+        start = row + bottom + 1
+        r = start
+        while r < height and (r < 0 or not board[r * width + col + j]):
+            r += 1
+        distance = min(distance, r - start)
+    return distance
+
+
+def board_features(board, width):
+    """评估用的特征：(各列高度之和, 空洞数, 相邻列高度差之和, 最大高度)"""
+    height = len(board) // width
+    heights = []
+    holes = 0
+    for c in range(width):
+        top = -1
+        for r in range(height):
+            if board[r * width + c]:
+                if top < 0:
+                    top = r
+            elif top >= 0:
+                holes += 1
+        heights.append(0 if top < 0 else height - top)
+    bumpiness = sum(abs(heights[c] - heights[c + 1]) for c in range(width - 1))
+    return sum(heights), holes, bumpiness, max(heights)
+
+
+KERNELS = ('collides', 'merge', 'full_rows', 'clear_full_rows', 'drop_distance', 'board_features')
+PYTHON_KERNELS = {name: globals()[name] for name in KERNELS}
+
+COMPILED = False
+if os.environ.get('TETRIS_KERNELS', 'auto') != 'python':
+    try:
+        from _kernels import board_features, clear_full_rows, collides, drop_distance, full_rows, merge
+        COMPILED = True
+    except ImportError:
+        pass
+
+
+def _random_case(rng, width=10, height=20):
+    """随机局面：下半部分随机填充（含满行和空洞）、随机形状和位置"""
+    board = bytearray(width * height)
+    fill = rng.random()
+    for r in range(rng.randrange(height + 1), height):
+        if rng.random() < 0.2:
+            board[r * width:(r + 1) * width] = bytes([rng.randrange(1, 8)]) * width
+        else:
+            for c in range(width):
+                if rng.random() < fill:
+                    board[r * width + c] = rng.randrange(1, 8)
+    shape_width = rng.randrange(1, 5)
+    shape_height = rng.randrange(1, 5)
+    shape = bytes(rng.random() < 0.6 for _ in range(shape_width * shape_height))
+    if not any(shape):
+        shape = b'\x01' + shape[1:]
+    row = rng.randrange(-shape_height, height)
+    col = rng.randrange(-1, width - shape_width + 2)
+    return board, width, shape, shape_width, row, col
+
+
+def _call(name, impl, case):
+    board, width, shape, shape_width, row, col = case
+    if name == 'collides':
+        return impl(bytes(board), width, shape, shape_width, row, col)
+    if name == 'drop_distance':
+        if collides(bytes(board), width, shape, shape_width, row, col):
+            return None
+        return impl(bytes(board), width, shape, shape_width, row, col)
+    if name == 'merge':
+        board = bytearray(board)
+        try:
+            return impl(board, width, shape, shape_width, row, col, 3), bytes(board)
+        except ValueError as e:
+            return str(e), bytes(board)
+    if name == 'clear_full_rows':
+        board = bytearray(board)
+        return impl(board, width), bytes(board)
+    return impl(bytes(board), width)
+
+
+def check_parity(compiled, cases=PARITY_CASES, seed=0):
+    """在随机局面上比较编译版本与纯 Python 实现，返回不一致的项目"""
+    rng = random.Random(seed)
+    failures = []
+    for k in range(cases):
+        case = _random_case(rng)
+        for name in KERNELS:
+            expected = _call(name, PYTHON_KERNELS[name], case)
+            actual = _call(name, getattr(compiled, name), case)
+            if expected != actual:
+                failures.append(f'{name} case {k}: {actual!r} != {expected!r}')
+    return failures
+
+
+def _time_per_call(fn, seconds=BENCH_SECONDS):
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(100):
+            fn()
+        calls += 100
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return elapsed / calls
+
+
+def benchmark(compiled, seed=0, seconds=BENCH_SECONDS):
+    """每个函数在典型局面上的单次耗时（微秒）和加速比"""
+    rng = random.Random(seed)
+    board = bytearray(200)
+    for r in range(12, 20):
+        for c in range(10):
+            board[r * 10 + c] = 0 if rng.random() < 0.25 else 1
+    board[190:200] = b'\x01' * 10
+    frozen = bytes(board)
+    shape, shape_width = shape_buffer(((0, 1, 0), (1, 1, 1)))
+    calls = {
+        'collides': lambda k: k.collides(frozen, 10, shape, shape_width, 8, 4),
+        'merge': lambda k: k.merge(bytearray(frozen), 10, shape, shape_width, 8, 4, 6),
+        'full_rows': lambda k: k.full_rows(frozen, 10),
+        'clear_full_rows': lambda k: k.clear_full_rows(bytearray(frozen), 10),
+        'drop_distance': lambda k: k.drop_distance(frozen, 10, shape, shape_width, 0, 4),
+        'board_features': lambda k: k.board_features(frozen, 10),
+    }
+    python = argparse.Namespace(**PYTHON_KERNELS)
+    results = {}
+    for name in KERNELS:
+        py = _time_per_call(lambda: calls[name](python), seconds)
+        native = _time_per_call(lambda: calls[name](compiled), seconds)
+        results[name] = (py * 1e6, native * 1e6, py / native)
+    return results
+
+
+def benchmark_policy(compiled, seed=0, pieces=200):
+    """端到端：headless.heuristic_policy 每次决策的耗时（毫秒），返回 (纯 Python, 编译版本, 加速比)"""
+    import headless
+    import kernels as module  # 作为脚本运行时本文件是 __main__，headless 使用的是导入的 kernels
+    saved = {name: getattr(module, name) for name in KERNELS}
+    timings = []
+    for impl in (PYTHON_KERNELS, {name: getattr(compiled, name) for name in KERNELS}):
+        vars(module).update(impl)
+        try:
+            game = headless.HeadlessGame(seed=seed)
+            start = time.perf_counter()
+            while not game.game_over and game.pieces_placed < pieces:
+                game.place(*headless.heuristic_policy(game, None))
+            timings.append((time.perf_counter() - start) * 1000 / max(1, game.pieces_placed))
+        finally:
+            vars(module).update(saved)
+    return timings[0], timings[1], timings[0] / timings[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check compiled board kernels against the Python versions')
+    parser.add_argument('--cases', type=int, default=PARITY_CASES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--seconds', type=float, default=BENCH_SECONDS, help='timing per kernel and implementation')
+    args = parser.parse_args()
+
+    try:
+        import _kernels
+    except ImportError:
+        print("Compiled kernels are not built; run: python build_kernels.py")
+        sys.exit(1)
+
+    failures = check_parity(_kernels, args.cases, args.seed)
+    for failure in failures[:20]:
+        print(f"Mismatch: {failure}")
+    print(f"Parity: {args.cases} random boards x {len(KERNELS)} kernels, {len(failures)} mismatches")
+
+    print(f"{'kernel':<16}{'python us':>12}{'compiled us':>14}{'speedup':>10}")
+    for name, (py, native, speedup) in benchmark(_kernels, args.seed, args.seconds).items():
+        print(f"{name:<16}{py:>12.2f}{native:>14.3f}{speedup:>9.1f}x")
+    py, native, speedup = benchmark_policy(_kernels, args.seed)
+    print(f"heuristic_policy: {py:.2f} ms -> {native:.2f} ms per decision ({speedup:.1f}x)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+# 输入到画面的延迟：每个键盘 / 触摸输入从事件产生开始计时，跟踪到它引起的状态变化
+# （move_piece / rotate_piece / 锁定 / 暂停等），在第一次把这个变化显示出来的
+# display.flip 之后结束计时；没有引起任何变化的输入（如撞墙的移动）只计数。
+# 事件时间优先用 SDL 的时间戳（event.timestamp），没有时用取出事件的时间，
+# 这时无法计入事件在队列中等待的时间。结果按输入类型和动作分别统计百分位数，并记录平台。
+# 开启方式：TETRIS_LATENCY=1（或输出文件路径），退出时写出 JSON 报告。
+#
+# 也可以作为回归基准单独运行：无窗口地运行真实的游戏循环，由另一个线程按随机间隔
+# 注入带有精确时间的合成按键和轻点事件，p99 超过预算时以非零状态退出：
+#   python latency.py --events 300 --budget-p99 50 -o latency.json
+
+MAX_SAMPLES = 100000       # 保存的延迟样本上限，超过后不再记录
+SYNTHETIC_EVENTS = 300
+SYNTHETIC_RATE = 4.0       # 合成输入每秒次数
+TOUCH_SHARE = 0.2          # 合成输入中轻点的比例
+BUDGET_P99_MS = 50.0
+PERCENTILES = (50, 90, 99)
+
+
+def now_ms():
+    return time.perf_counter() * 1000
+
+
+def platform_name():
+    """当前运行的平台：android / emscripten（网页版）/ win32 / linux / darwin ..."""
+    if 'ANDROID_ARGUMENT' in os.environ or hasattr(sys, 'getandroidapilevel'):
+        return 'android'
+    return sys.platform
+
+
+def _summary(values):
+    values = sorted(values)
+    result = {'count': len(values)}
+    for p in PERCENTILES:
+        result[f'p{p}'] = round(values[min(len(values) - 1, len(values) * p // 100)], 2)
+    result['max'] = round(values[-1], 2)
+    return result
+
+
+class NullLatencyTracker:
+    """未开启延迟统计时使用的空实现"""
+    enabled = False
+
+    def event_time(self, event):
+        return 0
+
+    def begin(self, kind, action, timestamp):
+        pass
+
+    def end(self):
+        pass
+
+    def on_change(self):
+        pass
+
+    def on_present(self):
+        pass
+
+    def write(self, path=None):
+        return None
+
+
+class LatencyTracker:
+    enabled = True
+
+    def __init__(self, path=None, write_on_exit=True):
+        self.path = path
+        self.write_on_exit = write_on_exit  # 游戏退出时是否写出报告
+        self.samples = {}        # (输入类型, 动作) -> [毫秒]
+        self.no_effect = {}      # (输入类型, 动作) -> 次数
+        self.sample_count = 0
+        self.timestamp_source = 'dequeue'
+        self._current = None     # 正在处理的输入 [类型, 动作, 时间, 是否引起变化]
+        self._pending = []       # 已引起变化、等待显示的输入
+
+    def event_time(self, event):
+        """输入事件发生的时间（perf_counter 毫秒）"""
+        synthetic = getattr(event, 'latency_time', None)
+        if synthetic is not None:
+            self.timestamp_source = 'synthetic'
+            return synthetic
+        sdl_time = getattr(event, 'timestamp', None)
+        if sdl_time is not None:
+            import pygame
+            self.timestamp_source = 'sdl'
+            return now_ms() - max(0, pygame.time.get_ticks() - sdl_time)
+        return now_ms()
+
+    def begin(self, kind, action, timestamp):
+        """开始处理一个输入（kind 为 key / touch）"""
+        self._current = [kind, action, timestamp, False]
+
+    def on_change(self):
+        """游戏状态发生了可见的变化；不在处理输入时（如自动下落）忽略"""
+        if self._current is not None:
+            self._current[3] = True
+
+    def end(self):
+        """输入处理完毕：引起变化的等待下一次显示，否则记为无效输入"""
+        current, self._current = self._current, None
+        if current is None:
+            return
+        if current[3]:
+            self._pending.append(current)
+        else:
+            key = (current[0], current[1])
+            self.no_effect[key] = self.no_effect.get(key, 0) + 1
+
+    def on_present(self):
+        """一帧已经显示（display.flip 返回），结束所有等待中的输入"""
+        if not self._pending:
+            return
+        presented = now_ms()
+        for kind, action, timestamp, _ in self._pending:
+            if self.sample_count < MAX_SAMPLES:
+                self.samples.setdefault((kind, action), []).append(presented - timestamp)
+                self.sample_count += 1
+        self._pending = []
+
+    def report(self):
+        import pygame
+        by_kind = {}
+        for (kind, _), values in self.samples.items():
+            by_kind.setdefault(kind, []).extend(values)
+        return {
+            'platform': platform_name(),
+            'pygame': pygame.version.ver,
+            'sdl': '.'.join(map(str, pygame.get_sdl_version())),
+            'renderer': os.environ.get('TETRIS_RENDERER', 'surface'),
+            'timestamp_source': self.timestamp_source,
+            'latency_ms': {kind: _summary(values) for kind, values in sorted(by_kind.items())},
+            'by_action': {f'{kind}:{action}': _summary(values)
+                          for (kind, action), values in sorted(self.samples.items())},
+            'no_effect': {f'{kind}:{action}': count for (kind, action), count in sorted(self.no_effect.items())},
+        }
+
+    def write(self, path=None):
+        """写出 JSON 报告，返回文件路径"""
+        path = path or self.path or time.strftime('latency-%Y%m%d-%H%M%S.json')
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Latency report written to {path}")
+        return path
+
+
+def create_tracker():
+    """根据环境变量 TETRIS_LATENCY 创建延迟统计（值为输出文件路径或 1）"""
+    setting = os.environ.get('TETRIS_LATENCY')
+    if not setting:
+        return NullLatencyTracker()
+    return LatencyTracker(path=None if setting == '1' else setting)
+
+
+def _inject_events(pygame, events, rate, seed, game, done):
+    """输入线程：按指数分布的间隔投递合成事件，事件带有投递时的精确时间"""
+    rng = random.Random(seed)
+    keys = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE)
+    weights = (3, 3, 3, 2, 1)
+    for _ in range(events):
+        time.sleep(rng.expovariate(rate))
+        if game.state.name == 'GAME_OVER':
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE, latency_time=now_ms()))
+        elif rng.random() < TOUCH_SHARE:
+            # 轻点：按下后很快抬起，识别为旋转
+            x, y = rng.uniform(0.1, 0.5), rng.uniform(0.2, 0.8)
+            touch = dict(touch_id=0, finger_id=1, x=x, y=y, dx=0.0, dy=0.0, pressure=1.0)
+            pygame.event.post(pygame.event.Event(pygame.FINGERDOWN, latency_time=now_ms(), **touch))
+            time.sleep(0.05)
+            pygame.event.post(pygame.event.Event(pygame.FINGERUP, latency_time=now_ms(), **touch))
+        else:
+            key = rng.choices(keys, weights)[0]
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, latency_time=now_ms()))
+    time.sleep(0.5)
+    done.set()
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+
+def run_synthetic(events=SYNTHETIC_EVENTS, rate=SYNTHETIC_RATE, seed=0):
+    """无窗口地运行游戏循环并注入合成输入，返回 LatencyTracker"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    import main
+
+    game = main.Tetris()
+    game.save_high_score = lambda: None
+    game.reset_game(seed=seed)
+    tracker = game.latency = LatencyTracker(write_on_exit=False)
+    done = threading.Event()
+    thread = threading.Thread(target=_inject_events, args=(pygame, events, rate, seed, game, done), daemon=True)
+    thread.start()
+    asyncio.run(game.run())
+    thread.join()
+    return tracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure input-to-present latency with synthetic input')
+    parser.add_argument('-o', '--output', help='write the JSON report to this file')
+    parser.add_argument('--events', type=int, default=SYNTHETIC_EVENTS)
+    parser.add_argument('--rate', type=float, default=SYNTHETIC_RATE, help='inputs per second')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget-p99', type=float, default=BUDGET_P99_MS,
+                        help='maximum p99 latency in milliseconds for any input type')
+    args = parser.parse_args()
+
+    tracker = run_synthetic(args.events, args.rate, args.seed)
+    report = tracker.report()
+    if args.output:
+        tracker.write(args.output)
+
+    print(f"Platform {report['platform']}, renderer {report['renderer']}, "
+          f"timestamps {report['timestamp_source']}")
+    failures = []
+    for kind, summary in report['latency_ms'].items():
+        print(f"{kind:<6} n={summary['count']:<5} p50={summary['p50']:.1f} ms  p90={summary['p90']:.1f} ms  "
+              f"p99={summary['p99']:.1f} ms  max={summary['max']:.1f} ms")
+        if summary['p99'] > args.budget_p99:
+            failures.append(f"{kind} p99 {summary['p99']} ms > {args.budget_p99} ms")
+    for failure in failures:
+        print(f"Budget exceeded: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
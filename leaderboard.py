@@ -0,0 +1,190 @@
+import bisect
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+
+# 本地排行榜：每局结束的成绩存入 SQLite（WAL 模式），按总榜、每日、玩家建立索引。
+# 写入在后台线程中批量提交；名次通过内存中有序的分数数组二分查找，
+# 即使存了几十万局也能在一毫秒内给出。
+
+LEADERBOARD_FILE = 'leaderboard.db'
+LEGACY_HIGH_SCORE_FILE = 'high_score.json'
+WRITE_BATCH_SIZE = 64  # 后台线程每次最多提交的记录数
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    day TEXT NOT NULL,
+    profile TEXT NOT NULL DEFAULT '',
+    score INTEGER NOT NULL,
+    lines INTEGER NOT NULL DEFAULT 0,
+    level INTEGER NOT NULL DEFAULT 1,
+    duration_ms INTEGER NOT NULL DEFAULT 0,
+    pieces INTEGER NOT NULL DEFAULT 0,
+    seed INTEGER,
+    replay TEXT
+);
+CREATE INDEX IF NOT EXISTS games_by_score ON games (score DESC);
+CREATE INDEX IF NOT EXISTS games_by_day ON games (day, score DESC);
+CREATE INDEX IF NOT EXISTS games_by_profile ON games (profile, score DESC);
+"""
+
+_COLUMNS = ('played_at', 'day', 'profile', 'score', 'lines', 'level',
+            'duration_ms', 'pieces', 'seed', 'replay')
+_INSERT = f"INSERT INTO games ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+
+def _connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+class Leaderboard:
+    def __init__(self, path=LEADERBOARD_FILE, legacy_file=LEGACY_HIGH_SCORE_FILE, background=None):
+        self.path = path
+        self._conn = _connect(path)
+        self._conn.executescript(_SCHEMA)
+        self._import_legacy(legacy_file)
+
+        # 所有分数的升序数组，用于 O(log n) 名次查询
+        self._scores = array('q', (row[0] for row in
+                                   self._conn.execute('SELECT score FROM games ORDER BY score')))
+
+        # 后台批量写入；不支持线程的平台（pygbag）每局结束时同步写入，
+        # 网页随时可能被关闭，不能等到 close
+        if background is None:
+            background = sys.platform != 'emscripten'
+        self._queue = queue.Queue()
+        self._pending = []
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._writer, name='leaderboard-writer', daemon=True)
+            self._thread.start()
+
+    def _import_legacy(self, legacy_file):
+        """首次使用时导入旧版 high_score.json 中的最高分"""
+        if not legacy_file or self._conn.execute('SELECT 1 FROM games LIMIT 1').fetchone():
+            return
+        try:
+            with open(legacy_file, 'r') as f:
+                high_score = int(json.load(f)['high_score'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        if high_score > 0:
+            with self._conn:
+                self._conn.execute(_INSERT, self._row({'score': high_score}))
+
+    @staticmethod
+    def _row(record):
+        played_at = record.get('played_at', time.time())
+        return (played_at,
+                time.strftime('%Y-%m-%d', time.localtime(played_at)),
+                record.get('profile', ''),
+                record['score'],
+                record.get('lines', 0),
+                record.get('level', 1),
+                record.get('duration_ms', 0),
+                record.get('pieces', 0),
+                record.get('seed'),
+                record.get('replay'))
+
+    def _writer(self):
+        conn = _connect(self.path)
+        while True:
+            rows = [self._queue.get()]
+            # 把队列中已经积压的记录一起提交
+            while len(rows) < WRITE_BATCH_SIZE:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in rows
+            rows = [row for row in rows if row is not None]
+            if rows:
+                with conn:
+                    conn.executemany(_INSERT, rows)
+            for _ in range(len(rows) + stop):
+                self._queue.task_done()
+            if stop:
+                conn.close()
+                return
+
+    def record(self, record):
+        """记录一局成绩（dict，至少包含 score），返回该局的名次"""
+        score = record['score']
+        rank = self.rank(score)
+        bisect.insort(self._scores, score)
+        row = self._row(record)
+        if self._thread:
+            self._queue.put(row)
+        else:
+            self._pending.append(row)
+            self.flush()
+        return rank
+
+    def rank(self, score):
+        """该分数在所有已记录成绩中的名次（1 表示第一）"""
+        return len(self._scores) - bisect.bisect_right(self._scores, score) + 1
+
+    def count(self):
+        return len(self._scores)
+
+    def high_score(self):
+        return self._scores[-1] if self._scores else 0
+
+    def flush(self):
+        """等待所有记录写入数据库"""
+        if self._thread:
+            self._queue.join()
+        elif self._pending:
+            with self._conn:
+                self._conn.executemany(_INSERT, self._pending)
+            self._pending = []
+
+    def top(self, limit=10, day=None, profile=None):
+        """查询前 N 名，可按日期（YYYY-MM-DD）或玩家筛选"""
+        self.flush()
+        conditions, params = [], []
+        if day is not None:
+            conditions.append('day = ?')
+            params.append(day)
+        if profile is not None:
+            conditions.append('profile = ?')
+            params.append(profile)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        cursor = self._conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM games {where} ORDER BY score DESC LIMIT ?",
+            (*params, limit))
+        return [dict(zip(_COLUMNS, row)) for row in cursor]
+
+    def close(self):
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self._conn.close()
+
+
+def open_leaderboard(path=LEADERBOARD_FILE):
+    """打开排行榜，SQLite 不可用时返回 None（回退到 high_score.json）"""
+    try:
+        return Leaderboard(path)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Warning: Could not open leaderboard: {e}")
+        return None
+
+
+if __name__ == '__main__':
+    board = Leaderboard(sys.argv[1] if len(sys.argv) > 1 else LEADERBOARD_FILE)
+    for i, entry in enumerate(board.top(10), 1):
+        print(f"{i:>3}. {entry['score']:>8}  level {entry['level']:<3} lines {entry['lines']:<4} {entry['day']}")
+    board.close()
@@ -0,0 +1,303 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+# 必须在导入 pygame 之前设置：无窗口、无声卡，也不打印欢迎信息
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+os.environ['TETRIS_RENDERER'] = 'surface'
+os.environ.pop('TETRIS_TRACE', None)
+
+import pygame
+
+# 并发对局压测：在同一个进程、同一个 asyncio 事件循环里运行大量 Tetris 对局，
+# 每个对局按固定种子以接近真人的频率随机按键，逐步增加对局数，
+# 统计每帧处理的延迟分布和每个对局占用的内存，找出 p99 延迟超过帧预算时的对局数。
+# 结果写成 JSON 报告，便于不同版本之间比较。
+#
+# 延迟 = 这一帧本应开始的时刻到本帧处理完成的时间，包括在事件循环里排队等待其他对局的时间；
+# 工作耗时只统计本对局自己的处理时间。
+#
+# SHAPES 是 main 模块的全局状态（旋转结果保存在里面），多个对局不能直接共享，
+# 所以每个对局保存自己的一份，处理本对局之前换入，处理完再换出。
+#
+#   python loadtest.py -o report.json
+#   python loadtest.py --steps 1,10,100 --seconds 3 --render
+
+FRAME_RATE = 60
+BUDGET_MS = 16.0            # p99 延迟超过它就认为达到容量上限
+KEY_RATE = 3.0              # 每个对局每秒按键次数（约 180 APM）
+STEP_SECONDS = 5.0          # 每一档对局数的测量时长
+DEFAULT_STEPS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+PERCENTILES = (50, 90, 99)
+REPORT_VERSION = 1
+
+# 随机按键的相对频率：左右移动最多，其次旋转，软降和硬降较少
+KEY_WEIGHTS = {
+    pygame.K_LEFT: 3,
+    pygame.K_RIGHT: 3,
+    pygame.K_UP: 2,
+    pygame.K_DOWN: 1,
+    pygame.K_SPACE: 1,
+}
+
+_main = None
+
+
+def _load_game_module():
+    global _main
+    if _main is None:
+        import main
+        _main = main
+    return _main
+
+
+def read_rss():
+    """当前进程的常驻内存（字节）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource  # 没有 /proc 时退回峰值内存
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def percentiles(values):
+    """最近秩百分位数，单位毫秒"""
+    if not values:
+        return None
+    values = sorted(values)
+    result = {f'p{q}': round(values[min(len(values) - 1, len(values) * q // 100)], 3)
+              for q in PERCENTILES}
+    result['max'] = round(values[-1], 3)
+    result['mean'] = round(sum(values) / len(values), 3)
+    return result
+
+
+class Session:
+    """一个脚本驱动的对局"""
+
+    def __init__(self, seed, shapes, render=False):
+        main = _load_game_module()
+        self.rng = random.Random(seed)
+        self.render = render
+        self.shapes = [list(shape) for shape in shapes]
+        self.game = main.Tetris()
+        self.game.save_high_score = lambda: None  # 压测不改动本地最高分
+        self._swap_in()
+        self.game.reset_game(seed=self.rng.randrange(2 ** 31))
+        self._swap_out()
+        self._keys = list(KEY_WEIGHTS)
+        self._weights = list(KEY_WEIGHTS.values())
+        self.next_key = pygame.time.get_ticks() + self._key_interval()
+        self.keys_pressed = 0
+        self.games_played = 1
+
+    def _swap_in(self):
+        _main.SHAPES[:] = self.shapes
+
+    def _swap_out(self):
+        self.shapes[:] = _main.SHAPES
+
+    def _key_interval(self):
+        return self.rng.expovariate(KEY_RATE) * 1000
+
+    def step(self):
+        """处理一帧：到期的脚本按键作为按键事件交给游戏的 step_frame（与 Tetris.run 的每帧处理相同，
+        包括输入延迟统计、定时器、画质调整），只是不做空闲等待和帧率限制，这由 run 负责"""
+        game = self.game
+        self._swap_in()
+        now = pygame.time.get_ticks()
+        events = []
+        while now >= self.next_key:
+            key = self.rng.choices(self._keys, self._weights)[0]
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=key))
+            self.keys_pressed += 1
+            self.next_key += self._key_interval()
+        game.step_frame(events, render=self.render)
+        if game.state == _main.GameState.GAME_OVER:
+            game.reset_game(seed=self.rng.randrange(2 ** 31))
+            self.games_played += 1
+        self._swap_out()
+
+    async def run(self, until, latencies, work):
+        """以 FRAME_RATE 运行到 until（perf_counter 秒），记录每帧的延迟和工作耗时"""
+        interval = 1 / FRAME_RATE
+        # 错开各对局的相位，避免所有对局挤在同一时刻
+        scheduled = time.perf_counter() + self.rng.random() * interval
+        while scheduled < until:
+            delay = scheduled - time.perf_counter()
+            await asyncio.sleep(delay if delay > 0 else 0)
+            start = time.perf_counter()
+            self.step()
+            end = time.perf_counter()
+            latencies.append((end - scheduled) * 1000)
+            work.append((end - start) * 1000)
+            # 跟不上时不补帧，下一帧从现在开始排队
+            scheduled = max(scheduled + interval, end)
+
+
+def _cost_of(value):
+    """返回 (类别, 字节数)；不是 pygame 资源时返回 None"""
+    if isinstance(value, pygame.Surface):
+        return 'surfaces', value.get_pitch() * value.get_height()
+    if isinstance(value, pygame.mixer.Sound):
+        frequency, size, channels = pygame.mixer.get_init() or (0, 0, 0)
+        return 'sounds', int(value.get_length() * frequency * channels * abs(size) // 8)
+    if isinstance(value, pygame.font.Font):
+        return 'fonts', 0
+    return None
+
+
+def _resources(obj, depth=3, seen=None):
+    """遍历对象的属性和容器，收集其中的 Surface / Sound / Font"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen or depth < 0:
+        return {}
+    seen.add(id(obj))
+    cost = _cost_of(obj)
+    if cost:
+        return {id(obj): (cost[0], cost[1])}
+    if isinstance(obj, dict):
+        children = obj.values()
+    elif isinstance(obj, (list, tuple, set)):
+        children = obj
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        children = vars(obj).values()
+    else:
+        return {}
+    found = {}
+    for child in children:
+        found.update(_resources(child, depth - 1, seen))
+    return found
+
+
+def instance_costs(first, second):
+    """统计对局持有的资源，区分每个对局独有的和与其他对局共享的"""
+    a = _resources(first.game)
+    b = _resources(second.game)
+    costs = {}
+    for key, (kind, size) in a.items():
+        entry = costs.setdefault(kind, {'count': 0, 'bytes': 0, 'shared_count': 0, 'shared_bytes': 0})
+        prefix = 'shared_' if key in b else ''
+        entry[prefix + 'count'] += 1
+        entry[prefix + 'bytes'] += size
+    return costs
+
+
+async def _measure(sessions, seconds):
+    latencies, work = [], []
+    until = time.perf_counter() + seconds
+    await asyncio.gather(*(session.run(until, latencies, work) for session in sessions))
+    return latencies, work
+
+
+def run_load_test(steps=DEFAULT_STEPS, seconds=STEP_SECONDS, render=False, seed=0,
+                  budget_ms=BUDGET_MS, max_rss=None, log=print):
+    """按 steps 逐档增加对局数，返回报告字典"""
+    main = _load_game_module()
+    shapes = [list(shape) for shape in main.SHAPES]
+    seeds = random.Random(seed)
+    sessions = []
+    results = []
+    exceeded_at = None
+    within_budget = 0
+    costs = None
+
+    base_rss = read_rss()
+    for count in steps:
+        rss_before = read_rss()
+        start = time.perf_counter()
+        added = count - len(sessions)
+        while len(sessions) < count:
+            sessions.append(Session(seeds.randrange(2 ** 31), shapes, render))
+        create_ms = (time.perf_counter() - start) * 1000
+        rss_after = read_rss()
+        if costs is None and len(sessions) >= 2:
+            costs = instance_costs(sessions[0], sessions[1])
+
+        latencies, work = asyncio.run(_measure(sessions, seconds))
+        latency = percentiles(latencies)
+        step = {
+            'sessions': count,
+            'ticks': len(latencies),
+            'ticks_per_second': round(len(latencies) / seconds, 1),
+            'latency_ms': latency,
+            'work_ms': percentiles(work),
+            'create_ms_per_session': round(create_ms / added, 3) if added > 0 else None,
+            'rss_mib': round(read_rss() / 2 ** 20, 1),
+            'rss_per_session_kib': round((rss_after - rss_before) / added / 1024, 1) if added > 0 else None,
+            'keys_pressed': sum(s.keys_pressed for s in sessions),
+            'games_played': sum(s.games_played for s in sessions),
+        }
+        results.append(step)
+        log(f"{count:>6} sessions  p50 {latency['p50']:>8.2f} ms  p99 {latency['p99']:>8.2f} ms  "
+            f"rss {step['rss_mib']:>8.1f} MiB")
+
+        if latency['p99'] > budget_ms:
+            exceeded_at = count
+            break
+        within_budget = count
+        if max_rss and read_rss() >= max_rss:
+            log(f"Stopping: memory limit of {max_rss // 2 ** 20} MiB reached")
+            break
+
+    return {
+        'version': REPORT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'platform': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'system': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {
+            'frame_rate': FRAME_RATE,
+            'budget_ms': budget_ms,
+            'key_rate': KEY_RATE,
+            'step_seconds': seconds,
+            'render': render,
+            'seed': seed,
+        },
+        'base_rss_mib': round(base_rss / 2 ** 20, 1),
+        'instance_costs': costs,
+        'steps': results,
+        'sessions_within_budget': within_budget,
+        'budget_exceeded_at': exceeded_at,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run many Tetris sessions in one process and report tick latency')
+    parser.add_argument('-o', '--output', help='JSON report path (default: stdout)')
+    parser.add_argument('--steps', default=','.join(map(str, DEFAULT_STEPS)),
+                        help='comma-separated session counts to ramp through')
+    parser.add_argument('--seconds', type=float, default=STEP_SECONDS, help='measurement time per step')
+    parser.add_argument('--render', action='store_true', help='also draw every changed frame')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS)
+    parser.add_argument('--max-rss-mib', type=int, default=None, help='stop ramping above this memory use')
+    args = parser.parse_args()
+    sys.stdout = sys.stderr  # 游戏的提示信息改写到 stderr，stdout 只输出报告
+
+    steps = sorted({int(n) for n in args.steps.split(',') if n})
+    max_rss = args.max_rss_mib * 2 ** 20 if args.max_rss_mib else None
+    report = run_load_test(steps, args.seconds, args.render, args.seed, args.budget_ms, max_rss,
+                           log=lambda message: print(message, file=sys.stderr))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        sys.__stdout__.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,32 @@ import os
 import numpy as np
 from enum import Enum
 import math
+import struct
 import sys
+import time
+from render_target import RenderTarget, load_texture
+from effects import overlay_pool, LevelUpFrames
+from materials import MaterialBaker
+from assetpack import open_pack
+from quality import create_governor
+from gravity import MAX_GRAVITY, GravityEngine, create_gravity, drop_distance
+from scheduler import Scheduler
+from zobrist import default_keys
+import gestures
+from gestures import GestureRecognizer
+from snapshot import GameSnapshot, save_snapshot, load_snapshot
+import tracing
+import allocprofile
+import profiling
+import latency
+import replay
+import movegen
+from rewind import NullRewind, create_rewind
+from gpu_renderer import create_texture_renderer
+try:
+    from leaderboard import open_leaderboard
+except ImportError:  # 没有 sqlite3 的平台继续使用 high_score.json
+    open_leaderboard = None
 
 # Initialize Pygame and its mixer
 pygame.init()
@@ -22,6 +47,12 @@ def resource_path(relative_path):
     
     return os.path.join(base_path, relative_path)
 
+def asset_source(relative_path):
+    """资源的来源：资源包中的文件对象，或者散文件路径"""
+    if ASSET_PACK and relative_path in ASSET_PACK:
+        return ASSET_PACK.open(relative_path)
+    return os.path.join(ASSETS_DIR, *relative_path.split('/'))
+
 # 创建和设置游戏图标
 def create_game_icon(size=32):
     """创建一个现代风格的俄罗斯方块图标"""
@@ -85,11 +116,33 @@ GRID_HEIGHT = 20
 SCREEN_WIDTH = BLOCK_SIZE * (GRID_WIDTH + 8)
 SCREEN_HEIGHT = BLOCK_SIZE * GRID_HEIGHT
 
+# 网格的每一行都是不可变的 tuple，快照可以直接共享未修改的行
+EMPTY_ROW = (0,) * GRID_WIDTH
+
+# movegen 路径中的动作对应的按键
+MOVEGEN_KEYS = {
+    movegen.LEFT: pygame.K_LEFT,
+    movegen.RIGHT: pygame.K_RIGHT,
+    movegen.ROTATE: pygame.K_UP,
+    movegen.SOFT_DROP: pygame.K_DOWN,
+    movegen.HARD_DROP: pygame.K_SPACE,
+}
+
+# 显示缩放模式：scaled / integer / letterbox（见 render_target.py）
+DISPLAY_MODE = os.environ.get('TETRIS_DISPLAY_MODE', 'scaled')
+
+# 渲染后端：surface / gpu / gpu-software（见 gpu_renderer.py）
+RENDERER = os.environ.get('TETRIS_RENDERER', 'surface')
+
 # 资源路径
 ASSETS_DIR = resource_path('assets')
+ASSET_PACK = open_pack()  # 打包后的资源（见 assetpack.py），没有时读取 assets 目录下的散文件
 AUDIO_DIR = os.path.join(ASSETS_DIR, 'audio')
 TEXTURES_DIR = os.path.join(ASSETS_DIR, 'textures')
 
+# 已解码的音效缓存 {文件名: Sound 或 None}，同一进程内的多个对局共享
+_sound_cache = {}
+
 # 创建资源目录（仅在开发模式下）
 if not hasattr(sys, '_MEIPASS'):
     os.makedirs(AUDIO_DIR, exist_ok=True)
@@ -109,8 +162,8 @@ COLORS = [
     (170, 120, 120),  # Z - 红色金属
 ]
 
-# 3D效果参数
-LIGHT_DIR = np.array([0.5, 0.5, 1.0])
+# 3D效果参数（材质在加载时烘焙，见 materials.py）
+LIGHT_DIR = np.array([-0.5, -0.5, 1.0])  # 光源方向：x 向右，y 向下，z 指向屏幕外（左上方光源）
 METALLIC_SHINE = 0.8
 ROUGHNESS = 0.2
 
@@ -127,6 +180,17 @@ COMBO_BONUS = 50  # 每次连击的基础奖励分数
 RAINBOW_EFFECT_DURATION = 3000  # 彩虹特效持续时间（毫秒）
 LEVEL_UP_ANIMATION_DURATION = 1000  # 升级动画持续时间（毫秒）
 
+# 自动存档参数
+AUTOSAVE_FILE = 'autosave.bin'
+AUTOSAVE_INTERVAL = 10  # 每锁定多少个方块自动存档一次（用于崩溃恢复）
+
+# 性能剖析采集完成后 HUD 提示的显示时间（毫秒）
+PROFILE_MESSAGE_MS = 4000
+
+# 空闲帧调度参数
+IDLE_WAIT_TIMEOUT = 500  # 画面静止时单次等待事件的最长时间（毫秒）
+IDLE_POLL_INTERVAL = 50  # pygbag 下不能阻塞浏览器，改为按此间隔轮询（毫秒）
+
 # 彩虹色彩序列
 RAINBOW_COLORS = [
     (255, 0, 0),    # 红
@@ -137,6 +201,21 @@ RAINBOW_COLORS = [
     (75, 0, 130),   # 靛
     (238, 130, 238) # 紫
 ]
+RAINBOW_BLEND_STEPS = 8  # 彩虹混合系数的量化级数，所有混合色在加载时烘焙
+
+def rainbow_blend(color, rainbow_color, step):
+    """按量化后的混合系数混合原色与彩虹色"""
+    t = step / RAINBOW_BLEND_STEPS
+    return tuple(int(c1 * t + c2 * (1 - t)) for c1, c2 in zip(color, rainbow_color))
+
+def rainbow_palette(colors):
+    """彩虹特效可能用到的全部颜色，交给 MaterialBaker 预先烘焙"""
+    palette = list(RAINBOW_COLORS)
+    for color in colors:
+        for rainbow_color in RAINBOW_COLORS:
+            for step in range(RAINBOW_BLEND_STEPS + 1):
+                palette.append(rainbow_blend(color, rainbow_color, step))
+    return palette
 
 # Tetromino shapes
 SHAPES = [
@@ -155,6 +234,114 @@ SHAPES = [
      [0, 1, 1]]
 ]
 
+def ghost_colors(color):
+    """预览阴影的填充色和边框色"""
+    # 使用原始颜色但降低饱和度和亮度
+    ghost_color = (
+        min(255, int(color[0] * 0.6 + 255 * 0.1)),  # 降低亮度
+        min(255, int(color[1] * 0.6 + 255 * 0.1)),
+        min(255, int(color[2] * 0.6 + 255 * 0.1)),
+        120  # 增加透明度
+    )
+    
+    # 边框颜色（比主体颜色稍暗）
+    border_color = (
+        min(255, int(color[0] * 0.7 + 255 * 0.1)),
+        min(255, int(color[1] * 0.7 + 255 * 0.1)),
+        min(255, int(color[2] * 0.7 + 255 * 0.1)),
+        140  # 增加边框透明度
+    )
+    return ghost_color, border_color
+
+def draw_dashed_border(surface, color):
+    """在方块大小的表面上绘制虚线边框"""
+    dash_length = 3  # 减小虚线段长度
+    gap_length = 2   # 减小虚线间隔长度
+    
+    # 绘制四条边的虚线
+    for edge in range(4):
+        start_pos = [0, 0]
+        if edge == 1:  # 右边
+            start_pos = [BLOCK_SIZE-1, 0]
+        elif edge == 2:  # 下边
+            start_pos = [0, BLOCK_SIZE-1]
+        elif edge == 3:  # 左边
+            start_pos = [0, 0]
+        
+        current_pos = start_pos.copy()
+        is_drawing = True  # 控制是否绘制当前段
+        
+        while True:
+            # 计算终点位置
+            end_pos = current_pos.copy()
+            if edge in [0, 2]:  # 水平线
+                end_pos[0] = min(current_pos[0] + dash_length, BLOCK_SIZE)
+            else:  # 垂直线
+                end_pos[1] = min(current_pos[1] + dash_length, BLOCK_SIZE)
+            
+            # 如果是绘制阶段，画出当前虚线段
+            if is_drawing:
+                pygame.draw.line(surface, color, current_pos, end_pos, 2)
+            
+            # 更新位置
+            if edge in [0, 2]:  # 水平线
+                current_pos[0] = end_pos[0] + gap_length
+                if current_pos[0] >= BLOCK_SIZE:
+                    break
+            else:  # 垂直线
+                current_pos[1] = end_pos[1] + gap_length
+                if current_pos[1] >= BLOCK_SIZE:
+                    break
+            
+            # 切换绘制状态
+            is_drawing = not is_drawing
+
+# 预览阴影格子缓存 {(方块序号, 是否虚线): Surface}，与对局无关，所有实例共享
+_ghost_cells = {}
+
+def ghost_cell(piece, dashes):
+    """预览阴影的一个格子，每种方块和边框样式只绘制一次"""
+    key = (piece, dashes)
+    cell = _ghost_cells.get(key)
+    if cell is None:
+        ghost_color, border_color = ghost_colors(COLORS[piece])
+        cell = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE), pygame.SRCALPHA)
+        
+        # 绘制填充
+        pygame.draw.rect(cell, ghost_color, (2, 2, BLOCK_SIZE-4, BLOCK_SIZE-4))
+        
+        # 绘制更密集的虚线边框（低画质下画实线）
+        if dashes:
+            draw_dashed_border(cell, border_color)
+        else:
+            pygame.draw.rect(cell, border_color, (0, 0, BLOCK_SIZE, BLOCK_SIZE), 1)
+        _ghost_cells[key] = cell
+    return cell
+
+# 粒子精灵缓存 {(形状, 尺寸, 颜色, 角度): Surface}。粒子亮度只取 5 档、
+# 方块粒子的角度按 PARTICLE_ROTATION_STEP 取整，所以组合数有限，绘制时不再创建 Surface
+_particle_sprites = {}
+MAX_PARTICLE_SPRITES = 2048
+PARTICLE_ROTATION_STEP = 10  # 度
+
+def particle_sprite(kind, size, color, angle=0):
+    """不透明的粒子精灵：glow（半透明光晕）、square（旋转的方块）或 circle"""
+    key = (kind, size, color, angle)
+    sprite = _particle_sprites.get(key)
+    if sprite is None:
+        if len(_particle_sprites) >= MAX_PARTICLE_SPRITES:
+            _particle_sprites.clear()
+        sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+        if kind == 'glow':
+            pygame.draw.circle(sprite, (*color, 50), (size, size), size)
+        elif kind == 'square':
+            pygame.draw.rect(sprite, color, (size // 2, size // 2, size, size))
+            sprite = pygame.transform.rotate(sprite, angle)
+        else:
+            pygame.draw.circle(sprite, color, (size, size), size)
+        _particle_sprites[key] = sprite
+    return sprite
+
 class GameState(Enum):
     PLAYING = 1
     PAUSED = 2
@@ -181,7 +368,7 @@ class Particle:
         """生成基于基础颜色的随机粒子颜色"""
         r, g, b = base_color[:3]
         # 增加一些随机的明亮变化
-        brightness = random.uniform(0.8, 1.2)
+        brightness = round(random.uniform(0.8, 1.2), 1)
         r = min(255, max(0, int(r * brightness)))
         g = min(255, max(0, int(g * brightness)))
         b = min(255, max(0, int(b * brightness)))
@@ -208,51 +395,43 @@ class Particle:
             
         return self.lifetime > 0
         
-    def draw(self, screen):
+    def draw(self, screen, glow=True):
         if self.alpha <= 0:
             return
             
-        # 创建旋转的粒子表面
-        size = self.size * 2
-        particle_surface = pygame.Surface((size, size), pygame.SRCALPHA)
-        
-        # 绘制发光效果
-        glow_radius = self.size * 2
-        glow_surface = pygame.Surface((glow_radius * 2, glow_radius * 2), pygame.SRCALPHA)
-        glow_color = (*self.color[:3], 50)  # 半透明的发光
-        pygame.draw.circle(glow_surface, glow_color, (glow_radius, glow_radius), glow_radius)
-        
-        # 绘制核心粒子
-        color = (*self.color[:3], self.alpha)
+        # 绘制发光效果（低画质下省略）
+        if glow:
+            glow_radius = self.size * 2
+            glow_surface = particle_sprite('glow', glow_radius, self.color)
+            screen.blit(glow_surface,
+                       (int(self.x - glow_radius), int(self.y - glow_radius)))
+        
+        # 绘制核心粒子：方块有 90 度对称，只需按角度取整到 [0, 90)；圆形不用旋转
         if random.random() < 0.5:  # 50%概率绘制方形粒子
-            pygame.draw.rect(particle_surface, color, 
-                           (size//4, size//4, size//2, size//2))
+            angle = int(self.rotation % 90 // PARTICLE_ROTATION_STEP) * PARTICLE_ROTATION_STEP
+            sprite = particle_sprite('square', self.size, self.color, angle)
         else:  # 50%概率绘制圆形粒子
-            pygame.draw.circle(particle_surface, color,
-                             (size//2, size//2), self.size)
-        
-        # 旋转粒子
-        rotated_particle = pygame.transform.rotate(particle_surface, self.rotation)
-        
-        # 绘制发光效果和粒子
-        screen.blit(glow_surface, 
-                   (int(self.x - glow_radius), int(self.y - glow_radius)))
-        screen.blit(rotated_particle,
-                   (int(self.x - rotated_particle.get_width()//2),
-                    int(self.y - rotated_particle.get_height()//2)))
+            sprite = particle_sprite('circle', self.size, self.color)
+        
+        # 精灵在多个粒子间共享，透明度在绘制前设置
+        sprite.set_alpha(self.alpha)
+        screen.blit(sprite,
+                   (int(self.x - sprite.get_width()//2),
+                    int(self.y - sprite.get_height()//2)))
 
 class ClearAnimation:
-    def __init__(self, y, color):
+    def __init__(self, y, color, particle_count=PARTICLE_COUNT, flash_waves=FLASH_WAVES):
         self.y = y * BLOCK_SIZE
         self.particles = []
         self.start_time = pygame.time.get_ticks()
         self.active = True
         self.flash_count = 0
         self.last_flash_time = self.start_time
-        self.flash_interval = CLEAR_ANIMATION_DURATION / (FLASH_WAVES * 2)
+        self.flash_waves = flash_waves
+        self.flash_interval = CLEAR_ANIMATION_DURATION / (flash_waves * 2)
         
         # 创建更多的粒子，分布在整行
-        for _ in range(PARTICLE_COUNT):
+        for _ in range(particle_count):
             x = random.randint(0, GRID_WIDTH * BLOCK_SIZE)
             self.particles.append(Particle(x, self.y + BLOCK_SIZE/2, color))
     
@@ -275,31 +454,53 @@ class ClearAnimation:
             
         return self.active
     
-    def draw(self, screen):
+    def flash_alpha(self):
+        """当前闪光的透明度，闪光结束后为 0"""
+        if self.flash_count >= self.flash_waves * 2:
+            return 0
+        flash_progress = (pygame.time.get_ticks() - self.last_flash_time) / self.flash_interval
+        return max(0, int(255 * (1 - flash_progress) * 0.5))
+    
+    def draw(self, screen, glow=True):
         # 绘制闪光效果
-        if self.flash_count < FLASH_WAVES * 2:
-            flash_progress = (pygame.time.get_ticks() - self.last_flash_time) / self.flash_interval
-            flash_alpha = int(255 * (1 - flash_progress) * 0.5)
-            if flash_alpha > 0:
-                flash_surface = pygame.Surface((GRID_WIDTH * BLOCK_SIZE, BLOCK_SIZE), pygame.SRCALPHA)
-                flash_surface.fill((255, 255, 255, flash_alpha))
-                screen.blit(flash_surface, (0, self.y))
+        flash_alpha = self.flash_alpha()
+        if flash_alpha > 0:
+            flash_surface = overlay_pool.get((GRID_WIDTH * BLOCK_SIZE, BLOCK_SIZE),
+                                             (255, 255, 255), flash_alpha)
+            screen.blit(flash_surface, (0, self.y))
         
         # 绘制所有粒子
         for particle in self.particles:
-            particle.draw(screen)
+            particle.draw(screen, glow)
 
 class Tetris:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption('疯狂俄罗斯方块')
+    def __init__(self, stream=None, leaderboard=None, view_only=False):
+        # view_only：只用来显示（观战），不启用音效、自动下落、撤回、高分记录，
+        # 也不读取追踪 / 剖析 / 延迟统计等调试用的环境变量
+        self.view_only = view_only
         
         # 设置游戏图标
         icon = create_game_icon(32)
-        pygame.display.set_icon(icon)
+        
+        # 可选的硬件加速纹理渲染后端，不可用时为 None
+        self.texture_renderer = create_texture_renderer(
+            RENDERER, (SCREEN_WIDTH, SCREEN_HEIGHT), sys.modules[__name__],
+            '疯狂俄罗斯方块', icon)
+        
+        # 所有绘制都在逻辑分辨率的表面上进行，由 render_target 统一缩放输出
+        if self.texture_renderer:
+            self.render_target = self.texture_renderer
+        else:
+            self.render_target = RenderTarget((SCREEN_WIDTH, SCREEN_HEIGHT), DISPLAY_MODE)
+            pygame.display.set_caption('疯狂俄罗斯方块')
+            pygame.display.set_icon(icon)
+        self.screen = self.render_target.surface
         
         # Game state
-        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+        self.grid = [EMPTY_ROW] * GRID_HEIGHT
+        # 网格的 Zobrist 哈希，随落子和消行增量更新（见 zobrist.py）
+        self.zobrist = default_keys(GRID_WIDTH, GRID_HEIGHT, len(SHAPES))
+        self.board_hash = 0
         self.current_piece = None
         self.next_piece = None
         self.piece_pos = [0, 0]
@@ -310,15 +511,69 @@ class Tetris:
         self.fall_time = 0
         self.fall_speed = 1000  # Start with 1 second
         
-        # Touch control variables
-        self.touch_start = None
-        self.last_touch_move = None
+        # 定时器（见 scheduler.py）：自动下落、锁定延迟、连击超时和特效的结束时间
+        self.timers = Scheduler()
+        self.live_gravity = not view_only  # 录像渲染和观战时方块由日志驱动，关闭自动下落
+        self.paused_at = None  # 进入暂停的时刻，继续时据此推迟下落和锁定
+        
+        # 触摸手势识别（见 gestures.py），并屏蔽用不到的事件类型
+        self.gestures = GestureRecognizer(self.render_target.to_logical, BLOCK_SIZE)
+        pygame.event.set_blocked(gestures.UNUSED_EVENTS)
+        
+        # 观战数据流（可选，见 spectator.py）
+        self.stream = stream
+        
+        # 帧时间线追踪（TETRIS_TRACE 开启，见 tracing.py）
+        self.tracer = tracing.NullTracer() if view_only else tracing.create_tracer()
+        
+        # 每帧内存分配统计（TETRIS_ALLOC_PROFILE 开启，见 allocprofile.py）
+        self.alloc_profiler = allocprofile.NullAllocProfiler() if view_only else allocprofile.create_profiler()
+        
+        # 按需性能剖析（F10 / TETRIS_PROFILE，见 profiling.py），未采集时为 None
+        self.profile_capture = None
+        self.profile_status = None  # HUD 提示文本
+        self._profile_text = None
+        
+        # 输入到画面的延迟统计（TETRIS_LATENCY 开启，见 latency.py）
+        self.latency = latency.NullLatencyTracker() if view_only else latency.create_tracker()
+        
+        # 自适应画质（TETRIS_QUALITY / TETRIS_QUALITY_TIERS，见 quality.py）
+        self.quality = create_governor()
+        self._quality_texts = {}
+        
+        # HUD 字体只创建一次，文本在数值变化时才重新渲染
+        self.hud_font = pygame.font.Font(None, 36)
+        self._hud_texts = {}
+        
+        # 重力与锁定延迟（TETRIS_GRAVITY，见 gravity.py）
+        self.gravity = GravityEngine() if view_only else create_gravity()
+        
+        # 自动存档路径，为 None 时不存档
+        self.autosave_path = None
+        self._pieces_since_autosave = 0
+        
+        # 本局统计（记入排行榜），方块序列由种子决定
+        self.leaderboard = leaderboard
+        self.seed = random.randrange(2 ** 31)
+        self.rng = random.Random(self.seed)
+        self.pieces_placed = 0
+        self.game_start_time = pygame.time.get_ticks()
+        self.last_rank = None  # 本局结束后的排名
+        self._rank_text = None
+        
+        # 录像（TETRIS_REPLAY_DIR 开启，见 replay.py 和 replay_video.py）
+        self.replay_dir = None
+        self.recorder = None
+        self.last_replay = None
+        
+        # 练习模式的撤回（TETRIS_PRACTICE 开启，见 rewind.py）
+        self.rewind = NullRewind() if view_only else create_rewind(SHAPES)
         
         # Initialize pieces
         self.new_piece()
         
         # Load high score
-        self.high_score = self.load_high_score()
+        self.high_score = 0 if view_only else self.load_high_score()
         
         # Initialize clock
         self.clock = pygame.time.Clock()
@@ -328,16 +583,17 @@ class Tetris:
         
         # 尝试加载音效
         try:
-            self.sounds = {
-                'background': self._load_sound('background.mp3'),
-                'clear': self._load_sound('clear.wav'),
-                'rotate': self._load_sound('rotate.wav'),
-                'drop': self._load_sound('drop.wav'),
-                'move': self._load_sound('move.wav'),
-                'gameover': self._load_sound('gameover.wav'),
-                'level_up': self._load_sound('level_up.wav'),  # 新增等级提升音效
-                'combo': self._load_sound('combo.wav')         # 新增连击音效
-            }
+            if not view_only:  # 观战不播放音效和背景音乐
+                self.sounds = {
+                    'background': self._load_sound('background.mp3'),
+                    'clear': self._load_sound('clear.wav'),
+                    'rotate': self._load_sound('rotate.wav'),
+                    'drop': self._load_sound('drop.wav'),
+                    'move': self._load_sound('move.wav'),
+                    'gameover': self._load_sound('gameover.wav'),
+                    'level_up': self._load_sound('level_up.wav'),  # 新增等级提升音效
+                    'combo': self._load_sound('combo.wav')         # 新增连击音效
+                }
             
             # 设置音量
             for sound in self.sounds.values():
@@ -357,8 +613,8 @@ class Tetris:
         
         # 尝试加载材质
         try:
-            self.block_texture = pygame.image.load(os.path.join(TEXTURES_DIR, 'block_metallic.png'))
-            self.block_texture = pygame.transform.scale(self.block_texture, (BLOCK_SIZE, BLOCK_SIZE))
+            self.block_texture = load_texture(asset_source('textures/block_metallic.png'),
+                                              (BLOCK_SIZE, BLOCK_SIZE))
         except:
             # 创建默认的方块材质
             self.block_texture = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE), pygame.SRCALPHA)
@@ -367,9 +623,13 @@ class Tetris:
             pygame.draw.rect(self.block_texture, (255, 255, 255, 100),
                            (2, 2, BLOCK_SIZE-4, BLOCK_SIZE-4))
         
+        # 按颜色烘焙金属光照，材质贴图作为细节层；彩虹特效的混合色一并烘焙
+        self.materials = MaterialBaker(BLOCK_SIZE, LIGHT_DIR, METALLIC_SHINE, ROUGHNESS,
+                                       self.block_texture, COLORS + rainbow_palette(COLORS))
+        
         try:
-            self.background = pygame.image.load(os.path.join(TEXTURES_DIR, 'background.jpg'))
-            self.background = pygame.transform.scale(self.background, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            self.background = load_texture(asset_source('textures/background.jpg'),
+                                           (SCREEN_WIDTH, SCREEN_HEIGHT))
         except:
             # 创建默认的渐变背景
             self.background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -383,6 +643,7 @@ class Tetris:
         
         # 存储消除动画
         self.clear_animations = []
+        self.level_up_frames = LevelUpFrames()
         
         # 创建半透明的网格线surface
         self.grid_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
@@ -396,12 +657,18 @@ class Tetris:
         self.previous_level = 1  # 用于检测等级提升
         self.show_ghost_piece = True  # 是否显示预览阴影
         
+        # 空闲帧调度
+        self._state_overlays = {}  # 预渲染的暂停/游戏结束遮罩
+        self._last_frame_signature = None  # 上一次绘制时的画面签名
+        
     def _load_sound(self, filename):
-        """安全加载音效文件"""
-        try:
-            return pygame.mixer.Sound(os.path.join(AUDIO_DIR, filename))
-        except:
-            return None
+        """安全加载音效文件；解码后的音效在同一进程的所有对局间共享"""
+        if filename not in _sound_cache:
+            try:
+                _sound_cache[filename] = pygame.mixer.Sound(asset_source('audio/' + filename))
+            except:
+                _sound_cache[filename] = None
+        return _sound_cache[filename]
             
     def play_sound(self, sound_name):
         """安全播放音效"""
@@ -409,6 +676,8 @@ class Tetris:
             self.sounds[sound_name].play()
             
     def load_high_score(self):
+        if self.leaderboard:
+            return self.leaderboard.high_score()
         try:
             with open('high_score.json', 'r') as f:
                 return json.load(f)['high_score']
@@ -416,22 +685,183 @@ class Tetris:
             return 0
             
     def save_high_score(self):
+        if self.leaderboard:
+            return  # 成绩在对局结束时记入排行榜
         with open('high_score.json', 'w') as f:
             json.dump({'high_score': self.high_score}, f)
             
+    def start_recording(self):
+        """开始记录本局录像（未设置录像目录时不记录）"""
+        self.last_replay = None
+        self.recorder = (replay.ReplayRecorder(self.seed, self.game_start_time, SHAPES)
+                         if self.replay_dir else None)
+        
+    def save_replay(self):
+        """对局结束时写出录像文件"""
+        if not self.recorder:
+            return
+        try:
+            self.last_replay = self.recorder.save(
+                self.replay_dir, score=self.score,
+                duration_ms=pygame.time.get_ticks() - self.game_start_time)
+        except OSError as e:
+            print(f"Warning: Could not save replay: {e}")
+        self.recorder = None
+        
+    def record_game(self):
+        """对局结束时把成绩记入排行榜（撤回过的练习对局不计入）"""
+        if not self.leaderboard or self.rewind.used:
+            return
+        self.last_rank = self.leaderboard.record({
+            'score': self.score,
+            'lines': self.lines_cleared,
+            'level': self.level,
+            'duration_ms': pygame.time.get_ticks() - self.game_start_time,
+            'pieces': self.pieces_placed,
+            'seed': self.seed,
+            'replay': self.last_replay,
+        })
+        self._rank_text = None
+            
+    def snapshot(self):
+        """捕获当前游戏状态的不可变快照，未修改的网格行与对局共享"""
+        current_time = pygame.time.get_ticks()
+        shape = SHAPES[self.current_piece] if self.current_piece is not None else None
+        return GameSnapshot(
+            grid=tuple(self.grid),
+            current_piece=self.current_piece,
+            next_piece=self.next_piece,
+            piece_pos=tuple(self.piece_pos),
+            shape=tuple(map(tuple, shape)) if shape else None,
+            score=self.score,
+            level=self.level,
+            lines_cleared=self.lines_cleared,
+            state=self.state.value,
+            fall_speed=self.fall_speed,
+            fall_elapsed=max(0, current_time - self.fall_time),
+            combo_count=self.combo_count,
+            combo_elapsed=max(0, current_time - self.last_clear_time),
+        )
+        
+    def restore(self, snapshot):
+        """从快照恢复游戏状态"""
+        current_time = pygame.time.get_ticks()
+        self.grid = list(snapshot.grid)
+        self.board_hash = self.zobrist.board(self.grid)
+        self.current_piece = snapshot.current_piece
+        self.next_piece = snapshot.next_piece
+        self.piece_pos = list(snapshot.piece_pos)
+        if snapshot.shape is not None:
+            SHAPES[self.current_piece] = snapshot.shape
+        self.score = snapshot.score
+        self.level = self.previous_level = snapshot.level
+        self.lines_cleared = snapshot.lines_cleared
+        self.state = GameState(snapshot.state)
+        self.paused_at = current_time if self.state == GameState.PAUSED else None
+        self.fall_speed = snapshot.fall_speed
+        self.fall_time = current_time - snapshot.fall_elapsed
+        self.gravity.reset()
+        self.wake_gravity()
+        self.combo_count = snapshot.combo_count
+        self.last_clear_time = current_time - snapshot.combo_elapsed
+        self.clear_animations = []
+        self.rainbow_effect_start = 0
+        self.level_up_animation_start = 0
+        self.schedule_effects()
+        if self.stream:
+            self.stream.keyframe(self)
+            
+    def toggle_profile(self):
+        """开始按环境变量设置的长度采集性能剖析；正在采集时提前结束并写出"""
+        if self.profile_capture is not None:
+            self.finish_profile()
+        else:
+            self.start_profile(profiling.capture_from_env())
+            
+    def start_profile(self, capture):
+        self.profile_capture = capture.start()
+        self.profile_status = f'Profiling ({capture.mode})...'
+        self.timers.cancel('profile_status')
+        
+    def finish_profile(self):
+        """结束采集、写出文件，并在 HUD 上提示文件名"""
+        capture, self.profile_capture = self.profile_capture, None
+        paths = capture.finish()
+        self.profile_status = f'Profile saved: {capture.name}' if paths else 'Profile failed'
+        self.timers.schedule('profile_status', pygame.time.get_ticks() + PROFILE_MESSAGE_MS,
+                             self._clear_profile_status)
+        
+    def _clear_profile_status(self, now):
+        self.profile_status = None
+        
+    def rewind_pieces(self, pieces=1):
+        """练习模式：撤回最近 pieces 次落子，回到那个方块刚生成时，返回是否撤回"""
+        current_time = pygame.time.get_ticks()
+        snapshot = self.rewind.rewind(self, pieces, GameState.PLAYING.value, current_time)
+        if snapshot is None:
+            return False
+        self.restore(snapshot)
+        self.recorder = None  # 撤回后的对局无法从种子重放
+        self.latency.on_change()
+        if hasattr(self, '_game_over_sound_played'):
+            del self._game_over_sound_played
+        return True
+        
+    def autosave(self):
+        """把进行中的对局写入存档"""
+        self._pieces_since_autosave = 0
+        if self.autosave_path and self.state != GameState.GAME_OVER:
+            try:
+                save_snapshot(self.autosave_path, self.snapshot())
+            except (OSError, struct.error) as e:  # struct.error：数值超出存档字段范围
+                print(f"Warning: Could not write autosave: {e}")
+                
+    def discard_autosave(self):
+        """对局结束后删除存档"""
+        if self.autosave_path and os.path.exists(self.autosave_path):
+            os.remove(self.autosave_path)
+            
+    def resume_autosave(self):
+        """如果有未完成的对局存档，恢复并进入暂停状态"""
+        snapshot = None
+        if self.autosave_path:
+            snapshot = load_snapshot(self.autosave_path, {state.value for state in GameState},
+                                     len(SHAPES), (GRID_WIDTH, GRID_HEIGHT))
+        if snapshot is None or snapshot.state == GameState.GAME_OVER.value:
+            return False
+        self.restore(snapshot)
+        self.state = GameState.PAUSED
+        self.paused_at = pygame.time.get_ticks()
+        self.recorder = None  # 从中途恢复的对局无法从种子重放
+        self.rewind.clear()
+        self.rewind.on_spawn(self)
+        return True
+        
     def new_piece(self):
         if self.next_piece is None:
-            self.next_piece = random.randint(0, len(SHAPES) - 1)
+            self.next_piece = self.rng.randint(0, len(SHAPES) - 1)
         self.current_piece = self.next_piece
-        self.next_piece = random.randint(0, len(SHAPES) - 1)
+        queued = self.rewind.pop_queued()
+        self.next_piece = queued if queued is not None else self.rng.randint(0, len(SHAPES) - 1)
         self.piece_pos = [0, GRID_WIDTH // 2 - len(SHAPES[self.current_piece][0]) // 2]
+        self.rewind.on_spawn(self)
+        self.gravity.reset()
+        self.fall_time = pygame.time.get_ticks()
+        self.wake_gravity()
+        if self.stream:
+            self.stream.on_spawn(self)
         
         # Check if game is over
         if self.check_collision():
             self.state = GameState.GAME_OVER
+            self.discard_autosave()
+            if self.stream:
+                self.stream.on_state(self)
             if self.score > self.high_score:
                 self.high_score = self.score
                 self.save_high_score()
+            self.save_replay()
+            self.record_game()
                 
     def rotate_piece(self):
         if self.current_piece is None:
@@ -456,6 +886,10 @@ class Tetris:
             SHAPES[self.current_piece] = original_shape
             self.piece_pos = original_pos
             
+    def state_hash(self):
+        """局面（网格 + 当前方块 + 下一个方块）的 Zobrist 哈希"""
+        return self.zobrist.state(self.board_hash, self.current_piece, self.next_piece)
+        
     def check_collision(self, row_offset=0, col_offset=0):
         """检查碰撞，可以指定偏移量进行预判断"""
         if self.current_piece is None:
@@ -480,11 +914,14 @@ class Tetris:
         if self.current_piece is None:
             return
             
+        start = self.tracer.begin()
+        self.latency.on_change()
         shape = SHAPES[self.current_piece]
         piece_color = self.current_piece + 1
         
         # 记录受影响的行
         affected_rows = set()
+        merged_cells = []
         
         # 将当前方块合并到网格中
         for i, row in enumerate(shape):
@@ -493,8 +930,15 @@ class Tetris:
                     grid_row = self.piece_pos[0] + i
                     grid_col = self.piece_pos[1] + j
                     if grid_row >= 0:
-                        self.grid[grid_row][grid_col] = piece_color
+                        new_row = list(self.grid[grid_row])
+                        new_row[grid_col] = piece_color
+                        self.grid[grid_row] = tuple(new_row)
+                        self.board_hash ^= self.zobrist.cells[grid_row][grid_col]
                         affected_rows.add(grid_row)
+                        merged_cells.append((grid_row, grid_col))
+        
+        if self.stream:
+            self.stream.on_lock(piece_color, merged_cells, GRID_WIDTH)
         
         # 检查受影响的行是否可以消除
         lines_to_clear = []
@@ -502,16 +946,25 @@ class Tetris:
             if all(cell != 0 for cell in self.grid[row]):
                 lines_to_clear.append(row)
         
+        self.rewind.record(self, merged_cells, lines_to_clear, pygame.time.get_ticks())
         if lines_to_clear:
             self.clear_lines(lines_to_clear)
             
+        self.pieces_placed += 1
         self.new_piece()
         
+        # 定期自动存档，崩溃后可以恢复
+        self._pieces_since_autosave += 1
+        if self._pieces_since_autosave >= AUTOSAVE_INTERVAL:
+            self.autosave()
+        self.tracer.end('merge_piece', start)
+        
     def clear_lines(self, lines):
         """清除指定的行并更新分数"""
         if not lines:
             return
             
+        start = self.tracer.begin()
         current_time = pygame.time.get_ticks()
         
         # 更新连击状态
@@ -525,13 +978,14 @@ class Tetris:
         lines_count = len(lines)
         base_score = lines_count * 100 * self.level
         combo_bonus = self.combo_count * COMBO_BONUS * self.level
-        self.score += base_score + combo_bonus
+        score_delta = base_score + combo_bonus
+        self.score += score_delta
         
         # 更新等级
         old_level = self.level
         self.lines_cleared += lines_count
         self.level = self.lines_cleared // 10 + 1
-        self.fall_speed = max(100, 1000 - (self.level - 1) * 100)
+        self.fall_speed = round(self.gravity.ms_per_row(self.level))
         
         # 处理等级提升
         if self.level > old_level:
@@ -542,14 +996,17 @@ class Tetris:
         if self.combo_count >= 2:
             self.rainbow_effect_start = current_time
             self.play_sound('combo')
+        self.schedule_effects()
         
-        # 创建消除动画
+        # 创建消除动画，粒子数和闪光次数取决于当前画质
+        tier = self.quality.tier
         for line in lines:
             color = COLORS[random.randint(0, len(COLORS)-1)]
-            self.clear_animations.append(ClearAnimation(line, color))
+            self.clear_animations.append(ClearAnimation(line, color, tier.particles, tier.flash_waves))
         
         # 从下往上清除行并移动上方的方块
-        new_grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(len(lines))]
+        self.board_hash = self.zobrist.clear(self.board_hash, self.grid, lines)
+        new_grid = [EMPTY_ROW] * len(lines)
         remaining_grid = []
         
         # 收集未被清除的行
@@ -560,34 +1017,51 @@ class Tetris:
         # 重建网格
         self.grid = new_grid + remaining_grid
         
+        if self.stream:
+            self.stream.on_clear(lines)
+            self.stream.on_score(self, score_delta)
+        
         # 播放音效
         self.play_sound('clear')
+        self.tracer.end('clear_lines', start)
 
     def update_animations(self):
-        """更新所有动画效果"""
-        current_time = pygame.time.get_ticks()
-        
-        # 更新消除动画
+        """更新消除动画（连击和特效的结束由定时器处理，见 schedule_effects）"""
         self.clear_animations = [anim for anim in self.clear_animations if anim.update()]
         
-        # 更新连击状态
-        if self.combo_count > 0 and current_time - self.last_clear_time > COMBO_TIMEOUT:
-            self.combo_count = 0
-            self.rainbow_effect_start = 0
+    def schedule_effects(self):
+        """按当前的连击和特效开始时间登记（或取消）它们的结束定时器"""
+        effects = (
+            ('combo', self.combo_count, self.last_clear_time, COMBO_TIMEOUT, self._end_combo),
+            ('rainbow', self.rainbow_effect_start, self.rainbow_effect_start,
+             RAINBOW_EFFECT_DURATION, self._end_rainbow),
+            ('level_up', self.level_up_animation_start, self.level_up_animation_start,
+             LEVEL_UP_ANIMATION_DURATION, self._end_level_up),
+        )
+        for name, active, start, duration, callback in effects:
+            if active:
+                # 超过持续时间（而不是刚好等于）才结束
+                self.timers.schedule(name, start + duration + 1, callback)
+            else:
+                self.timers.cancel(name)
+                
+    def _end_combo(self, now):
+        self.combo_count = 0
+        self.rainbow_effect_start = 0
+        self.timers.cancel('rainbow')
         
-        # 更新等级提升动画
-        if self.level_up_animation_start and current_time - self.level_up_animation_start > LEVEL_UP_ANIMATION_DURATION:
-            self.level_up_animation_start = 0
+    def _end_rainbow(self, now):
+        self.rainbow_effect_start = 0
+        
+    def _end_level_up(self, now):
+        self.level_up_animation_start = 0
 
     def get_ghost_piece_position(self):
         """获取方块预览位置"""
         if not self.current_piece:
             return None
             
-        ghost_pos = self.piece_pos.copy()
-        while not self.check_collision(row_offset=ghost_pos[0] - self.piece_pos[0] + 1):
-            ghost_pos[0] += 1
-        return ghost_pos
+        return [self.piece_pos[0] + self.drop_distance(), self.piece_pos[1]]
         
     def draw_ghost_piece(self):
         """绘制方块预览阴影"""
@@ -599,80 +1073,13 @@ class Tetris:
             return
             
         shape = SHAPES[self.current_piece]
-        color = COLORS[self.current_piece]
-        
-        # 使用原始颜色但降低饱和度和亮度
-        ghost_color = (
-            min(255, int(color[0] * 0.6 + 255 * 0.1)),  # 降低亮度
-            min(255, int(color[1] * 0.6 + 255 * 0.1)),
-            min(255, int(color[2] * 0.6 + 255 * 0.1)),
-            120  # 增加透明度
-        )
-        
-        # 边框颜色（比主体颜色稍暗）
-        border_color = (
-            min(255, int(color[0] * 0.7 + 255 * 0.1)),
-            min(255, int(color[1] * 0.7 + 255 * 0.1)),
-            min(255, int(color[2] * 0.7 + 255 * 0.1)),
-            140  # 增加边框透明度
-        )
+        ghost_surface = ghost_cell(self.current_piece, self.quality.tier.ghost_dashes)
         
         for i, row in enumerate(shape):
             for j, cell in enumerate(row):
                 if cell:
                     x = (ghost_pos[1] + j) * BLOCK_SIZE
                     y = (ghost_pos[0] + i) * BLOCK_SIZE
-                    
-                    # 创建透明表面
-                    ghost_surface = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE), pygame.SRCALPHA)
-                    
-                    # 绘制填充
-                    pygame.draw.rect(ghost_surface, ghost_color, 
-                                  (2, 2, BLOCK_SIZE-4, BLOCK_SIZE-4))
-                    
-                    # 绘制更密集的虚线边框
-                    dash_length = 3  # 减小虚线段长度
-                    gap_length = 2   # 减小虚线间隔长度
-                    
-                    # 绘制四条边的虚线
-                    for edge in range(4):
-                        start_pos = [0, 0]
-                        if edge == 1:  # 右边
-                            start_pos = [BLOCK_SIZE-1, 0]
-                        elif edge == 2:  # 下边
-                            start_pos = [0, BLOCK_SIZE-1]
-                        elif edge == 3:  # 左边
-                            start_pos = [0, 0]
-                        
-                        current_pos = start_pos.copy()
-                        is_drawing = True  # 控制是否绘制当前段
-                        
-                        while True:
-                            # 计算终点位置
-                            end_pos = current_pos.copy()
-                            if edge in [0, 2]:  # 水平线
-                                end_pos[0] = min(current_pos[0] + dash_length, BLOCK_SIZE)
-                            else:  # 垂直线
-                                end_pos[1] = min(current_pos[1] + dash_length, BLOCK_SIZE)
-                            
-                            # 如果是绘制阶段，画出当前虚线段
-                            if is_drawing:
-                                pygame.draw.line(ghost_surface, border_color,
-                                               current_pos, end_pos, 2)
-                            
-                            # 更新位置
-                            if edge in [0, 2]:  # 水平线
-                                current_pos[0] = end_pos[0] + gap_length
-                                if current_pos[0] >= BLOCK_SIZE:
-                                    break
-                            else:  # 垂直线
-                                current_pos[1] = end_pos[1] + gap_length
-                                if current_pos[1] >= BLOCK_SIZE:
-                                    break
-                            
-                            # 切换绘制状态
-                            is_drawing = not is_drawing
-                    
                     self.screen.blit(ghost_surface, (x, y))
                     
     def draw_level_up_animation(self):
@@ -680,30 +1087,16 @@ class Tetris:
         if not self.level_up_animation_start:
             return
             
-        current_time = pygame.time.get_ticks()
-        elapsed = current_time - self.level_up_animation_start
+        elapsed = pygame.time.get_ticks() - self.level_up_animation_start
         
-        if elapsed > LEVEL_UP_ANIMATION_DURATION:
-            self.level_up_animation_start = 0
-            return
-            
         # 创建闪光效果
-        progress = elapsed / LEVEL_UP_ANIMATION_DURATION
+        progress = min(1.0, elapsed / LEVEL_UP_ANIMATION_DURATION)
         alpha = int(255 * (1 - progress))
-        flash_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        flash_surface.fill((255, 255, 255, alpha // 4))
+        flash_surface = overlay_pool.get((SCREEN_WIDTH, SCREEN_HEIGHT), (255, 255, 255), alpha // 4)
         self.screen.blit(flash_surface, (0, 0))
         
-        # 显示等级提升文本
-        font = pygame.font.Font(None, 72)
-        text = font.render(f'LEVEL {self.level}!', True, (255, 255, 255))
-        text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-        
-        # 添加缩放效果
-        scale = 1 + math.sin(progress * math.pi) * 0.3
-        scaled_text = pygame.transform.scale(text, 
-                                          (int(text_rect.width * scale), 
-                                           int(text_rect.height * scale)))
+        # 显示等级提升文本（预渲染的缩放帧）
+        scaled_text = self.level_up_frames.frame(self.level, progress)
         scaled_rect = scaled_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
         self.screen.blit(scaled_text, scaled_rect)
         
@@ -712,45 +1105,21 @@ class Tetris:
         if not self.rainbow_effect_start:
             return color
             
-        current_time = pygame.time.get_ticks()
-        elapsed = current_time - self.rainbow_effect_start
+        elapsed = pygame.time.get_ticks() - self.rainbow_effect_start
         
-        if elapsed > RAINBOW_EFFECT_DURATION:
-            self.rainbow_effect_start = 0
-            return color
-            
-        # 计算彩虹颜色
+        # 计算彩虹颜色（结束由定时器处理，这里不再逐格检查）
         rainbow_index = int((elapsed / 200) % len(RAINBOW_COLORS))
         rainbow_color = RAINBOW_COLORS[rainbow_index]
+        if not self.quality.tier.rainbow_blend:
+            return rainbow_color  # 低画质下不混合，只有 7 种颜色，材质全部命中缓存
         
-        # 混合原始颜色和彩虹颜色
+        # 混合原始颜色和彩虹颜色，系数量化后所有结果都已在加载时烘焙
         blend_factor = 0.5 + math.sin(elapsed * 0.01) * 0.5
-        return tuple(int(c1 * blend_factor + c2 * (1 - blend_factor))
-                    for c1, c2 in zip(color, rainbow_color))
+        return rainbow_blend(color, rainbow_color, round(blend_factor * RAINBOW_BLEND_STEPS))
         
     def apply_metallic_effect(self, surface, color, pos):
-        """应用金属质感3D效果"""
-        x, y = pos
-        normal = np.array([0.0, 0.0, 1.0])
-        
-        # 计算光照
-        light_dir = LIGHT_DIR / np.linalg.norm(LIGHT_DIR)
-        diffuse = max(0, np.dot(normal, light_dir))
-        
-        # 计算反射光
-        reflect = normal * 2 * np.dot(normal, light_dir) - light_dir
-        specular = pow(max(0, reflect[2]), 1/ROUGHNESS) * METALLIC_SHINE
-        
-        # 调整颜色
-        r, g, b = color
-        r = min(255, int(r * diffuse + 255 * specular))
-        g = min(255, int(g * diffuse + 255 * specular))
-        b = min(255, int(b * diffuse + 255 * specular))
-        
-        # 绘制带有金属质感的方块
-        metallic_surface = self.block_texture.copy()
-        metallic_surface.fill((r, g, b), special_flags=pygame.BLEND_RGBA_MULT)
-        surface.blit(metallic_surface, (x, y))
+        """绘制预先烘焙好光照的金属方块"""
+        surface.blit(self.materials.get(color), pos)
         
     def _draw_grid(self):
         """预渲染网格线"""
@@ -761,12 +1130,45 @@ class Tetris:
                                [x * BLOCK_SIZE, y * BLOCK_SIZE,
                                 BLOCK_SIZE, BLOCK_SIZE], 1)
                                 
+    def _get_state_overlay(self, state):
+        """获取暂停/游戏结束的遮罩层，每种状态只渲染一次"""
+        overlay = self._state_overlays.get(state)
+        if overlay is not None:
+            return overlay
+            
+        if state == GameState.PAUSED:
+            title, hint = 'PAUSED', 'Press ESC to continue'
+        else:
+            title, hint = 'GAME OVER', 'Press SPACE to restart'
+            
+        # 半透明黑色背景
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 128))
+        
+        # 标题和提示文本
+        title_text = pygame.font.Font(None, 72).render(title, True, WHITE)
+        hint_text = pygame.font.Font(None, 36).render(hint, True, WHITE)
+        overlay.blit(title_text, title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)))
+        overlay.blit(hint_text, hint_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50)))
+        
+        self._state_overlays[state] = overlay
+        return overlay
+        
     def draw(self):
+        if self.texture_renderer:
+            self.texture_renderer.draw(self)
+            return
+            
+        tracer = self.tracer
+        start = tracer.begin()
+        
         # 绘制背景
         self.screen.blit(self.background, (0, 0))
         
-        # 绘制网格线
-        self.screen.blit(self.grid_surface, (0, 0))
+        # 绘制网格线（低画质下省略）
+        if self.quality.tier.background_detail:
+            self.screen.blit(self.grid_surface, (0, 0))
+        start = tracer.end('draw.background', start)
         
         # 绘制已落下的方块
         for y in range(GRID_HEIGHT):
@@ -792,6 +1194,7 @@ class Tetris:
                             ((self.piece_pos[1] + x) * BLOCK_SIZE,
                              (self.piece_pos[0] + y) * BLOCK_SIZE)
                         )
+        start = tracer.end('draw.board', start)
                         
         # Draw next piece preview
         preview_x = GRID_WIDTH * BLOCK_SIZE + BLOCK_SIZE
@@ -812,73 +1215,83 @@ class Tetris:
                             (preview_x + (x + 1) * BLOCK_SIZE,
                              preview_y + (y + 1) * BLOCK_SIZE)
                         )
+        start = tracer.end('draw.preview', start)
                         
         # 绘制消除动画
+        glow = self.quality.tier.glow
         for animation in self.clear_animations:
-            animation.draw(self.screen)
+            animation.draw(self.screen, glow)
+        start = tracer.end('draw.clear_animations', start)
             
         # 绘制预览阴影
         self.draw_ghost_piece()
+        start = tracer.end('draw.ghost', start)
         
         # 绘制等级提升动画
         self.draw_level_up_animation()
+        start = tracer.end('draw.level_up', start)
         
+        self.draw_hud()
+        start = tracer.end('draw.hud', start)
+            
+        self.render_target.present()
+        tracer.end('display.flip', start)
+        
+    def _get_quality_text(self):
+        """右下角的画质档位提示，每个档位只渲染一次"""
+        name = self.quality.tier.name
+        text = self._quality_texts.get(name)
+        if text is None:
+            label = f'Quality: {name}' + (' (auto)' if self.quality.adaptive else '')
+            text = self._quality_texts[name] = pygame.font.Font(None, 20).render(label, True, GRAY)
+        return text
+        
+    def _get_hud_text(self, label, value):
+        """分数等 HUD 文本，数值不变时复用上一次渲染的结果"""
+        cached = self._hud_texts.get(label)
+        if cached is None or cached[0] != value:
+            cached = self._hud_texts[label] = (value, self.hud_font.render(f'{label}: {value}', True, WHITE))
+        return cached[1]
+        
+    def draw_hud(self):
+        """绘制分数、等级和状态遮罩"""
         # Draw score and level
-        font = pygame.font.Font(None, 36)
-        score_text = font.render(f'Score: {self.score}', True, WHITE)
-        level_text = font.render(f'Level: {self.level}', True, WHITE)
-        high_score_text = font.render(f'High Score: {self.high_score}', True, WHITE)
+        score_text = self._get_hud_text('Score', self.score)
+        level_text = self._get_hud_text('Level', self.level)
+        high_score_text = self._get_hud_text('High Score', self.high_score)
         
         self.screen.blit(score_text, [GRID_WIDTH * BLOCK_SIZE + BLOCK_SIZE, 200])
         self.screen.blit(level_text, [GRID_WIDTH * BLOCK_SIZE + BLOCK_SIZE, 240])
         self.screen.blit(high_score_text, [GRID_WIDTH * BLOCK_SIZE + BLOCK_SIZE, 280])
+        self.screen.blit(self._get_quality_text(), [GRID_WIDTH * BLOCK_SIZE + BLOCK_SIZE, SCREEN_HEIGHT - 30])
+        
+        # 性能剖析采集中 / 已保存的提示
+        if self.profile_status:
+            if self._profile_text is None or self._profile_text[0] != self.profile_status:
+                self._profile_text = (self.profile_status,
+                                      pygame.font.Font(None, 20).render(self.profile_status, True, WHITE))
+            self.screen.blit(self._profile_text[1], [GRID_WIDTH * BLOCK_SIZE + BLOCK_SIZE, SCREEN_HEIGHT - 50])
         
         # Draw game state messages
-        if self.state == GameState.PAUSED:
-            # 创建半透明的暂停背景
-            pause_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            pause_overlay.fill((0, 0, 0, 128))  # 半透明黑色
-            self.screen.blit(pause_overlay, (0, 0))
-            
-            # 绘制暂停文本
-            pause_font = pygame.font.Font(None, 72)
-            pause_text = pause_font.render('PAUSED', True, WHITE)
-            pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-            
-            # 绘制提示文本
-            hint_font = pygame.font.Font(None, 36)
-            hint_text = hint_font.render('Press ESC to continue', True, WHITE)
-            hint_rect = hint_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
-            self.screen.blit(pause_text, pause_rect)
-            self.screen.blit(hint_text, hint_rect)
-            
-        elif self.state == GameState.GAME_OVER:
-            # 创建半透明的游戏结束背景
-            game_over_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            game_over_overlay.fill((0, 0, 0, 128))  # 半透明黑色
-            self.screen.blit(game_over_overlay, (0, 0))
+        if self.state in (GameState.PAUSED, GameState.GAME_OVER):
+            self.screen.blit(self._get_state_overlay(self.state), (0, 0))
             
-            # 绘制游戏结束文本
-            game_over_font = pygame.font.Font(None, 72)
-            game_over_text = game_over_font.render('GAME OVER', True, WHITE)
-            game_over_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-            
-            # 绘制重新开始提示
-            restart_font = pygame.font.Font(None, 36)
-            restart_text = restart_font.render('Press SPACE to restart', True, WHITE)
-            restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
-            self.screen.blit(game_over_text, game_over_rect)
-            self.screen.blit(restart_text, restart_rect)
+            # 本局在排行榜中的名次
+            if self.state == GameState.GAME_OVER and self.last_rank:
+                if self._rank_text is None:
+                    self._rank_text = pygame.font.Font(None, 36).render(
+                        f'Rank #{self.last_rank} of {self.leaderboard.count()}', True, WHITE)
+                rank_rect = self._rank_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 90))
+                self.screen.blit(self._rank_text, rank_rect)
             
             # 播放游戏结束音效（仅播放一次）
-            if not hasattr(self, '_game_over_sound_played'):
+            if self.state == GameState.GAME_OVER and not hasattr(self, '_game_over_sound_played'):
                 self.play_sound('gameover')
                 self._game_over_sound_played = True
-            
-        pygame.display.flip()
         
     def move_piece(self, dx, dy):
         """移动方块"""
+        start = self.tracer.begin()
         self.piece_pos[1] += dx
         self.piece_pos[0] += dy
         
@@ -889,8 +1302,13 @@ class Tetris:
                 self.merge_piece()
                 self.play_sound('drop')
         else:
+            self.piece_moved()
+            self.latency.on_change()
+            if self.stream:
+                self.stream.on_move(self)
             if dx != 0:  # 水平移动时播放音效
                 self.play_sound('move')
+        self.tracer.end('move_piece', start)
 
     def rotate_piece(self):
         """旋转方块"""
@@ -910,6 +1328,10 @@ class Tetris:
             for offset in [1, -1, 2, -2]:  # 尝试不同的水平偏移
                 self.piece_pos[1] += offset
                 if not self.check_collision():
+                    self.piece_moved()
+                    self.latency.on_change()
+                    if self.stream:
+                        self.stream.on_rotate(self)
                     self.play_sound('rotate')
                     return
                 self.piece_pos[1] -= offset
@@ -917,136 +1339,386 @@ class Tetris:
             # 如果所有偏移都不行，恢复原始形状
             SHAPES[self.current_piece] = original_shape
         else:
+            self.piece_moved()
+            self.latency.on_change()
+            if self.stream:
+                self.stream.on_rotate(self)
             self.play_sound('rotate')
             
-    def handle_input(self):
-        """处理用户输入"""
-        for event in pygame.event.get():
+    def reset_game(self, seed=None):
+        """重置游戏状态，开始新的一局；指定 seed 时方块序列可以重现"""
+        self.seed = random.randrange(2 ** 31) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.pieces_placed = 0
+        self.game_start_time = pygame.time.get_ticks()
+        self.last_rank = None
+        self.grid = [EMPTY_ROW] * GRID_HEIGHT
+        self.board_hash = 0
+        self.score = 0
+        self.level = 1
+        self.lines_cleared = 0
+        self.state = GameState.PLAYING
+        self.paused_at = None
+        self.latency.on_change()
+        self.fall_time = pygame.time.get_ticks()  # 重置下落时间
+        self.fall_speed = round(self.gravity.ms_per_row(1))
+        self.clear_animations = []
+        self.current_piece = None  # 清除当前方块
+        self.next_piece = None     # 清除下一个方块
+        self.rewind.clear()
+        self.new_piece()           # 生成新方块
+        # 重置特效相关变量
+        self.combo_count = 0
+        self.last_clear_time = 0
+        self.rainbow_effect_start = 0
+        self.level_up_animation_start = 0
+        self.schedule_effects()
+        self.start_recording()
+        if self.stream:
+            self.stream.keyframe(self)
+            
+    def apply_gravity(self, rows=1):
+        """自动下落 rows 行（不超过到底的距离，中间的行一定是空的）"""
+        if self.recorder:
+            self.recorder.record(replay.GRAVITY, rows)
+        self.move_piece(0, rows)
+        
+    def piece_moved(self):
+        """方块成功移动或旋转：重置锁定计时，并重新计算下落和锁定"""
+        self.gravity.on_move(pygame.time.get_ticks())
+        self.wake_gravity()
+        
+    def wake_gravity(self):
+        """方块状态变了（生成、移动、继续游戏），在下一帧重新计算下落和锁定"""
+        self.timers.schedule('gravity', pygame.time.get_ticks(), self._gravity_timer)
+        
+    def _gravity_timer(self, now):
+        """自动下落和锁定延迟，执行后按下一次下落或锁定的时间重新登记"""
+        if self.state != GameState.PLAYING or not self.live_gravity:
+            return  # 暂停期间不登记，继续游戏时由 toggle_pause 唤醒
+        self.gravity.update(self, now)
+        if self.state == GameState.PLAYING and self.current_piece is not None:
+            delay = max(1, math.ceil(self.gravity.time_until_next(self, now)))
+            self.timers.schedule('gravity', now + delay, self._gravity_timer)
+        
+    def lock_piece(self):
+        """锁定延迟结束，把着地的方块固定到网格中"""
+        if self.recorder:
+            self.recorder.record(replay.LOCK)
+        self.merge_piece()
+        self.play_sound('drop')
+        
+    def drop_distance(self):
+        """当前方块还能下落的行数"""
+        if self.current_piece is None:
+            return 0
+        return drop_distance(self.grid, SHAPES[self.current_piece], *self.piece_pos)
+        
+    def reachable_placements(self):
+        """当前方块所有能到达的锁定位置及最短按键序列（见 movegen.py），
+        路径中的动作用 MOVEGEN_KEYS 换成按键后交给 handle_key"""
+        if self.current_piece is None:
+            return []
+        return movegen.reachable_placements(
+            self.grid, SHAPES[self.current_piece], *self.piece_pos, board_hash=self.board_hash,
+            instant_gravity=self.gravity.gravity(self.level) >= MAX_GRAVITY)
+        
+    def toggle_pause(self):
+        """在PLAYING和PAUSED状态之间切换"""
+        if self.state in [GameState.PLAYING, GameState.PAUSED]:
+            now = pygame.time.get_ticks()
+            if self.state == GameState.PLAYING:
+                self.state = GameState.PAUSED
+                self.paused_at = now
+            else:
+                self.state = GameState.PLAYING
+                # 暂停期间不计入下落和锁定时间
+                paused_at = self.paused_at if self.paused_at is not None else now
+                self.gravity.on_resume(self, now - paused_at)
+                self.paused_at = None
+                self.wake_gravity()
+            self.latency.on_change()
+            if self.stream:
+                self.stream.on_state(self)
+                
+    def shift_piece(self, columns):
+        """水平移动多列：一次求出能到达的最远位置，只移动和播放音效一次"""
+        step = 1 if columns > 0 else -1
+        reachable = 0
+        for offset in range(step, columns + step, step):
+            if self.check_collision(col_offset=offset):
+                break
+            reachable = offset
+        if reachable:
+            self.piece_pos[1] += reachable
+            self.piece_moved()
+            self.latency.on_change()
+            if self.stream:
+                self.stream.on_move(self)
+            self.play_sound('move')
+            
+    def hard_drop(self):
+        """直接落到底并锁定"""
+        self.piece_pos[0] += self.drop_distance()
+        self.merge_piece()
+        
+    def apply_gestures(self, touch_time=None):
+        """执行本帧识别出的触摸手势，touch_time 为本帧最后一个触摸事件的时间（延迟统计用）"""
+        for action, amount in self.gestures.update(pygame.time.get_ticks()):
+            # 长按等由计时触发的手势没有对应的触摸事件，从识别出的时刻开始计时
+            self.latency.begin('touch', action, latency.now_ms() if touch_time is None else touch_time)
+            self.apply_gesture(action, amount)
+            self.latency.end()
+            
+    def apply_gesture(self, action, amount):
+        """执行一个触摸手势动作"""
+        if self.recorder:
+            self.recorder.record(replay.GESTURE, action, amount)
+        if action == gestures.HOLD:
+            # 长按暂停/继续（移动端没有ESC键）
+            self.toggle_pause()
+        elif self.state == GameState.GAME_OVER:
+            if action == gestures.ROTATE:
+                self.reset_game()
+        elif self.state != GameState.PLAYING:
+            return
+        elif action == gestures.MOVE:
+            self.shift_piece(amount)
+        elif action == gestures.SOFT_DROP:
+            for _ in range(amount):
+                row = self.piece_pos[0]
+                self.move_piece(0, 1)
+                if self.piece_pos[0] <= row:
+                    break  # 已经触底锁定
+        elif action == gestures.ROTATE:
+            self.rotate_piece()
+        elif action == gestures.HARD_DROP:
+            self.hard_drop()
+                
+    def handle_key(self, key):
+        """处理一次按键"""
+        if self.recorder and key not in (pygame.K_F9, pygame.K_F10):
+            self.recorder.record(replay.KEY, key)
+            
+        # ESC键处理 - 在PLAYING和PAUSED状态之间切换
+        if key == pygame.K_ESCAPE:
+            self.toggle_pause()
+            return
+            
+        # F9 立即写出当前的时间线追踪
+        if key == pygame.K_F9 and self.tracer.enabled:
+            self.tracer.write()
+            return
+            
+        # F10 开始采集性能剖析，采集中再按一次提前结束
+        if key == pygame.K_F10:
+            self.toggle_profile()
+            return
+            
+        # 练习模式：Backspace 撤回一次落子（游戏结束后也可以撤回）
+        if key == pygame.K_BACKSPACE and self.rewind.enabled:
+            if self.state in (GameState.PLAYING, GameState.GAME_OVER):
+                self.rewind_pieces(1)
+            return
+            
+        # 游戏结束状态下只响应空格键
+        if self.state == GameState.GAME_OVER:
+            if key == pygame.K_SPACE:
+                self.reset_game()
+            return
+        
+        # 暂停状态下只响应ESC键继续游戏
+        if self.state == GameState.PAUSED:
+            return
+        
+        # 游戏进行状态下的按键处理
+        if self.state == GameState.PLAYING:
+            if key == pygame.K_LEFT:
+                self.move_piece(-1, 0)
+            elif key == pygame.K_RIGHT:
+                self.move_piece(1, 0)
+            elif key == pygame.K_UP:
+                self.rotate_piece()
+                self.play_sound('rotate')
+            elif key == pygame.K_DOWN:
+                self.move_piece(0, 1)
+            elif key == pygame.K_SPACE:
+                self.hard_drop()
+            elif key == pygame.K_h:  # 按H键切换预览阴影
+                self.show_ghost_piece = not self.show_ghost_piece
+                self.latency.on_change()
+
+    def handle_input(self, pending_events=()):
+        """处理用户输入，pending_events 为空闲等待时已经取出的事件"""
+        touch_time = None
+        for event in [*pending_events, *pygame.event.get()]:
             if event.type == pygame.QUIT:
+                self.autosave()
                 return False
                 
-            if event.type == pygame.KEYDOWN:
-                # ESC键处理 - 在PLAYING和PAUSED状态之间切换
-                if event.key == pygame.K_ESCAPE:
-                    if self.state in [GameState.PLAYING, GameState.PAUSED]:
-                        self.state = GameState.PAUSED if self.state == GameState.PLAYING else GameState.PLAYING
-                    return True
-                    
-                # 游戏结束状态下只响应空格键
-                if self.state == GameState.GAME_OVER:
-                    if event.key == pygame.K_SPACE:
-                        # 重置游戏状态
-                        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-                        self.score = 0
-                        self.level = 1
-                        self.lines_cleared = 0
-                        self.state = GameState.PLAYING
-                        self.fall_time = pygame.time.get_ticks()  # 重置下落时间
-                        self.fall_speed = 1000
-                        self.clear_animations = []
-                        self.current_piece = None  # 清除当前方块
-                        self.next_piece = None     # 清除下一个方块
-                        self.new_piece()           # 生成新方块
-                        # 重置特效相关变量
-                        self.combo_count = 0
-                        self.last_clear_time = 0
-                        self.rainbow_effect_start = 0
-                        self.level_up_animation_start = 0
-                    return True
+            # 移动端切到后台时可能被系统直接杀掉，先暂停并存档
+            if event.type == pygame.APP_WILLENTERBACKGROUND:
+                if self.state == GameState.PLAYING:
+                    self.toggle_pause()
+                self.autosave()
+                continue
                 
-                # 暂停状态下只响应ESC键继续游戏
-                if self.state == GameState.PAUSED:
-                    return True
+            if event.type == pygame.VIDEORESIZE:
+                self.render_target.resize(event.size)
+                self._last_frame_signature = None  # 强制重绘
+                continue
                 
-                # 游戏进行状态下的按键处理
-                if self.state == GameState.PLAYING:
-                    if event.key == pygame.K_LEFT:
-                        self.move_piece(-1, 0)
-                    elif event.key == pygame.K_RIGHT:
-                        self.move_piece(1, 0)
-                    elif event.key == pygame.K_UP:
-                        self.rotate_piece()
-                        self.play_sound('rotate')
-                    elif event.key == pygame.K_DOWN:
-                        self.move_piece(0, 1)
-                    elif event.key == pygame.K_SPACE:
-                        while not self.check_collision():
-                            self.piece_pos[0] += 1
-                        self.piece_pos[0] -= 1
-                        self.merge_piece()
-                    elif event.key == pygame.K_h:  # 按H键切换预览阴影
-                        self.show_ghost_piece = not self.show_ghost_piece
+            if event.type == pygame.KEYDOWN:
+                self.latency.begin('key', pygame.key.name(event.key), self.latency.event_time(event))
+                self.handle_key(event.key)
+                self.latency.end()
                 
-            # Touch controls (只在游戏进行状态下响应)
-            elif self.state == GameState.PLAYING:
-                if event.type == pygame.FINGERDOWN:
-                    self.touch_start = (event.x * SCREEN_WIDTH, event.y * SCREEN_HEIGHT)
-                    self.last_touch_move = self.touch_start
-                    
-                elif event.type == pygame.FINGERMOTION:
-                    if self.touch_start is None:
-                        continue
-                        
-                    current_pos = (event.x * SCREEN_WIDTH, event.y * SCREEN_HEIGHT)
-                    dx = current_pos[0] - self.last_touch_move[0]
-                    dy = current_pos[1] - self.last_touch_move[1]
-                    
-                    # Horizontal movement
-                    if abs(dx) > BLOCK_SIZE:
-                        self.move_piece(1 if dx > 0 else -1, 0)
-                        self.last_touch_move = current_pos
-                        
-                    # Vertical movement (soft drop)
-                    if dy > BLOCK_SIZE:
-                        self.move_piece(0, 1)
-                        self.last_touch_move = current_pos
-                        
-                elif event.type == pygame.FINGERUP:
-                    if self.touch_start is not None:
-                        end_pos = (event.x * SCREEN_WIDTH, event.y * SCREEN_HEIGHT)
-                        dx = end_pos[0] - self.touch_start[0]
-                        dy = end_pos[1] - self.touch_start[0]
-                        
-                        # Tap for rotation
-                        if abs(dx) < BLOCK_SIZE and abs(dy) < BLOCK_SIZE:
-                            self.rotate_piece()
-                            
-                        self.touch_start = None
-                        self.last_touch_move = None
-                    
+            # Touch controls：只记录位置，帧末统一识别手势
+            elif event.type in (pygame.FINGERDOWN, pygame.FINGERMOTION, pygame.FINGERUP):
+                self.gestures.feed(event, pygame.time.get_ticks())
+                touch_time = self.latency.event_time(event)
+                
+        self.apply_gestures(touch_time)
         return True
 
+    def has_active_animations(self):
+        """是否有随时间变化的特效正在播放"""
+        return bool(self.clear_animations or self.level_up_animation_start or
+                    self.rainbow_effect_start)
+        
+    def _frame_signature(self):
+        """影响画面内容的状态，签名不变且没有动画时无需重绘"""
+        shape = SHAPES[self.current_piece] if self.current_piece is not None else None
+        return (self.state, self.current_piece, self.next_piece, tuple(self.piece_pos),
+                id(shape), self.board_hash, self.score, self.high_score, self.show_ghost_piece, self.quality.index,
+                self.profile_status)
+        
+    def _idle_timeout(self, current_time):
+        """画面静止时最多可以等待多久：不超过下一个定时器（下落、锁定、特效结束）"""
+        return self.timers.time_until(current_time, IDLE_WAIT_TIMEOUT)
+        
+    async def wait_for_event(self, timeout):
+        """等待下一个事件，最多 timeout 毫秒；返回已取出的事件列表"""
+        if sys.platform == 'emscripten':
+            # 浏览器主线程不能阻塞，让出控制权并轮询事件队列
+            deadline = pygame.time.get_ticks() + timeout
+            while not pygame.event.peek() and pygame.time.get_ticks() < deadline:
+                await asyncio.sleep(IDLE_POLL_INTERVAL / 1000)
+            return []
+        event = pygame.event.wait(timeout)
+        await asyncio.sleep(0)
+        return [] if event.type == pygame.NOEVENT else [event]
+        
+    def tick(self, current_time):
+        """推进一帧的游戏逻辑（不含输入和绘制）"""
+        # 到期的定时器：方块自动下落（可能一次多行）和锁定延迟、连击超时、特效结束
+        self.timers.run_due(current_time)
+        
+        # 更新动画
+        start = self.tracer.begin()
+        self.update_animations()
+        self.tracer.end('update_animations', start)
+        
+        # 平时每帧预渲染一点下一级的升级文字，升级那一帧不再集中渲染
+        if not self.level_up_animation_start:
+            self.level_up_frames.prepare(self.level + 1)
+        
+        # 检查是否有新的最高分
+        if self.score > self.high_score:
+            self.high_score = self.score
+            self.save_high_score()
+        
+        # 发送本帧的观战数据
+        if self.stream:
+            self.stream.flush()
+            
+    def step_frame(self, pending_events=(), render=True):
+        """执行一帧：输入、游戏逻辑，画面有变化时绘制并按耗时调整画质。
+        返回 None 表示收到退出事件，否则返回是否绘制了画面（没有绘制时由调用方决定如何等待）；
+        render 为 False 时只推进游戏不绘制（压测用）"""
+        tracer = self.tracer
+        # 按需性能剖析：采集够帧数或时间后写出（未采集时只有这一次判断）
+        if self.profile_capture is not None and self.profile_capture.mark_frame():
+            self.finish_profile()
+        frame_start = time.perf_counter()
+        start = tracer.begin()
+        if not self.handle_input(pending_events):
+            return None
+        tracer.end('handle_input', start)
+        
+        current_time = pygame.time.get_ticks()
+        self.tick(current_time)
+        
+        # 画面静止（暂停、游戏结束或两次下落之间无输入）时不重绘
+        signature = self._frame_signature()
+        if not render or (not self.has_active_animations() and signature == self._last_frame_signature):
+            return False
+        
+        # 绘制游戏画面
+        start = tracer.begin()
+        self.draw()
+        self.latency.on_present()
+        self._last_frame_signature = signature
+        tracer.end('draw', start)
+        
+        # 按本帧实际工作耗时（不含等待）调整画质
+        self.quality.record((time.perf_counter() - frame_start) * 1000)
+        
+        if tracer.enabled:
+            tracer.counter('particles', sum(len(a.particles) for a in self.clear_animations))
+            tracer.counter('surface_allocations', tracing.CountingSurface.created)
+            tracer.counter('quality_tier', self.quality.index)
+        return True
+        
     async def run(self):
+        tracer = self.tracer
+        pending_events = []
+        capture = profiling.capture_from_env(start=True)
+        if capture:
+            self.start_profile(capture)
         while True:
-            if not self.handle_input():
+            drawn = self.step_frame(pending_events)
+            pending_events = []
+            if drawn is None:
                 break
-                
-            current_time = pygame.time.get_ticks()
-            
-            # 更新游戏状态
-            if self.state == GameState.PLAYING:
-                # 方块自动下落
-                if current_time - self.fall_time > self.fall_speed:
-                    self.move_piece(0, 1)
-                    self.fall_time = current_time
             
-            # 更新动画
-            self.update_animations()
-            
-            # 绘制游戏画面
-            self.draw()
-            
-            # 检查是否有新的最高分
-            if self.score > self.high_score:
-                self.high_score = self.score
-                self.save_high_score()
+            # 画面静止时阻塞等待输入或下一个定时器（下落、锁定、特效结束），而不是以 60 FPS 空转
+            if not drawn:
+                start = tracer.begin()
+                pending_events = await self.wait_for_event(self._idle_timeout(pygame.time.get_ticks()))
+                tracer.end('idle_wait', start)
+                continue
             
             # 维持帧率
+            start = tracer.begin()
             self.clock.tick(60)
+            tracer.end('clock.tick', start)
+            self.alloc_profiler.mark_frame()
             await asyncio.sleep(0)
             
+        if self.profile_capture is not None:
+            self.finish_profile()
+        if tracer.enabled:
+            tracer.write()
+        if self.alloc_profiler.enabled:
+            self.alloc_profiler.write()
+        if self.latency.enabled and self.latency.write_on_exit:
+            self.latency.write()
         pygame.quit()
 
 # Create and run game
-game = Tetris()
-asyncio.run(game.run())
+if __name__ == '__main__':
+    stream = None
+    if os.environ.get('TETRIS_STREAM_FILE'):
+        from spectator import StateStreamWriter
+        stream_file = open(os.environ['TETRIS_STREAM_FILE'], 'wb', buffering=0)
+        stream = StateStreamWriter(SHAPES, sink=stream_file.write)
+    leaderboard = open_leaderboard() if open_leaderboard else None
+    game = Tetris(stream=stream, leaderboard=leaderboard)
+    game.autosave_path = AUTOSAVE_FILE
+    game.replay_dir = os.environ.get('TETRIS_REPLAY_DIR')
+    game.start_recording()
+    game.resume_autosave()
+    asyncio.run(game.run())
+    if leaderboard:
+        leaderboard.close()
@@ -0,0 +1,95 @@
+import numpy as np
+import pygame
+
+# 方块材质烘焙：用 NumPy 生成带倒角的法线贴图，逐像素计算漫反射、
+# Blinn-Phong 高光和 Schlick 菲涅尔，结果烘焙成 Surface 缓存起来。
+# 所有颜色在加载时烘焙，绘制时直接 blit，运行时没有任何光照计算。
+
+BEVEL_WIDTH = 0.2       # 倒角宽度（占方块边长的比例）
+BEVEL_DEPTH = 0.6       # 倒角斜面的陡峭程度，越大边缘越亮/越暗
+AMBIENT = 0.35          # 环境光
+ENVIRONMENT = 0.3       # 均匀环境反射的强度（金属主要靠反射显色）
+
+
+def bevel_normals(size, bevel_width=BEVEL_WIDTH, depth=BEVEL_DEPTH):
+    """生成 (size, size, 3) 的单位法线贴图，按 surfarray 的 [x, y] 排列"""
+    coords = np.arange(size) + 0.5
+    x = coords[:, None]
+    y = coords[None, :]
+    # 到最近边缘的距离，倒角范围内用 smoothstep 形成圆润的斜面
+    edge = np.minimum(np.minimum(x, size - x), np.minimum(y, size - y))
+    bevel = max(2.0, size * bevel_width)
+    t = np.clip(edge / bevel, 0.0, 1.0)
+    height = t * t * (3 - 2 * t) * bevel * depth
+    gx, gy = np.gradient(height)
+    normals = np.dstack((-gx, -gy, np.ones_like(height)))
+    return normals / np.linalg.norm(normals, axis=2, keepdims=True)
+
+
+class MaterialBaker:
+    """按颜色烘焙金属方块，base_texture 的明暗和透明度作为细节层"""
+
+    def __init__(self, size, light_dir, shine, roughness, base_texture=None, colors=()):
+        self.size = size
+        self.shine = shine
+        # 由粗糙度换算 Blinn-Phong 的高光指数
+        self.exponent = max(1.0, 2.0 / (roughness * roughness) - 2.0)
+
+        normals = bevel_normals(size)
+        light = np.array(light_dir, dtype=float)
+        light /= np.linalg.norm(light)
+        view = np.array([0.0, 0.0, 1.0])  # 正交视角，观察方向恒定
+        half = light + view
+        half /= np.linalg.norm(half)
+        # 与颜色无关的光照项只算一次
+        self._diffuse = np.clip(normals @ light, 0.0, 1.0)[..., None]
+        self._specular = (np.clip(normals @ half, 0.0, 1.0) ** self.exponent * shine)[..., None]
+        self._fresnel = ((1.0 - np.clip(normals @ view, 0.0, 1.0)) ** 5)[..., None]
+
+        if base_texture is not None:
+            self._detail = pygame.surfarray.array3d(base_texture) / 255.0
+            self._alpha = pygame.surfarray.array_alpha(base_texture)
+        else:
+            self._detail = np.ones((size, size, 3))
+            self._alpha = np.full((size, size), 255, dtype=np.uint8)
+
+        self._baked = {}
+        for color in colors:
+            color = tuple(color[:3])
+            if color not in self._baked:
+                self._baked[color] = self.bake(color)
+        self._palette = np.array(list(self._baked), dtype=int).reshape(-1, 3)
+
+    def bake(self, color):
+        """逐像素计算光照并生成方块 Surface"""
+        albedo = np.asarray(color[:3], dtype=float) / 255.0
+        # 金属的反射带有自身颜色：F0 取基础色，掠射角趋向白色
+        fresnel = albedo + (1.0 - albedo) * self._fresnel
+        shaded = (albedo * (AMBIENT + (1.0 - AMBIENT) * self._diffuse)
+                  + (self._specular + ENVIRONMENT) * fresnel)
+        rgb = np.clip(shaded * self._detail * 255.0, 0, 255).astype(np.uint8)
+
+        surface = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
+        pixels = pygame.surfarray.pixels3d(surface)
+        pixels[...] = rgb
+        del pixels
+        alpha = pygame.surfarray.pixels_alpha(surface)
+        alpha[...] = self._alpha
+        del alpha
+        return surface
+
+    def key(self, color):
+        """缓存键：已烘焙的颜色原样返回，其他颜色取最接近的已烘焙颜色"""
+        color = tuple(color[:3])
+        if color in self._baked:
+            return color
+        distance = ((self._palette - color) ** 2).sum(axis=1)
+        return tuple(int(c) for c in self._palette[distance.argmin()])
+
+    def items(self):
+        """全部烘焙结果 (颜色, Surface)，供纹理渲染后端一次性上传"""
+        return self._baked.items()
+
+    def get(self, color):
+        """返回该颜色的烘焙结果，运行时从不烘焙"""
+        return self._baked[self.key(color)]
@@ -0,0 +1,122 @@
+from collections import deque, namedtuple
+
+# 可达落点生成：从方块当前的位置和形状出发，按游戏自己的规则（左右移动、软降、
+# 旋转及 main.Tetris.rotate_piece 的 ±1/±2 水平踢墙）对 (形状, 行, 列) 做广度优先搜索，
+# 得到所有能够锁定的位置以及到达它们的最短按键序列（最后一步总是硬降）。
+# 软降后平移塞进悬空下方、在悬空下旋转等落点都会被找到。
+# 网格按每行的占用位掩码处理，一次碰撞检测只需几次位与；
+# 结果按（网格, 形状, 位置, 重力模式）缓存，同一局面重复调用时直接返回。
+
+LEFT = 'left'
+RIGHT = 'right'
+ROTATE = 'rotate'
+SOFT_DROP = 'soft_drop'
+HARD_DROP = 'hard_drop'
+
+KICKS = (1, -1, 2, -2)   # 与 main.Tetris.rotate_piece 相同：原位置放不下时依次尝试的水平偏移
+CACHE_SIZE = 256         # 缓存的局面数，满了整体清空（每个局面约 3 KiB）
+
+# shape: 落下时的形状；row, col: 锁定位置（形状左上角）；path: 最短按键序列
+Placement = namedtuple('Placement', ['shape', 'row', 'col', 'path'])
+
+_cache = {}
+
+
+def rotate(shape):
+    """顺时针旋转 90 度（与 main.Tetris.rotate_piece 相同）"""
+    return tuple(zip(*shape[::-1]))
+
+
+def _masks(grid):
+    return [sum(1 << c for c, cell in enumerate(row) if cell) for row in grid]
+
+
+def reachable_placements(grid, shape, row, col, board_hash=None, instant_gravity=False):
+    """方块从 (row, col) 出发能到达的所有不同的锁定位置，返回 [Placement]，按路径长度排列。
+    board_hash 为网格的 Zobrist 哈希（可选，给出时直接用作缓存键，不必扫描网格）；
+    instant_gravity 为 True 时按 20G 处理：生成后和每次操作后都立即落到底，软降不起作用"""
+    shape = tuple(map(tuple, shape))
+    board_key = board_hash if board_hash is not None else tuple(_masks(grid))
+    key = (board_key, len(grid), len(grid[0]), shape, row, col, instant_gravity)
+    result = _cache.get(key)
+    if result is None:
+        result = _search(_masks(grid), len(grid[0]), shape, row, col, instant_gravity)
+        if len(_cache) >= CACHE_SIZE:
+            _cache.clear()
+        _cache[key] = result
+    return result
+
+
+def _search(masks, width, shape, row, col, instant_gravity):
+    height = len(masks)
+
+    # 形状在各个旋转状态下每行的位掩码；旋转后形状相同的状态合并为同一个
+    shapes, bits = [], []
+    current = shape
+    for _ in range(4):
+        if current in shapes:
+            break
+        shapes.append(current)
+        bits.append([sum(1 << j for j, cell in enumerate(cells) if cell) for cells in current])
+        current = rotate(current)
+    next_orientation = [(k + 1) % len(shapes) for k in range(len(shapes))]
+    widths = [len(s[0]) for s in shapes]
+
+    def fits(k, r, c):
+        if c < 0 or c + widths[k] > width or r + len(bits[k]) > height:
+            return False
+        for i, b in enumerate(bits[k]):
+            if r + i >= 0 and masks[r + i] & (b << c):
+                return False
+        return True
+
+    def land(k, r, c):
+        while fits(k, r + 1, c):
+            r += 1
+        return r
+
+    if not fits(0, row, col):
+        return []
+    if instant_gravity:
+        row = land(0, row, col)
+
+    # 广度优先：先到达的状态路径最短；记录每个状态的前驱和按键，最后回溯出路径
+    start = (0, row, col)
+    parents = {start: None}
+    queue = deque([start])
+    locks = {}   # 锁定位置 -> 第一个（路径最短的）到达它的状态
+    while queue:
+        state = queue.popleft()
+        k, r, c = state
+        landed = r if instant_gravity else land(k, r, c)
+        if (k, landed, c) not in locks:
+            locks[(k, landed, c)] = state
+
+        moves = []
+        if fits(k, r, c - 1):
+            moves.append((LEFT, (k, r, c - 1)))
+        if fits(k, r, c + 1):
+            moves.append((RIGHT, (k, r, c + 1)))
+        if not instant_gravity and landed != r:
+            moves.append((SOFT_DROP, (k, r + 1, c)))
+        k2 = next_orientation[k]
+        if k2 != k:
+            for offset in (0,) + KICKS:
+                if fits(k2, r, c + offset):
+                    moves.append((ROTATE, (k2, r, c + offset)))
+                    break
+        for action, target in moves:
+            if instant_gravity:
+                target = (target[0], land(*target), target[2])
+            if target not in parents:
+                parents[target] = (state, action)
+                queue.append(target)
+
+    result = []
+    for (k, r, c), state in locks.items():
+        path = [HARD_DROP]
+        while parents[state] is not None:
+            state, action = parents[state]
+            path.append(action)
+        result.append(Placement(shapes[k], r, c, tuple(reversed(path))))
+    return result
@@ -0,0 +1,216 @@
+import cProfile
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# 按需采集性能剖析：游戏中按 F10（或用环境变量在启动时）开始，采集接下来的 N 帧或 N 秒，
+# 结束后以时间戳（精确到毫秒）命名写出两个文件，同名文件已存在时加序号，不会覆盖：
+#   profile-YYYYmmdd-HHMMSS-mmm.pstats     - 可用 python -m pstats / snakeviz 打开
+#   profile-YYYYmmdd-HHMMSS-mmm.collapsed  - 折叠栈文本，flamegraph.pl / speedscope 可直接生成火焰图
+# 两种方式：
+#   sample   - 后台线程每隔 SAMPLE_INTERVAL 秒读取一次主线程的调用栈，开销很小（默认）；
+#              .pstats 由采样结果换算，耗时是采样估计值
+#   cprofile - cProfile 精确统计每个函数（开销较大），同时采样生成折叠栈
+# 未采集时游戏只多一次 `is not None` 判断。
+#
+# 环境变量：
+#   TETRIS_PROFILE=600 / 10s    启动后立即采集 600 帧 / 10 秒（也是 F10 的采集长度）
+#   TETRIS_PROFILE_MODE=cprofile
+#   TETRIS_PROFILE_DIR=profiles 输出目录（默认当前目录）
+
+PROFILE_FRAMES = 300        # 未指定长度时采集的帧数
+SAMPLE_INTERVAL = 0.002     # 采样间隔（秒）
+MAX_STACK_DEPTH = 128
+PROFILE_MODES = ('sample', 'cprofile')
+
+
+def _frame_key(code):
+    """pstats 使用的函数键 (文件, 行号, 函数名)"""
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+def _frame_label(code):
+    """折叠栈中的函数名，不含分号和空格"""
+    name = f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+    return name.replace(';', ':').replace(' ', '_')
+
+
+class StackSampler:
+    """后台线程定时读取目标线程的调用栈，相同的栈只计数"""
+
+    def __init__(self, thread_id=None, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()   # (code, ...) 从外到内 -> 采样次数
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动采样线程；平台不支持线程（如网页版）时抛出 RuntimeError"""
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            codes = []
+            while frame is not None and len(codes) < MAX_STACK_DEPTH:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            self.stacks[tuple(reversed(codes))] += 1
+
+    def collapsed(self):
+        """折叠栈文本：每行 “外层;...;内层 采样次数”"""
+        lines = []
+        for codes, count in self.stacks.items():
+            lines.append(';'.join(_frame_label(code) for code in codes) + f' {count}')
+        return '\n'.join(sorted(lines)) + '\n'
+
+    def pstats_dict(self):
+        """把采样换算成 pstats 的统计字典：每次采样计 interval 秒"""
+        stats = {}
+        for codes, count in self.stacks.items():
+            seconds = count * self.interval
+            keys = [_frame_key(code) for code in codes]
+            seen = set()
+            for i, key in enumerate(keys):
+                entry = stats.setdefault(key, [0, 0, 0.0, 0.0, {}])
+                if key not in seen:  # 递归时每个栈只计一次累计时间
+                    seen.add(key)
+                    entry[0] += count
+                    entry[1] += count
+                    entry[3] += seconds
+                    if i:
+                        caller = entry[4].setdefault(keys[i - 1], [0, 0, 0.0, 0.0])
+                        caller[0] += count
+                        caller[1] += count
+                        caller[3] += seconds
+                if i == len(keys) - 1:
+                    entry[2] += seconds
+                    if i:
+                        entry[4].setdefault(keys[i - 1], [0, 0, 0.0, 0.0])[2] += seconds
+        return {key: (cc, nc, tt, ct, {caller: tuple(values) for caller, values in callers.items()})
+                for key, (cc, nc, tt, ct, callers) in stats.items()}
+
+
+class ProfileCapture:
+    """一次采集：start() 开始，每帧调用 mark_frame()，返回 True 时调用 finish() 写出结果"""
+
+    def __init__(self, mode='sample', frames=None, seconds=None, directory='.', interval=SAMPLE_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f'Unknown profile mode: {mode}')
+        if frames is None and seconds is None:
+            frames = PROFILE_FRAMES
+        self.mode = mode
+        self.frames = frames
+        self.seconds = seconds
+        self.directory = directory
+        now = time.time()
+        self.name = time.strftime('profile-%Y%m%d-%H%M%S', time.localtime(now)) + f'-{int(now * 1000) % 1000:03d}'
+        self.sampler = StackSampler(interval=interval)
+        self.profile = None
+        self.frame_count = 0
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        if self.mode == 'cprofile':
+            self.profile = cProfile.Profile()
+            try:
+                self.profile.enable()
+            except ValueError as e:  # 已经有另一个剖析器在运行
+                print(f"Warning: Could not start cProfile: {e}")
+                self.profile = None
+        try:
+            self.sampler.start()
+        except RuntimeError as e:
+            print(f"Warning: Stack sampling unavailable: {e}")
+            self.sampler = None
+        return self
+
+    def mark_frame(self):
+        """一帧结束，返回采集是否已经达到指定长度"""
+        self.frame_count += 1
+        if self.frames is not None and self.frame_count >= self.frames:
+            return True
+        return self.seconds is not None and time.perf_counter() - self._start >= self.seconds
+
+    @staticmethod
+    def _reserve(base):
+        """以独占方式创建 .pstats 文件占住名字，已存在时依次加 -1、-2 ...，返回不含扩展名的路径"""
+        candidate = base
+        for n in range(1, 1000):
+            try:
+                with open(candidate + '.pstats', 'x'):
+                    return candidate
+            except FileExistsError:
+                candidate = f'{base}-{n}'
+        raise OSError(f'Too many profiles named {base}')
+
+    def finish(self):
+        """停止采集并写出文件，返回写出的文件路径列表"""
+        elapsed = time.perf_counter() - self._start
+        if self.profile is not None:
+            self.profile.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+
+        paths = []
+        try:
+            if self.profile is not None or self.sampler is not None:
+                os.makedirs(self.directory, exist_ok=True)
+                base = self._reserve(os.path.join(self.directory, self.name))
+                self.name = os.path.basename(base)
+            if self.profile is not None:
+                self.profile.dump_stats(base + '.pstats')
+                paths.append(base + '.pstats')
+            elif self.sampler is not None:
+                with open(base + '.pstats', 'wb') as f:
+                    marshal.dump(self.sampler.pstats_dict(), f)
+                paths.append(base + '.pstats')
+            if self.sampler is not None:
+                with open(base + '.collapsed', 'w') as f:
+                    f.write(self.sampler.collapsed())
+                paths.append(base + '.collapsed')
+        except OSError as e:
+            print(f"Warning: Could not write profile: {e}")
+        print(f"Profile ({self.mode}, {self.frame_count} frames, {elapsed:.1f} s) written to "
+              f"{', '.join(paths) or 'nothing'}")
+        return paths
+
+
+def parse_duration(text):
+    """'600' -> (600 帧, None)，'10s' -> (None, 10.0 秒)；无效时返回 (None, None)"""
+    text = (text or '').strip().lower()
+    try:
+        if text.endswith('s'):
+            return None, float(text[:-1])
+        return int(text), None
+    except ValueError:
+        return None, None
+
+
+def capture_from_env(start=False):
+    """按环境变量创建一次采集；start 为 True 时只在设置了 TETRIS_PROFILE 时创建（否则返回 None）"""
+    setting = os.environ.get('TETRIS_PROFILE')
+    if start and not setting:
+        return None
+    frames, seconds = parse_duration(setting) if setting and setting != '1' else (None, None)
+    if setting and setting != '1' and frames is None and seconds is None:
+        print(f"Warning: Invalid TETRIS_PROFILE value {setting!r}, capturing {PROFILE_FRAMES} frames")
+    mode = os.environ.get('TETRIS_PROFILE_MODE', 'sample')
+    if mode not in PROFILE_MODES:
+        print(f"Warning: Unknown TETRIS_PROFILE_MODE {mode!r}, using sample")
+        mode = 'sample'
+    return ProfileCapture(mode, frames, seconds, os.environ.get('TETRIS_PROFILE_DIR', '.'))
@@ -0,0 +1,108 @@
+import json
+import os
+from collections import namedtuple
+
+# 自适应画质：统计每帧实际的工作耗时（不含 clock.tick 的等待），
+# 持续超出帧预算时逐级降低特效，持续有余量时再逐级恢复。
+# 降级和升级的阈值、观察窗口不同（迟滞），切换后还有一段冷却期，避免来回跳动。
+
+QualityTier = namedtuple('QualityTier', [
+    'name',
+    'particles',          # 每行消除动画的粒子数
+    'glow',               # 粒子发光层
+    'rainbow_blend',      # 彩虹特效与原色逐帧混合（关闭时直接使用彩虹色）
+    'ghost_dashes',       # 预览阴影的虚线边框（关闭时画实线）
+    'flash_waves',        # 消除闪光的次数
+    'background_detail',  # 背景上的网格线
+])
+
+# 从高到低排列
+DEFAULT_TIERS = (
+    QualityTier('high', 50, True, True, True, 3, True),
+    QualityTier('medium', 30, True, True, True, 2, True),
+    QualityTier('low', 15, False, False, False, 1, False),
+    QualityTier('minimal', 6, False, False, False, 1, False),
+)
+
+FRAME_BUDGET_MS = 1000 / 60
+EMA_ALPHA = 0.1          # 帧耗时指数滑动平均的权重
+DOWNGRADE_RATIO = 1.1    # 平均耗时超过预算的 110% 视为超标
+UPGRADE_RATIO = 0.5      # 平均耗时低于预算的 50% 视为有余量
+DOWNGRADE_FRAMES = 15    # 连续超标多少帧后降级
+UPGRADE_FRAMES = 300     # 连续有余量多少帧后升级（约 5 秒）
+COOLDOWN_FRAMES = 60     # 切换后的观察期，期间不再切换
+
+
+class QualityGovernor:
+    def __init__(self, tiers=DEFAULT_TIERS, budget_ms=FRAME_BUDGET_MS, fixed=None):
+        self.tiers = list(tiers)
+        self.budget_ms = budget_ms
+        self.adaptive = fixed is None
+        self.index = 0 if fixed is None else [t.name for t in self.tiers].index(fixed)
+        self.ema = None
+        self._over = 0
+        self._under = 0
+        self._cooldown = 0
+
+    @property
+    def tier(self):
+        return self.tiers[self.index]
+
+    def record(self, frame_ms):
+        """记录一帧的工作耗时（毫秒），画质档位改变时返回 True"""
+        if not self.adaptive:
+            return False
+        self.ema = frame_ms if self.ema is None else self.ema + EMA_ALPHA * (frame_ms - self.ema)
+        if self._cooldown:
+            self._cooldown -= 1
+            return False
+
+        if self.ema > self.budget_ms * DOWNGRADE_RATIO:
+            self._over += 1
+            self._under = 0
+        elif self.ema < self.budget_ms * UPGRADE_RATIO:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= DOWNGRADE_FRAMES and self.index < len(self.tiers) - 1:
+            return self._switch(self.index + 1)
+        if self._under >= UPGRADE_FRAMES and self.index > 0:
+            return self._switch(self.index - 1)
+        return False
+
+    def _switch(self, index):
+        self.index = index
+        self._over = self._under = 0
+        self._cooldown = COOLDOWN_FRAMES
+        self.ema = None  # 新档位的耗时重新统计
+        return True
+
+
+def load_tiers(path):
+    """从 JSON 文件读取档位列表（从高到低，每项包含 QualityTier 的全部字段）"""
+    with open(path, 'r') as f:
+        tiers = [QualityTier(**tier) for tier in json.load(f)]
+    if not tiers:
+        raise ValueError('no quality tiers defined')
+    return tiers
+
+
+def create_governor():
+    """根据环境变量创建画质控制器：
+    TETRIS_QUALITY 为 auto（默认）或固定的档位名，TETRIS_QUALITY_TIERS 为自定义档位文件"""
+    tiers = DEFAULT_TIERS
+    if os.environ.get('TETRIS_QUALITY_TIERS'):
+        try:
+            tiers = load_tiers(os.environ['TETRIS_QUALITY_TIERS'])
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Warning: Could not load quality tiers: {e}")
+    setting = os.environ.get('TETRIS_QUALITY', 'auto')
+    fixed = None
+    if setting != 'auto':
+        if setting in [tier.name for tier in tiers]:
+            fixed = setting
+        else:
+            print(f"Warning: Unknown quality tier {setting!r}, using auto")
+    return QualityGovernor(tiers, fixed=fixed)
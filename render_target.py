@@ -0,0 +1,116 @@
+import pygame
+
+# 逻辑分辨率渲染：游戏始终画在固定大小的离屏表面上，
+# 每帧只做一次缩放输出到真实窗口。
+
+# 缩放模式
+#   scaled    - 交给 SDL 的 pygame.SCALED（硬件缩放，自动留黑边）
+#   integer   - 只按整数倍缩放（最近邻），像素清晰
+#   letterbox - 保持宽高比平滑缩放，多余部分留黑边
+DISPLAY_MODES = ('scaled', 'integer', 'letterbox')
+
+MAX_LAYOUTS = 4  # 保留最近使用的窗口尺寸布局数（全屏/窗口来回切换时复用）
+
+# 已加载并缩放到目标尺寸的材质缓存 {(路径或资源名, 尺寸): Surface}
+_texture_cache = {}
+
+
+def load_texture(source, size):
+    """加载材质并缩放到逻辑尺寸，同一资源和尺寸只处理一次；source 为路径或资源包中的文件对象"""
+    name = getattr(source, 'name', source)
+    key = (name, tuple(size))
+    texture = _texture_cache.get(key)
+    if texture is None:
+        image = pygame.image.load(source) if isinstance(source, str) else pygame.image.load(source, name)
+        texture = pygame.transform.scale(image, size)
+        _texture_cache[key] = texture
+    return texture
+
+
+def fit_rect(logical_size, window_size, integer=False):
+    """计算保持宽高比时逻辑画面在窗口中的位置和大小"""
+    lw, lh = logical_size
+    ww, wh = window_size
+    scale = min(ww / lw, wh / lh)
+    if integer:
+        scale = max(1, int(scale))
+    w, h = int(lw * scale), int(lh * scale)
+    return pygame.Rect((ww - w) // 2, (wh - h) // 2, w, h)
+
+
+def window_to_logical(logical_size, window_size, rect, x, y):
+    """把归一化窗口坐标转换成逻辑分辨率下的坐标"""
+    lw, lh = logical_size
+    return ((x * window_size[0] - rect.x) * lw / rect.width,
+            (y * window_size[1] - rect.y) * lh / rect.height)
+
+
+class RenderTarget:
+    def __init__(self, logical_size, mode='scaled'):
+        if mode not in DISPLAY_MODES:
+            raise ValueError(f'Unknown display mode: {mode}')
+        self.logical_size = tuple(logical_size)
+        self.mode = mode
+        # 最近使用的窗口分辨率对应的 (目标矩形, 缩放缓冲区)，按使用顺序排列，超出上限时丢弃最久未用的
+        self._layouts = {}
+
+        if mode == 'scaled':
+            # SCALED 窗口的渲染器不能重复创建，已有同尺寸窗口时直接复用
+            existing = pygame.display.get_surface()
+            if existing is not None and existing.get_size() == self.logical_size:
+                self.display = existing
+            else:
+                self.display = pygame.display.set_mode(self.logical_size, pygame.SCALED | pygame.RESIZABLE)
+            self.surface = self.display
+        else:
+            self.display = pygame.display.set_mode(self.logical_size, pygame.RESIZABLE)
+            self.surface = pygame.Surface(self.logical_size).convert()
+        self._layout = None
+        self.resize(self.display.get_size())
+
+    def _compute_rect(self, window_size):
+        """计算逻辑画面在窗口中的位置和大小"""
+        return fit_rect(self.logical_size, window_size, integer=self.mode == 'integer')
+
+    def resize(self, window_size):
+        """窗口大小改变时调用（VIDEORESIZE / WINDOWSIZECHANGED）"""
+        window_size = tuple(window_size)
+        layout = self._layouts.pop(window_size, None)
+        if layout is None:
+            if len(self._layouts) >= MAX_LAYOUTS:
+                del self._layouts[next(iter(self._layouts))]
+            rect = self._compute_rect(window_size)
+            buffer = None
+            if self.mode != 'scaled' and rect.size != self.logical_size:
+                buffer = pygame.Surface(rect.size).convert()
+            layout = (rect, buffer)
+        self._layouts[window_size] = layout
+        self._layout = layout
+        self._window_size = window_size
+        if self.mode != 'scaled':
+            self.display = pygame.display.get_surface()
+            self.display.fill((0, 0, 0))  # 黑边只需要画一次
+
+    def to_logical(self, x, y):
+        """把触摸事件的归一化窗口坐标转换成逻辑分辨率下的坐标"""
+        if self.mode == 'scaled':
+            window_size = pygame.display.get_window_size()
+            rect = self._compute_rect(window_size)
+        else:
+            window_size = self._window_size
+            rect = self._layout[0]
+        return window_to_logical(self.logical_size, window_size, rect, x, y)
+
+    def present(self):
+        """一次性把逻辑画面缩放到窗口并翻转"""
+        if self.mode != 'scaled':
+            rect, buffer = self._layout
+            if buffer is None:
+                self.display.blit(self.surface, rect.topleft)
+            else:
+                if self.mode == 'integer':
+                    pygame.transform.scale(self.surface, rect.size, buffer)
+                else:
+                    pygame.transform.smoothscale(self.surface, rect.size, buffer)
+                self.display.blit(buffer, rect.topleft)
+        pygame.display.flip()
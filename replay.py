@@ -0,0 +1,62 @@
+import json
+import os
+import time
+
+import pygame
+
+# 对局录像：种子 + 开局时各方块的旋转状态 + 带时间戳的操作日志。方块序列由种子决定，
+# 自动下落也作为一条记录写入日志，回放时不依赖帧率就能得到完全相同的对局。
+
+REPLAY_VERSION = 1
+
+# 日志记录类型：[毫秒, 类型, 参数...]
+KEY = 'key'          # 参数：按键码
+GESTURE = 'gesture'  # 参数：手势动作, 数量
+GRAVITY = 'gravity'  # 参数：下落行数（旧录像没有参数，表示一行）
+LOCK = 'lock'        # 锁定延迟结束，方块固定
+
+
+class ReplayRecorder:
+    def __init__(self, seed, start_time, shapes):
+        self.seed = seed
+        self.start_time = start_time
+        # 旋转状态保存在全局 SHAPES 中并跨局保留，开局时的状态也是回放的输入
+        self.shapes = [[list(row) for row in shape] for shape in shapes]
+        self.entries = []
+
+    def record(self, kind, *args):
+        """记录一次操作，时间为距开局的毫秒数"""
+        self.entries.append([pygame.time.get_ticks() - self.start_time, kind, *args])
+
+    def save(self, directory, **info):
+        """写出录像文件，返回路径"""
+        os.makedirs(directory, exist_ok=True)
+        name = time.strftime('replay-%Y%m%d-%H%M%S') + f'-{self.seed}.json'
+        path = os.path.join(directory, name)
+        with open(path, 'w') as f:
+            json.dump({'version': REPLAY_VERSION, 'seed': self.seed, 'shapes': self.shapes,
+                       **info, 'entries': self.entries}, f, separators=(',', ':'))
+        return path
+
+
+def load_replay(path):
+    with open(path, 'r') as f:
+        replay = json.load(f)
+    if replay.get('version') != REPLAY_VERSION:
+        raise ValueError(f'Unsupported replay version: {replay.get("version")}')
+    return replay
+
+
+def apply_entry(game, entry):
+    """在对局上执行一条日志记录"""
+    kind = entry[1]
+    if kind == KEY:
+        game.handle_key(entry[2])
+    elif kind == GESTURE:
+        game.apply_gesture(entry[2], entry[3])
+    elif kind == GRAVITY:
+        game.apply_gravity(*entry[2:])
+    elif kind == LOCK:
+        game.lock_piece()
+    else:
+        raise ValueError(f'Unknown replay entry: {kind}')
@@ -0,0 +1,260 @@
+import argparse
+import multiprocessing
+import os
+import pickle
+import random
+import shutil
+import sys
+import tempfile
+
+# 必须在导入 pygame 之前设置：无窗口驱动，不打印欢迎信息（stdout 可能是视频数据），
+# 并且不让 SDL 把 SIGTERM 转成退出事件（否则进程池无法结束工作进程）
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+os.environ['SDL_NO_SIGNAL_HANDLERS'] = '1'
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+os.environ['TETRIS_RENDERER'] = 'surface'
+os.environ.pop('TETRIS_TRACE', None)
+
+import pygame
+
+import replay
+
+# 录像离线渲染：用 SDL dummy 视频驱动在无窗口环境中通过 Tetris.draw 逐帧渲染录像。
+# 先在主进程里只跑游戏逻辑，在每个固定长度的分段起点保存状态；
+# 各分段再交给进程池并行渲染，每个分段从自己的起点状态恢复。
+# 分段长度和随机种子都与进程数无关，所以任意进程数的输出逐字节相同。
+#
+#   python replay_video.py replays/replay-xxx.json -o frames/          # PNG 序列
+#   python replay_video.py replay.json -f gif -o game.gif --fps 20
+#   python replay_video.py replay.json -f raw -o - | ffmpeg -f rawvideo -pix_fmt rgb24 \
+#       -s 540x600 -r 60 -i - game.mp4
+
+FRAME_RATE = 60      # 模拟帧率，动画按帧更新，必须与游戏一致
+CHUNK_FRAMES = 240   # 每个分段的帧数
+TAIL_MS = 2000       # 最后一条记录之后继续渲染的时长（播完消除和结束画面）
+CLOCK_BASE = 1000    # 虚拟时钟起点，避免与表示“未开始”的 0 混淆
+OUTPUT_FORMATS = ('png', 'gif', 'raw')
+
+
+class VirtualClock:
+    """替换 pygame.time.get_ticks，由渲染器控制时间"""
+
+    def __init__(self):
+        self.now = CLOCK_BASE
+
+    def __call__(self):
+        return self.now
+
+
+_clock = VirtualClock()
+_main = None
+_game = None
+
+
+def _load_game_module():
+    """在无窗口驱动和虚拟时钟下导入游戏模块"""
+    global _main
+    if _main is None:
+        pygame.time.get_ticks = _clock
+        sys.stdout = sys.stderr  # 游戏的提示信息改写到 stderr，stdout 留给原始视频数据
+        import main
+        _main = main
+    return _main
+
+
+def _create_game(rec):
+    global _game
+    main = _load_game_module()
+    if _game is None:
+        _game = main.Tetris()
+        _game.save_high_score = lambda: None  # 渲染录像不改动本地最高分
+        _game.live_gravity = False  # 下落和锁定来自日志
+    _clock.now = CLOCK_BASE
+    main.SHAPES[:] = rec['shapes']
+    _game.reset_game(seed=rec['seed'])
+    _game.high_score = 0
+    return _game
+
+
+def _frame_time(frame):
+    return CLOCK_BASE + frame * 1000 // FRAME_RATE
+
+
+def _chunk_seed(seed, chunk):
+    return seed * 1000003 + chunk
+
+
+def _advance(game, entries, cursor, frame):
+    """执行到第 frame 帧为止的日志记录，再更新一帧动画"""
+    now = _frame_time(frame)
+    while cursor < len(entries) and CLOCK_BASE + entries[cursor][0] <= now:
+        _clock.now = CLOCK_BASE + entries[cursor][0]
+        replay.apply_entry(game, entries[cursor])
+        cursor += 1
+    _clock.now = now
+    game.timers.run_due(now)
+    game.update_animations()
+    if game.score > game.high_score:
+        game.high_score = game.score
+    return cursor
+
+
+def _capture(game, cursor):
+    """分段起点的完整状态：快照之外还包括所有方块的旋转状态、序列随机数和特效"""
+    return pickle.dumps({
+        'cursor': cursor,
+        'clock': _clock.now,
+        'snapshot': game.snapshot(),
+        'shapes': list(_main.SHAPES),
+        'rng': game.rng.getstate(),
+        'pieces_placed': game.pieces_placed,
+        'high_score': game.high_score,
+        'show_ghost_piece': game.show_ghost_piece,
+        'clear_animations': game.clear_animations,
+        'last_clear_time': game.last_clear_time,
+        'rainbow_effect_start': game.rainbow_effect_start,
+        'level_up_animation_start': game.level_up_animation_start,
+    })
+
+
+def _restore(game, data):
+    state = pickle.loads(data)
+    _clock.now = state['clock']
+    game.restore(state['snapshot'])
+    _main.SHAPES[:] = state['shapes']
+    game.rng.setstate(state['rng'])
+    for name in ('pieces_placed', 'high_score', 'show_ghost_piece', 'clear_animations',
+                 'last_clear_time', 'rainbow_effect_start', 'level_up_animation_start'):
+        setattr(game, name, state[name])
+    game.schedule_effects()
+    return state['cursor']
+
+
+def total_frames(rec):
+    entries = rec['entries']
+    duration = max(rec.get('duration_ms', 0), entries[-1][0] if entries else 0)
+    return (duration + TAIL_MS) * FRAME_RATE // 1000 + 1
+
+
+def plan_chunks(rec, chunk_frames=CHUNK_FRAMES):
+    """只跑游戏逻辑，返回每个分段的 (起始帧, 结束帧, 起点状态)"""
+    game = _create_game(rec)
+    entries = rec['entries']
+    frames = total_frames(rec)
+    chunks = []
+    cursor = 0
+    for frame in range(frames):
+        if frame % chunk_frames == 0:
+            chunks.append((frame, min(frame + chunk_frames, frames), _capture(game, cursor)))
+            random.seed(_chunk_seed(rec['seed'], len(chunks) - 1))
+        cursor = _advance(game, entries, cursor, frame)
+    return chunks
+
+
+def _render_chunk(task):
+    """渲染一个分段，PNG 直接写入输出目录，其他格式写成原始 RGB 临时文件"""
+    index, (first, last, state), rec, step, fmt, out = task
+    game = _create_game(rec)
+    cursor = _restore(game, state)
+    random.seed(_chunk_seed(rec['seed'], index))
+    # 粒子绘制也会消耗随机数，单独使用一份状态，保证逻辑部分与分段规划时一致
+    draw_state = random.Random(_chunk_seed(rec['seed'], index)).getstate()
+
+    raw_path = None if fmt == 'png' else os.path.join(out, f'chunk_{index:05d}.raw')
+    raw_file = open(raw_path, 'wb') if raw_path else None
+    try:
+        for frame in range(first, last):
+            cursor = _advance(game, rec['entries'], cursor, frame)
+            if frame % step:
+                continue
+            logic_state = random.getstate()
+            random.setstate(draw_state)
+            game.draw()
+            draw_state = random.getstate()
+            random.setstate(logic_state)
+            if raw_file:
+                raw_file.write(pygame.image.tostring(game.screen, 'RGB'))
+            else:
+                pygame.image.save(game.screen, os.path.join(out, f'frame_{frame // step:06d}.png'))
+    finally:
+        if raw_file:
+            raw_file.close()
+    return raw_path
+
+
+def render(rec, output, fmt='png', workers=None, fps=FRAME_RATE, chunk_frames=CHUNK_FRAMES):
+    """渲染录像，返回输出的帧数"""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f'Unknown output format: {fmt}')
+    if FRAME_RATE % fps:
+        raise ValueError(f'fps must divide {FRAME_RATE}')
+    step = FRAME_RATE // fps
+    chunks = plan_chunks(rec, chunk_frames)
+    size = _game.screen.get_size()
+
+    if fmt == 'png':
+        os.makedirs(output, exist_ok=True)
+        work_dir = output
+    else:
+        work_dir = tempfile.mkdtemp(prefix='tetris-replay-')
+    tasks = [(i, chunk, rec, step, fmt, work_dir) for i, chunk in enumerate(chunks)]
+
+    frames = 0
+    gif_frames = []
+    sink = None
+    if fmt == 'raw':
+        sink = sys.__stdout__.buffer if output == '-' else open(output, 'wb')
+    try:
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(workers or os.cpu_count()) as pool:
+            # imap 按分段顺序返回，前面的分段完成后即可输出
+            for raw_path in pool.imap(_render_chunk, tasks):
+                if raw_path is None:
+                    continue
+                with open(raw_path, 'rb') as f:
+                    data = f.read()
+                os.remove(raw_path)
+                if sink:
+                    sink.write(data)
+                else:
+                    from PIL import Image
+                    frame_size = size[0] * size[1] * 3
+                    for offset in range(0, len(data), frame_size):
+                        gif_frames.append(Image.frombytes('RGB', size, data[offset:offset + frame_size]))
+            pool.close()
+            pool.join()
+        frames = sum(len(range(first + (-first % step), last, step)) for first, last, _ in chunks)
+        if gif_frames:
+            gif_frames[0].save(output, save_all=True, append_images=gif_frames[1:],
+                               duration=1000 // fps, loop=0)
+    finally:
+        if sink and sink is not sys.__stdout__.buffer:
+            sink.close()
+        if work_dir != output:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render a Tetris replay to video frames')
+    parser.add_argument('replay', help='replay file recorded with TETRIS_REPLAY_DIR')
+    parser.add_argument('-o', '--output', required=True,
+                        help='output directory (png), file (gif/raw) or - for stdout (raw)')
+    parser.add_argument('-f', '--format', choices=OUTPUT_FORMATS, default='png')
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--fps', type=int, default=FRAME_RATE)
+    parser.add_argument('--chunk-frames', type=int, default=CHUNK_FRAMES)
+    args = parser.parse_args()
+    if args.format == 'gif':
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            parser.error('GIF output requires Pillow (pip install pillow)')
+    rec = replay.load_replay(args.replay)
+    frames = render(rec, args.output, args.format, args.workers, args.fps, args.chunk_frames)
+    print(f'Rendered {frames} frames (seed {rec["seed"]}) to {args.output}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
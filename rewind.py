@@ -0,0 +1,183 @@
+import os
+from collections import namedtuple
+
+from snapshot import GameSnapshot
+
+# 练习模式的撤回：每次落子只记录一条紧凑的增量（方块写入的格子、被消除的行、
+# 落子前的分数/等级/连击等），存放在预分配的环形缓冲区里，不复制整个网格。
+# 撤回时从当前网格倒着应用增量：删除被消除的行上方补入的空行、把消除的行插回原位、
+# 清掉方块写入的格子。每隔 CHECKPOINT_INTERVAL 次落子另存一个完整检查点（网格只是行引用），
+# 撤回很远时从检查点开始，需要倒推的增量不超过一个间隔。
+# 缓冲区和检查点数量都有上限，长时间游戏内存不会增长。
+# 撤回之后重新生成的方块按原来的顺序出现（排在队列中，先于随机数生成器）。
+#
+# 开启方式：TETRIS_PRACTICE=1（或保存的落子数），游戏中按 Backspace 撤回一次落子。
+
+REWIND_DEPTH = 600        # 环形缓冲区保存的落子数
+CHECKPOINT_INTERVAL = 50  # 每隔多少次落子保存一次完整检查点
+
+LockDelta = namedtuple('LockDelta', [
+    'piece',          # 方块编号
+    'shape',          # 方块生成时的形状（旋转状态）
+    'spawn_pos',      # 方块生成时的位置 (row, col)
+    'next_piece',     # 落子前的下一个方块
+    'cells',          # 方块写入的格子，row * 宽度 + col
+    'cleared',        # 被消除的行 ((行号, 行内容), ...)，行号从小到大
+    'score',          # 以下为落子前的值
+    'level',
+    'lines_cleared',
+    'combo_count',
+    'last_clear_time',
+    'pieces_placed',
+    'time',           # 落子时间（毫秒）
+])
+
+
+class NullRewind:
+    """未开启练习模式时使用的空实现"""
+    enabled = False
+    used = False
+
+    def on_spawn(self, game):
+        pass
+
+    def record(self, game, cells, lines, now):
+        pass
+
+    def pop_queued(self):
+        return None
+
+    def clear(self):
+        pass
+
+
+class Rewind:
+    enabled = True
+
+    def __init__(self, shapes, depth=REWIND_DEPTH, interval=CHECKPOINT_INTERVAL):
+        self.shapes = shapes      # 游戏的 SHAPES 列表（旋转状态会延续到下一次出现）
+        self.depth = depth
+        self.interval = interval
+        self._deltas = [None] * depth
+        self.clear()
+
+    def clear(self):
+        """新的一局：丢弃所有记录"""
+        self._count = 0           # 已记录的落子数（撤回后减少）
+        self._oldest = 0          # 缓冲区中仍然有效的最早一次落子
+        self._checkpoints = {}    # 落子序号 -> (落子前的网格, 各方块的形状)
+        self._queue = []          # 撤回后待重新出现的方块，先进先出
+        self._spawn_shape = None
+        self._spawn_pos = None
+        self.used = False         # 本局是否撤回过（成绩不计入排行榜）
+
+    def available(self):
+        """当前可以撤回的落子数"""
+        return self._count - self._oldest
+
+    def on_spawn(self, game):
+        """新方块生成：记下它的初始形状和位置"""
+        if game.current_piece is not None:
+            self._spawn_shape = self.shapes[game.current_piece]
+            self._spawn_pos = tuple(game.piece_pos)
+
+    def pop_queued(self):
+        """撤回后按原顺序重新出现的方块，没有时返回 None"""
+        return self._queue.pop(0) if self._queue else None
+
+    def record(self, game, cells, lines, now):
+        """方块刚写入网格、消行之前调用；cells 为写入的 (row, col)，lines 为将被消除的行"""
+        width = len(game.grid[0])
+        k = self._count
+        if k % self.interval == 0:
+            grid = list(game.grid)
+            for r, c in cells:
+                row = list(grid[r])
+                row[c] = 0
+                grid[r] = tuple(row)
+            shapes = list(self.shapes)
+            shapes[game.current_piece] = self._spawn_shape
+            self._checkpoints[k] = (tuple(grid), tuple(shapes))
+        self._deltas[k % self.depth] = LockDelta(
+            game.current_piece, self._spawn_shape, self._spawn_pos, game.next_piece,
+            tuple(r * width + c for r, c in cells),
+            tuple((r, game.grid[r]) for r in sorted(lines)),
+            game.score, game.level, game.lines_cleared, game.combo_count, game.last_clear_time,
+            game.pieces_placed, now)
+        self._count = k + 1
+        if self._count - self._oldest > self.depth:
+            self._oldest = self._count - self.depth
+            self._checkpoints.pop(self._oldest - 1, None)
+
+    def pieces_since(self, ms, now):
+        """最近 ms 毫秒内的落子数，用于按时间撤回"""
+        pieces = 0
+        for k in range(self._count - 1, self._oldest - 1, -1):
+            if self._deltas[k % self.depth].time < now - ms:
+                break
+            pieces += 1
+        return pieces
+
+    def rewind(self, game, pieces, state, now):
+        """撤回最近 pieces 次落子，回到那个方块刚生成时；返回用于 game.restore 的快照，
+        没有可撤回的落子时返回 None。state 为恢复后的 GameState 值"""
+        pieces = min(pieces, self.available())
+        if pieces <= 0:
+            return None
+        target = self._count - pieces
+        deltas = [self._deltas[k % self.depth] for k in range(target, self._count)]
+
+        # 从 target 之后的第一个检查点开始（没有时从当前网格开始），倒推到 target
+        start = min((k for k in self._checkpoints if target <= k < self._count), default=None)
+        if start is None:
+            grid = list(game.grid)
+            if game.current_piece is not None:
+                self.shapes[game.current_piece] = self._spawn_shape
+            start = self._count
+        else:
+            checkpoint_grid, shapes = self._checkpoints[start]
+            grid = list(checkpoint_grid)
+            self.shapes[:] = shapes
+        width = len(grid[0])
+        for delta in reversed(deltas[:start - target]):
+            if delta.cleared:
+                grid = grid[len(delta.cleared):]
+                for r, row in delta.cleared:
+                    grid.insert(r, row)
+            for cell in delta.cells:
+                r, c = divmod(cell, width)
+                row = list(grid[r])
+                row[c] = 0
+                grid[r] = tuple(row)
+            self.shapes[delta.piece] = delta.shape
+
+        # 撤回的方块之后出现过的方块重新排队，保持原来的方块序列
+        self._queue[:0] = [delta.next_piece for delta in deltas[1:]] + [game.next_piece]
+        for k in [k for k in self._checkpoints if k > target]:
+            del self._checkpoints[k]
+        self._count = target
+        self.used = True
+
+        first = deltas[0]
+        self._spawn_shape = first.shape
+        self._spawn_pos = first.spawn_pos
+        game.pieces_placed = first.pieces_placed
+        return GameSnapshot(
+            grid=tuple(grid), current_piece=first.piece, next_piece=first.next_piece,
+            piece_pos=first.spawn_pos, shape=first.shape, score=first.score, level=first.level,
+            lines_cleared=first.lines_cleared, state=state,
+            fall_speed=round(game.gravity.ms_per_row(first.level)), fall_elapsed=0,
+            combo_count=first.combo_count, combo_elapsed=max(0, now - first.last_clear_time))
+
+
+def create_rewind(shapes):
+    """根据环境变量 TETRIS_PRACTICE 创建撤回记录（值为 1 或保存的落子数）"""
+    setting = os.environ.get('TETRIS_PRACTICE')
+    if not setting or setting == '0':
+        return NullRewind()
+    try:
+        depth = REWIND_DEPTH if setting == '1' else max(1, int(setting))
+    except ValueError:
+        print(f"Warning: Invalid TETRIS_PRACTICE value {setting!r}, using {REWIND_DEPTH}")
+        depth = REWIND_DEPTH
+    return Rewind(shapes, depth)
@@ -0,0 +1,75 @@
+import heapq
+
+# 定时器调度：自动下落、锁定延迟、连击超时和各种特效的结束时间都登记为带名字的截止时间和回调，
+# 游戏循环每帧只需要看一眼堆顶，有到期的定时器时才执行；空闲等待时也可以直接算出能睡多久。
+# 同名定时器重新登记时替换原来的截止时间（旧的堆项留在堆里，取出时跳过），
+# 所以频繁推迟的定时器（如每次移动后的下落）不需要先取消。
+
+
+class Scheduler:
+    def __init__(self):
+        self._heap = []      # [截止时间, 序号, 名字, 回调]
+        self._timers = {}    # 名字 -> 当前有效的堆项
+        self._seq = 0
+
+    def schedule(self, name, deadline, callback):
+        """登记定时器，到期后调用 callback(now)；同名定时器被替换"""
+        entry = [deadline, self._seq, name, callback]
+        self._seq += 1
+        self._timers[name] = entry
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 64 and len(self._heap) > 4 * len(self._timers):
+            self._compact()
+
+    def cancel(self, name):
+        self._timers.pop(name, None)
+
+    def clear(self):
+        self._heap = []
+        self._timers = {}
+
+    def deadline(self, name):
+        """定时器的截止时间，没有登记时返回 None"""
+        entry = self._timers.get(name)
+        return entry[0] if entry else None
+
+    def next_deadline(self):
+        """最早的截止时间，没有定时器时返回 None"""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def time_until(self, now, limit):
+        """距离下一个定时器到期的毫秒数（1 到 limit 之间），用于空闲等待"""
+        deadline = self.next_deadline()
+        if deadline is None:
+            return limit
+        return max(1, min(limit, int(deadline - now)))
+
+    def run_due(self, now):
+        """执行所有已到期的定时器，返回执行的个数；回调中新登记的定时器留到下一次"""
+        limit = self._seq
+        deferred = []
+        ran = 0
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            entry = heapq.heappop(self._heap)
+            if entry[1] >= limit:
+                deferred.append(entry)
+                continue
+            del self._timers[entry[2]]
+            entry[3](now)
+            ran += 1
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+        return ran
+
+    def _discard_stale(self):
+        heap = self._heap
+        while heap and self._timers.get(heap[0][2]) is not heap[0]:
+            heapq.heappop(heap)
+
+    def _compact(self):
+        self._heap = list(self._timers.values())
+        heapq.heapify(self._heap)
@@ -0,0 +1,140 @@
+import os
+import struct
+from collections import namedtuple
+
+# 游戏状态快照：网格的每一行都是不可变的 tuple，快照只复制 20 个行引用，
+# 没有变化的行在快照之间共享；另有紧凑的二进制格式用于挂起恢复和自动存档。
+
+GameSnapshot = namedtuple('GameSnapshot', [
+    'grid',           # tuple[tuple[int]]，与对局共享未修改的行
+    'current_piece',  # 当前方块编号，None 表示没有
+    'next_piece',
+    'piece_pos',      # (row, col)
+    'shape',          # 当前方块的形状（旋转状态），tuple[tuple[int]]
+    'score',
+    'level',
+    'lines_cleared',
+    'state',          # GameState 的值
+    'fall_speed',
+    'fall_elapsed',   # 距上次自动下落经过的毫秒数
+    'combo_count',
+    'combo_elapsed',  # 距上次消除经过的毫秒数
+])
+
+SNAPSHOT_MAGIC = b'TSNP'
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct('<4sBBBBbbIBHBHII')
+_SHAPE = struct.Struct('<BBH')  # rows, cols, 位掩码
+SHAPE_PACKED_SIZE = _SHAPE.size
+
+NO_PIECE = 0xFF
+
+
+def pack_shape(shape):
+    """把最大 4x4 的方块形状压缩为 (rows, cols, mask)"""
+    mask = 0
+    cols = len(shape[0])
+    for i, row in enumerate(shape):
+        for j, cell in enumerate(row):
+            if cell:
+                mask |= 1 << (i * 4 + j)
+    return _SHAPE.pack(len(shape), cols, mask)
+
+
+def unpack_shape(data, offset=0):
+    rows, cols, mask = _SHAPE.unpack_from(data, offset)
+    return tuple(tuple(1 if mask >> (i * 4 + j) & 1 else 0 for j in range(cols))
+                 for i in range(rows))
+
+
+def pack_grid(grid):
+    """每个格子用 4 位存储，20x10 的棋盘只需 100 字节"""
+    cells = [cell for row in grid for cell in row]
+    if len(cells) % 2:
+        cells.append(0)
+    return bytes((cells[i] << 4) | cells[i + 1] for i in range(0, len(cells), 2))
+
+
+def unpack_grid(data, offset, width, height):
+    cells = []
+    for byte in data[offset:offset + (width * height + 1) // 2]:
+        cells.append(byte >> 4)
+        cells.append(byte & 0x0F)
+    return [tuple(cells[y * width:(y + 1) * width]) for y in range(height)]
+
+
+def packed_grid_size(width, height):
+    return (width * height + 1) // 2
+
+
+def serialize(snapshot):
+    """把快照编码为紧凑的二进制数据"""
+    width = len(snapshot.grid[0])
+    height = len(snapshot.grid)
+    piece = NO_PIECE if snapshot.current_piece is None else snapshot.current_piece
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, snapshot.state, piece,
+                          snapshot.next_piece, *snapshot.piece_pos,
+                          snapshot.score, snapshot.level, snapshot.lines_cleared,
+                          snapshot.combo_count, snapshot.fall_speed,
+                          snapshot.fall_elapsed, snapshot.combo_elapsed)
+    shape = pack_shape(snapshot.shape) if snapshot.shape else _SHAPE.pack(0, 0, 0)
+    return header + bytes((width, height)) + shape + pack_grid(snapshot.grid)
+
+
+def deserialize(data):
+    """从二进制数据还原快照"""
+    (magic, version, state, piece, next_piece, row, col, score, level, lines,
+     combo_count, fall_speed, fall_elapsed, combo_elapsed) = _HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError('Not a game snapshot or unsupported version')
+    offset = _HEADER.size
+    width, height = data[offset], data[offset + 1]
+    offset += 2
+    shape = unpack_shape(data, offset) if data[offset] else None
+    offset += _SHAPE.size
+    grid = tuple(unpack_grid(data, offset, width, height))
+    return GameSnapshot(grid, None if piece == NO_PIECE else piece, next_piece,
+                        (row, col), shape, score, level, lines, state,
+                        fall_speed, fall_elapsed, combo_count, combo_elapsed)
+
+
+def save_snapshot(path, snapshot):
+    """原子地写入存档文件，写到一半崩溃也不会损坏旧存档"""
+    data = serialize(snapshot)  # 先编码，数值超出字段范围（struct.error）时不留下临时文件
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def validate(snapshot, states, piece_count, size):
+    """检查状态、方块编号和棋盘尺寸是否在游戏的取值范围内，不合法时抛出 ValueError"""
+    if snapshot.state not in states:
+        raise ValueError(f'Invalid game state {snapshot.state}')
+    pieces = (snapshot.next_piece,) if snapshot.current_piece is None else (snapshot.current_piece,
+                                                                           snapshot.next_piece)
+    if any(not 0 <= piece < piece_count for piece in pieces):
+        raise ValueError('Invalid piece index')
+    if snapshot.shape is not None and snapshot.current_piece is None:
+        raise ValueError('Shape without a current piece')
+    width, height = size
+    if len(snapshot.grid) != height or any(len(row) != width for row in snapshot.grid):
+        raise ValueError('Grid size does not match')
+    if any(cell > piece_count for row in snapshot.grid for cell in row):
+        raise ValueError('Invalid grid cell')
+
+
+def load_snapshot(path, states=None, piece_count=None, size=None):
+    """读取存档，文件不存在或已损坏时返回 None；给出 states 等取值范围时一并校验"""
+    try:
+        with open(path, 'rb') as f:
+            snapshot = deserialize(f.read())
+        if states is not None:
+            validate(snapshot, states, piece_count, size)
+        return snapshot
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error, IndexError) as e:
+        print(f"Warning: Ignoring corrupt snapshot {path}: {e}")
+        return None
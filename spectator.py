@@ -0,0 +1,237 @@
+import random
+import struct
+import sys
+from snapshot import (pack_shape, unpack_shape, pack_grid, unpack_grid,
+                      packed_grid_size, SHAPE_PACKED_SIZE)
+
+# 观战数据流：把对局中的状态变化编码为紧凑的二进制记录，
+# 定期插入完整的关键帧，观战端据此重建棋盘并用 Tetris.draw 渲染。
+
+# 记录类型
+REC_KEYFRAME = 0
+REC_SPAWN = 1
+REC_MOVE = 2
+REC_ROTATE = 3
+REC_LOCK = 4
+REC_CLEAR = 5
+REC_SCORE = 6
+REC_STATE = 7
+
+KEYFRAME_INTERVAL = 256  # 每隔多少条记录插入一个关键帧
+
+_POS = struct.Struct('<bb')            # row, col
+_SPAWN = struct.Struct('<BB')          # piece, next_piece
+_SCORE = struct.Struct('<iBH')         # 分数增量, level, lines_cleared
+_KEYFRAME = struct.Struct('<IIBHBBB')  # seq, score, level, lines, state, piece, next
+
+
+class StateStreamWriter:
+    """对局端：记录状态变化并输出二进制增量流"""
+
+    def __init__(self, shapes, sink=None, keyframe_interval=KEYFRAME_INTERVAL):
+        self.shapes = shapes  # 对局使用的 SHAPES 列表（旋转会原地修改它）
+        self.sink = sink  # 可选的输出回调，例如 file.write
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0  # 下一条记录的序号，也就是游标
+        self._since_keyframe = []  # 最近一个关键帧及其后的记录 [(seq, bytes)]
+        self._pending = []  # 尚未 flush 的记录
+
+    def _append(self, record):
+        self._since_keyframe.append((self.seq, record))
+        self._pending.append(record)
+        self.seq += 1
+
+    def _piece_fields(self, game):
+        return (_POS.pack(*game.piece_pos) +
+                pack_shape(self.shapes[game.current_piece]))
+
+    def keyframe(self, game):
+        """写入完整的关键帧，之前的记录不再需要保留"""
+        self._since_keyframe = []
+        record = (bytes((REC_KEYFRAME,)) +
+                  _KEYFRAME.pack(self.seq, game.score, game.level,
+                                 game.lines_cleared, game.state.value,
+                                 game.current_piece, game.next_piece) +
+                  self._piece_fields(game) +
+                  pack_grid(game.grid))
+        self._append(record)
+
+    def on_spawn(self, game):
+        if not self._since_keyframe or len(self._since_keyframe) >= self.keyframe_interval:
+            self.keyframe(game)
+            return
+        self._append(bytes((REC_SPAWN,)) +
+                     _SPAWN.pack(game.current_piece, game.next_piece) +
+                     self._piece_fields(game))
+
+    def on_move(self, game):
+        self._append(bytes((REC_MOVE,)) + _POS.pack(*game.piece_pos))
+
+    def on_rotate(self, game):
+        self._append(bytes((REC_ROTATE,)) + self._piece_fields(game))
+
+    def on_lock(self, color, cells, width):
+        """cells 为合并进网格的 (row, col) 列表"""
+        self._append(bytes((REC_LOCK, color, len(cells))) +
+                     bytes(row * width + col for row, col in cells))
+
+    def on_clear(self, lines):
+        self._append(bytes((REC_CLEAR, len(lines))) + bytes(lines))
+
+    def on_score(self, game, score_delta):
+        self._append(bytes((REC_SCORE,)) +
+                     _SCORE.pack(score_delta, game.level, game.lines_cleared))
+
+    def on_state(self, game):
+        self._append(bytes((REC_STATE, game.state.value)))
+
+    def flush(self):
+        """取出自上次 flush 以来的新数据，并写入 sink"""
+        if not self._pending:
+            return b''
+        data = b''.join(self._pending)
+        self._pending = []
+        if self.sink:
+            self.sink(data)
+        return data
+
+    def catch_up(self, cursor=None):
+        """返回 (数据, 新游标)，让新加入或断线的观众追上进度
+
+        游标仍在当前关键帧之后时只发送缺失的增量，否则从关键帧开始发送。
+        """
+        if not self._since_keyframe:
+            return b'', self.seq
+        keyframe_seq = self._since_keyframe[0][0]
+        if cursor is None or cursor <= keyframe_seq or cursor > self.seq:
+            records = self._since_keyframe
+        else:
+            records = self._since_keyframe[cursor - keyframe_seq:]
+        return b''.join(record for _, record in records), self.seq
+
+
+class StateStreamReader:
+    """观战端：解析增量流并应用到一个 Tetris 实例上"""
+
+    def __init__(self, game):
+        self.game = game
+        self.seq = None  # 收到关键帧之前无法应用增量
+        self._buffer = b''
+
+    def feed(self, data):
+        """喂入任意切分的字节流，返回已应用的记录数"""
+        self._buffer += data
+        applied = 0
+        offset = 0
+        while offset < len(self._buffer):
+            end = self._record_end(offset)
+            if end is None or end > len(self._buffer):
+                break
+            self._apply(self._buffer, offset)
+            offset = end
+            applied += 1
+        self._buffer = self._buffer[offset:]
+        return applied
+
+    def _record_end(self, offset):
+        from main import GRID_WIDTH, GRID_HEIGHT
+        buf = self._buffer
+        kind = buf[offset]
+        if kind == REC_KEYFRAME:
+            return (offset + 1 + _KEYFRAME.size + _POS.size + SHAPE_PACKED_SIZE +
+                    packed_grid_size(GRID_WIDTH, GRID_HEIGHT))
+        if kind == REC_SPAWN:
+            return offset + 1 + _SPAWN.size + _POS.size + SHAPE_PACKED_SIZE
+        if kind == REC_MOVE:
+            return offset + 1 + _POS.size
+        if kind == REC_ROTATE:
+            return offset + 1 + _POS.size + SHAPE_PACKED_SIZE
+        if kind in (REC_LOCK, REC_CLEAR):
+            count_at = offset + (2 if kind == REC_LOCK else 1)
+            if count_at >= len(buf):
+                return None
+            return count_at + 1 + buf[count_at]
+        if kind == REC_SCORE:
+            return offset + 1 + _SCORE.size
+        if kind == REC_STATE:
+            return offset + 2
+        raise ValueError(f'Unknown stream record type: {kind}')
+
+    def _set_piece(self, data, offset):
+        from main import SHAPES
+        game = self.game
+        game.piece_pos = list(_POS.unpack_from(data, offset))
+        SHAPES[game.current_piece] = unpack_shape(data, offset + _POS.size)
+
+    def _apply(self, data, offset):
+        from main import GRID_WIDTH, GRID_HEIGHT, GameState, ClearAnimation, COLORS
+        game = self.game
+        kind = data[offset]
+        offset += 1
+
+        if kind == REC_KEYFRAME:
+            (self.seq, game.score, game.level, game.lines_cleared, state,
+             game.current_piece, game.next_piece) = _KEYFRAME.unpack_from(data, offset)
+            game.state = GameState(state)
+            offset += _KEYFRAME.size
+            self._set_piece(data, offset)
+            offset += _POS.size + SHAPE_PACKED_SIZE
+            game.grid = unpack_grid(data, offset, GRID_WIDTH, GRID_HEIGHT)
+            self.seq += 1
+            return
+        if self.seq is None:
+            return  # 等待第一个关键帧
+
+        if kind == REC_SPAWN:
+            game.current_piece, game.next_piece = _SPAWN.unpack_from(data, offset)
+            self._set_piece(data, offset + _SPAWN.size)
+        elif kind == REC_MOVE:
+            game.piece_pos = list(_POS.unpack_from(data, offset))
+        elif kind == REC_ROTATE:
+            self._set_piece(data, offset)
+        elif kind == REC_LOCK:
+            color, count = data[offset], data[offset + 1]
+            for cell in data[offset + 2:offset + 2 + count]:
+                row = list(game.grid[cell // GRID_WIDTH])
+                row[cell % GRID_WIDTH] = color
+                game.grid[cell // GRID_WIDTH] = tuple(row)
+        elif kind == REC_CLEAR:
+            lines = set(data[offset + 1:offset + 1 + data[offset]])
+            remaining = [row for i, row in enumerate(game.grid) if i not in lines]
+            game.grid = [(0,) * GRID_WIDTH for _ in lines] + remaining
+            for line in sorted(lines):
+                game.clear_animations.append(ClearAnimation(line, random.choice(COLORS)))
+        elif kind == REC_SCORE:
+            score_delta, game.level, game.lines_cleared = _SCORE.unpack_from(data, offset)
+            game.score += score_delta
+        elif kind == REC_STATE:
+            game.state = GameState(data[offset])
+        self.seq += 1
+
+
+async def spectate(path):
+    """跟随一个不断追加的流文件，用正常的绘制路径显示对局"""
+    import asyncio
+    import pygame
+    from main import Tetris
+
+    game = Tetris(view_only=True)  # 只借用绘制路径，不启用音效、定时器、撤回和调试统计
+    reader = StateStreamReader(game)
+    with open(path, 'rb') as f:
+        while True:
+            if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                break
+            reader.feed(f.read())
+            game.update_animations()
+            game.draw()
+            game.clock.tick(60)
+            await asyncio.sleep(0)
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    import asyncio
+    if len(sys.argv) != 2:
+        print('Usage: python spectator.py <stream file>')
+        sys.exit(1)
+    asyncio.run(spectate(sys.argv[1]))
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# 测试在无窗口环境下运行，并让测试可以直接导入仓库根目录下的模块
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('TETRIS_RENDERER', 'surface')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,28 @@
+import allocprofile
+
+FRAMES = 240
+WARMUP = 60
+
+
+def test_scripted_play_within_budget():
+    profiler = allocprofile.profile_scripted_play(frames=FRAMES, warmup=WARMUP)
+    assert allocprofile.check_budget(profiler.report()) == []
+
+
+def test_per_frame_churn_exceeds_budget(monkeypatch):
+    import main
+
+    tick = main.Tetris.tick
+
+    def churning_tick(self, *args, **kwargs):
+        # 每帧分配 2000 个临时列表，帧结束前全部释放（画面静止时不绘制，tick 每帧都会执行）
+        junk = [[] for _ in range(2000)]
+        del junk
+        return tick(self, *args, **kwargs)
+
+    monkeypatch.setattr(main.Tetris, 'tick', churning_tick)
+    profiler = allocprofile.profile_scripted_play(frames=FRAMES, warmup=WARMUP)
+    failures = allocprofile.check_budget(profiler.report())
+    assert any(failure.startswith('objects') for failure in failures)
+    assert any(failure.startswith('peak_bytes') for failure in failures)
+    assert any(failure.startswith('gc_collections') for failure in failures)
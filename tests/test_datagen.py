@@ -0,0 +1,29 @@
+import numpy as np
+
+import datagen
+import headless
+
+
+def test_recorded_rows_match_the_grid_diff():
+    records = datagen.play_game(0, 0, headless.heuristic_policy, max_pieces=120)
+    assert len(np.unique(records['row'])) > 3
+    width, height = headless.GRID_WIDTH, headless.GRID_HEIGHT
+    boards = np.unpackbits(records['grid'], axis=1)[:, :width * height].reshape(-1, height, width)
+    checked = 0
+    for k in range(len(records) - 1):
+        if records['lines_cleared'][k]:
+            continue  # 消行后网格整体下移，无法直接比较
+        rows, cols = np.nonzero(boards[k + 1] & ~boards[k])
+        # 新增的格子就是这次落下的方块：最上一行是落地行，最左一列是落子列
+        assert rows.min() == records['row'][k]
+        assert cols.min() == records['column'][k]
+        checked += 1
+    assert checked > 50
+
+
+def test_place_reports_landing_row():
+    game = headless.HeadlessGame(seed=3)
+    rotation, col, row = game.placements()[0]
+    game.place(rotation, col)
+    assert game.last_row == row > 0
+    assert game.piece_pos[0] == 0  # 已经换成了新方块
@@ -0,0 +1,42 @@
+import pygame
+import pytest
+
+from effects import LevelUpFrames
+
+
+@pytest.fixture(autouse=True)
+def fonts():
+    pygame.font.init()
+
+
+def test_prepare_renders_one_step_per_call():
+    frames = LevelUpFrames(frame_count=4)
+    steps = [frames.prepare(2) for _ in range(6)]
+    # 第一次渲染文字，之后每次一帧
+    assert steps == [False, False, False, False, True, True]
+
+
+def test_level_up_frame_uses_prepared_frames(monkeypatch):
+    frames = LevelUpFrames(frame_count=4)
+    while not frames.prepare(2):
+        pass
+
+    def fail(*args, **kwargs):
+        raise AssertionError('level-up frame should not render')
+
+    monkeypatch.setattr(pygame.transform, 'smoothscale', fail)
+    for progress in (0.0, 0.3, 0.6, 1.0):
+        assert frames.frame(2, progress) is not None
+
+
+def test_frame_without_prepare_renders_all():
+    frames = LevelUpFrames(frame_count=4)
+    small, large = frames.frame(5, 0.0), frames.frame(5, 0.5)
+    assert large.get_width() > small.get_width()
+
+
+def test_keeps_only_current_and_next_level():
+    frames = LevelUpFrames(frame_count=2)
+    for level in (2, 3, 4):
+        frames.frame(level, 0.5)
+    assert sorted(key[0] for key in frames._frames) == [3, 4]
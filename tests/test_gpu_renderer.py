@@ -0,0 +1,43 @@
+import pygame
+import pytest
+
+import gpu_renderer
+import main
+import tracing
+
+
+def _game(monkeypatch, renderer):
+    clock = [1000]
+    monkeypatch.setattr(pygame.time, 'get_ticks', lambda: clock[0])
+    monkeypatch.setattr(main, 'RENDERER', renderer)
+    game = main.Tetris()
+    game.save_high_score = lambda: None
+    game.reset_game(seed=1)
+    return game, clock
+
+
+def test_gpu_falls_back_and_draws(monkeypatch):
+    # dummy 驱动下没有加速渲染器时回退到 Surface 绘制，仍然能画出一帧
+    game, _ = _game(monkeypatch, 'gpu')
+    game.draw()
+
+
+def test_texture_path_uploads_once_and_traces(monkeypatch):
+    if gpu_renderer.Renderer is None:
+        pytest.skip('pygame._sdl2 unavailable')
+    game, clock = _game(monkeypatch, 'gpu-software')
+    if game.texture_renderer is None:
+        pytest.skip('SDL software renderer unavailable')
+    game.tracer = tracing.Tracer(capacity=4096)
+    game.grid[-1] = tuple(range(1, 8)) + (1, 2, 3)
+    game.rainbow_effect_start = clock[0]
+    game.draw()
+    uploads = []
+    monkeypatch.setattr(game.texture_renderer, '_texture', uploads.append)
+    for _ in range(main.RAINBOW_EFFECT_DURATION // 16):
+        clock[0] += 16
+        game.draw()
+    assert uploads == []  # 彩虹特效期间没有上传任何纹理
+
+    names = {event['name'] for event in game.tracer.events()}
+    assert {'gpu.upload_textures', 'gpu.board', 'gpu.present'} <= names
@@ -0,0 +1,109 @@
+import pytest
+
+from gravity import LOCK_DELAY_MS, MAX_GRAVITY, GravityEngine
+
+
+class FakeGame:
+    """只有重力引擎用到的属性：方块离地 distance 行"""
+
+    def __init__(self, distance, level=1, fall_time=0):
+        self.current_piece = 'T'
+        self.piece_pos = [0, 4]
+        self.distance = distance
+        self.level = level
+        self.fall_time = fall_time
+        self.locked_at = None
+        self.now = None
+
+    def drop_distance(self):
+        return self.distance
+
+    def apply_gravity(self, rows):
+        self.distance -= rows
+        self.piece_pos[0] += rows
+
+    def lock_piece(self):
+        self.locked_at = self.now
+        self.current_piece = None
+
+
+def run_until_locked(engine, game, start, end, step=1, moves=()):
+    for now in range(start, end, step):
+        game.now = now
+        if now in moves:
+            engine.on_move(now)
+        engine.update(game, now)
+        if game.locked_at is not None:
+            return game.locked_at
+    return None
+
+
+@pytest.mark.parametrize('level', [1, 19, 20, 21, 100, 114, 115, 116, 200, 1000])
+def test_competitive_gravity_high_levels(level):
+    g = GravityEngine('competitive').gravity(level)
+    assert 0 < g <= MAX_GRAVITY
+    assert GravityEngine('competitive').ms_per_row(level) > 0
+
+
+def test_competitive_gravity_reaches_max_and_stays():
+    engine = GravityEngine('competitive')
+    assert engine.gravity(20) == MAX_GRAVITY
+    assert all(engine.gravity(level) == MAX_GRAVITY for level in range(20, 2000, 37))
+
+
+@pytest.mark.parametrize('level', [1, 5, 10, 30])
+def test_classic_locks_at_next_gravity_step(level):
+    engine = GravityEngine('classic')
+    ms_per_row = engine.ms_per_row(level)
+    # 在上一次下落时刚好着地：与原来一样，到下一次下落时锁定
+    game = FakeGame(distance=0, level=level, fall_time=1000)
+    locked = run_until_locked(engine, game, 1001, 1000 + 3 * int(ms_per_row) + 600)
+    assert abs(locked - (1000 + ms_per_row)) <= 1
+
+
+def test_classic_moves_do_not_postpone_lock():
+    engine = GravityEngine('classic')
+    game = FakeGame(distance=0, level=10, fall_time=1000)
+    locked = run_until_locked(engine, game, 1001, 2000, moves=range(1010, 1100, 10))
+    assert locked == 1100
+
+
+def test_competitive_moves_reset_lock_delay():
+    engine = GravityEngine('competitive')
+    game = FakeGame(distance=0, level=1, fall_time=1000)
+    locked = run_until_locked(engine, game, 1000, 3000, moves={1200})
+    assert locked == 1200 + LOCK_DELAY_MS
+
+
+def test_resume_shifts_fall_and_lock_timers():
+    engine = GravityEngine('competitive')
+    game = FakeGame(distance=0, level=1, fall_time=1000)
+    engine.update(game, 1000)
+    engine.on_resume(game, 10000)
+    assert game.fall_time == 11000 and engine.lock_start == 11000
+    # 锁定计时从继续时起算
+    locked = run_until_locked(engine, game, 11000, 13000)
+    assert locked == 11000 + LOCK_DELAY_MS
+
+
+@pytest.mark.parametrize('curve', ['classic', 'competitive'])
+def test_pause_does_not_drop_the_paused_time(monkeypatch, curve):
+    import pygame
+    import main
+
+    clock = [1000]
+    monkeypatch.setattr(pygame.time, 'get_ticks', lambda: clock[0])
+    monkeypatch.setenv('TETRIS_GRAVITY', curve)
+    game = main.Tetris()
+    game.save_high_score = lambda: None
+    game.reset_game(seed=1)
+    game.tick(clock[0])
+    row = game.piece_pos[0]
+    game.toggle_pause()
+    for _ in range(600):  # 暂停 10 秒
+        clock[0] += 1000 // 60
+        game.tick(clock[0])
+    game.toggle_pause()
+    clock[0] += 1000 // 60
+    game.tick(clock[0])
+    assert game.piece_pos[0] - row <= 1
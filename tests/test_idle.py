@@ -0,0 +1,23 @@
+import pygame
+
+import main
+
+
+def test_hard_drop_without_clear_redraws(monkeypatch):
+    clock = [1000]
+    monkeypatch.setattr(pygame.time, 'get_ticks', lambda: clock[0])
+    game = main.Tetris()
+    game.save_high_score = lambda: None
+    game.reset_game(seed=1)
+    # 当前、下一个和之后的方块都相同：锁定后方块种类和生成位置都不变，只有棋盘变了
+    piece = game.current_piece
+    game.next_piece = piece
+    monkeypatch.setattr(game.rng, 'randint', lambda a, b: piece)
+    assert game.step_frame() is True
+    clock[0] += 16
+    assert game.step_frame() is False  # 画面没有变化
+
+    score, cells = game.score, sum(map(any, game.grid))
+    clock[0] += 16
+    assert game.step_frame([pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE)]) is True
+    assert game.score == score and sum(map(any, game.grid)) > cells
@@ -0,0 +1,35 @@
+import pytest
+
+import kernels
+
+try:
+    import _kernels
+except ImportError:
+    _kernels = None
+
+IMPLEMENTATIONS = [pytest.param(kernels.PYTHON_KERNELS['merge'], id='python'),
+                   pytest.param(getattr(_kernels, 'merge', None), id='compiled',
+                                marks=pytest.mark.skipif(_kernels is None, reason='_kernels is not built'))]
+
+
+@pytest.mark.skipif(_kernels is None, reason='_kernels is not built')
+def test_compiled_matches_python_on_random_boards():
+    assert kernels.check_parity(_kernels, cases=2000, seed=3) == []
+
+
+@pytest.mark.parametrize('merge', IMPLEMENTATIONS)
+@pytest.mark.parametrize('row, col', [(0, -1), (5, 9), (19, 4), (25, 0), (-1, -3), (0, 100)])
+def test_merge_rejects_out_of_bounds(merge, row, col):
+    board = bytearray(200)
+    shape, shape_width = kernels.shape_buffer(((1, 1), (1, 1)))
+    with pytest.raises(ValueError):
+        merge(board, 10, shape, shape_width, row, col, 7)
+    assert board == bytearray(200)
+
+
+@pytest.mark.parametrize('merge', IMPLEMENTATIONS)
+def test_merge_skips_rows_above_board(merge):
+    board = bytearray(200)
+    shape, shape_width = kernels.shape_buffer(((1, 1), (1, 1)))
+    assert merge(board, 10, shape, shape_width, -1, 8, 7) == 2
+    assert board[8:10] == b'\x07\x07' and board.count(7) == 2
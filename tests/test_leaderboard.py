@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+from leaderboard import Leaderboard
+
+
+@pytest.fixture(params=[True, False], ids=['thread', 'sync'])
+def board(request, tmp_path):
+    board = Leaderboard(str(tmp_path / 'leaderboard.db'), legacy_file=None, background=request.param)
+    yield board
+    board.close()
+
+
+def test_record_returns_rank(board):
+    assert board.record({'score': 100}) == 1
+    assert board.record({'score': 300}) == 1
+    assert board.record({'score': 200}) == 2
+    assert board.record({'score': 50}) == 4
+    assert board.count() == 4
+    assert board.high_score() == 300
+    assert board.rank(250) == 2
+
+
+def test_top_orders_and_filters(board):
+    for score, profile, day in ((10, 'a', 1), (30, 'b', 1), (20, 'a', 2), (40, 'a', 2)):
+        board.record({'score': score, 'profile': profile, 'played_at': 86400 * day + 43200})
+    assert [entry['score'] for entry in board.top(3)] == [40, 30, 20]
+    assert [entry['score'] for entry in board.top(profile='a')] == [40, 20, 10]
+    day = board.top(1)[0]['day']
+    assert [entry['score'] for entry in board.top(day=day)] == [40, 20]
+
+
+def test_sync_writes_each_record_immediately(tmp_path):
+    # 网页版没有后台线程：每局结束立即写入，不调用 close 也不会丢失
+    path = str(tmp_path / 'leaderboard.db')
+    board = Leaderboard(path, legacy_file=None, background=False)
+    board.record({'score': 120, 'lines': 3})
+    with sqlite3.connect(path) as conn:
+        assert conn.execute('SELECT score, lines FROM games').fetchall() == [(120, 3)]
+    board.close()
+
+
+def test_reopen_restores_ranks(tmp_path):
+    path = str(tmp_path / 'leaderboard.db')
+    board = Leaderboard(path, legacy_file=None)
+    for score in (5, 15, 10):
+        board.record({'score': score})
+    board.close()
+
+    board = Leaderboard(path, legacy_file=None)
+    assert board.count() == 3 and board.rank(12) == 2
+    board.close()
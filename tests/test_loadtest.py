@@ -0,0 +1,28 @@
+import pygame
+
+import latency
+import loadtest
+
+
+def test_session_step_runs_the_real_frame(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(pygame.time, 'get_ticks', lambda: int(clock[0]))
+    main = loadtest._load_game_module()
+    session = loadtest.Session(seed=1, shapes=[list(shape) for shape in main.SHAPES], render=True)
+    tracker = session.game.latency = latency.LatencyTracker(write_on_exit=False)
+    for _ in range(600):
+        clock[0] += 1000 / loadtest.FRAME_RATE
+        session.step()
+    assert session.keys_pressed > 0
+    # 按键经过 handle_input 的延迟统计，绘制后由 on_present 结束计时
+    assert tracker.sample_count > 0
+    # 画质控制器只在 step_frame 绘制之后记录耗时
+    assert session.game.quality.ema is not None
+    # 方块由定时器驱动下落
+    assert session.game.pieces_placed > 0 or session.games_played > 1
+
+
+def test_load_test_report():
+    report = loadtest.run_load_test(steps=(1, 2), seconds=0.3, budget_ms=1e9, log=lambda message: None)
+    assert [step['sessions'] for step in report['steps']] == [1, 2]
+    assert all(step['ticks'] > 0 for step in report['steps'])
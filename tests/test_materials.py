@@ -0,0 +1,29 @@
+import pygame
+
+import main
+
+
+def test_rainbow_frames_never_bake(monkeypatch):
+    clock = [1000]
+    monkeypatch.setattr(pygame.time, 'get_ticks', lambda: clock[0])
+    game = main.Tetris()
+    game.save_high_score = lambda: None
+    game.reset_game(seed=1)
+    game.grid[-1] = tuple(range(1, 8)) + (1, 2, 3)
+    game.rainbow_effect_start = clock[0]
+
+    def fail(color):
+        raise AssertionError(f'baked {color} during a frame')
+
+    monkeypatch.setattr(game.materials, 'bake', fail)
+    for _ in range(main.RAINBOW_EFFECT_DURATION // 16):
+        clock[0] += 16
+        game.draw()
+
+
+def test_unknown_color_uses_nearest_baked():
+    game = main.Tetris()
+    baked = game.materials.get(main.COLORS[0])
+    nudged = tuple(c + 1 for c in main.COLORS[0])
+    assert game.materials.key(nudged) == main.COLORS[0]
+    assert game.materials.get(nudged) is baked
@@ -0,0 +1,25 @@
+import os
+
+import profiling
+
+
+def _capture(directory, name):
+    capture = profiling.ProfileCapture(frames=1, directory=str(directory), interval=0.001).start()
+    capture.name = name
+    capture.mark_frame()
+    return capture
+
+
+def test_captures_with_the_same_name_do_not_overwrite(tmp_path):
+    first = _capture(tmp_path, 'profile-same').finish()
+    second_capture = _capture(tmp_path, 'profile-same')
+    second = second_capture.finish()
+    assert second_capture.name == 'profile-same-1'
+    assert not set(first) & set(second)
+    assert sorted(os.listdir(tmp_path)) == ['profile-same-1.collapsed', 'profile-same-1.pstats',
+                                            'profile-same.collapsed', 'profile-same.pstats']
+
+
+def test_names_include_milliseconds():
+    name = profiling.ProfileCapture().name
+    assert len(name.split('-')) == 4 and len(name.split('-')[-1]) == 3
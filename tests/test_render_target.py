@@ -0,0 +1,30 @@
+import pygame
+import pytest
+
+import render_target
+from render_target import RenderTarget
+
+
+@pytest.fixture
+def display():
+    pygame.display.init()
+    yield
+    # 关闭窗口，之后的测试可以重新创建 SCALED 窗口
+    pygame.display.quit()
+
+
+def test_layouts_keep_only_recent_window_sizes(display):
+    target = RenderTarget((180, 200), mode='letterbox')
+    sizes = [(200 + 10 * i, 300) for i in range(10)]
+    for size in sizes:
+        target.resize(size)
+    assert list(target._layouts) == sizes[-render_target.MAX_LAYOUTS:]
+
+    # 重新使用的尺寸复用缓冲区，并变成最近使用的
+    reused = target._layouts[sizes[-render_target.MAX_LAYOUTS]]
+    target.resize(sizes[-render_target.MAX_LAYOUTS])
+    assert target._layout is reused
+    assert next(reversed(target._layouts)) == sizes[-render_target.MAX_LAYOUTS]
+    target.resize((999, 999))
+    assert sizes[-render_target.MAX_LAYOUTS] in target._layouts
+    assert len(target._layouts) == render_target.MAX_LAYOUTS
@@ -0,0 +1,89 @@
+import pygame
+import pytest
+
+import main
+import snapshot
+from snapshot import GameSnapshot, deserialize, load_snapshot, save_snapshot, serialize
+
+LIMITS = ({state.value for state in main.GameState}, len(main.SHAPES),
+          (main.GRID_WIDTH, main.GRID_HEIGHT))
+
+
+def _snapshot(**changes):
+    grid = [main.EMPTY_ROW] * (main.GRID_HEIGHT - 2) + [(1, 2, 3, 4, 5, 6, 7, 0, 0, 1)] * 2
+    fields = dict(grid=tuple(grid), current_piece=2, next_piece=5, piece_pos=(3, -1),
+                  shape=((0, 0, 1), (1, 1, 1)), score=123456, level=7, lines_cleared=61,
+                  state=main.GameState.PLAYING.value, fall_speed=400, fall_elapsed=250,
+                  combo_count=3, combo_elapsed=1500)
+    fields.update(changes)
+    return GameSnapshot(**fields)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'autosave.bin')
+    for original in (_snapshot(), _snapshot(current_piece=None, shape=None)):
+        assert deserialize(serialize(original)) == original
+        save_snapshot(path, original)
+        assert load_snapshot(path, *LIMITS) == original
+
+
+def test_missing_file_returns_none(tmp_path):
+    assert load_snapshot(str(tmp_path / 'missing.bin')) is None
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: b'',
+    lambda data: data[:10],
+    lambda data: b'XXXX' + data[4:],
+    lambda data: data[:len(data) // 2],
+])
+def test_corrupt_file_returns_none(tmp_path, corrupt):
+    path = tmp_path / 'autosave.bin'
+    path.write_bytes(corrupt(serialize(_snapshot())))
+    assert load_snapshot(str(path), *LIMITS) is None
+
+
+@pytest.mark.parametrize('changes', [
+    {'state': 9},
+    {'current_piece': 7},
+    {'next_piece': 200},
+    {'current_piece': None},
+    {'grid': (main.EMPTY_ROW,) * 4},
+    {'grid': ((9,) * main.GRID_WIDTH,) * main.GRID_HEIGHT},
+])
+def test_out_of_range_values_are_rejected(tmp_path, changes):
+    path = str(tmp_path / 'autosave.bin')
+    save_snapshot(path, _snapshot(**changes))
+    assert load_snapshot(path) is not None  # 结构完整，只是取值超出游戏范围
+    assert load_snapshot(path, *LIMITS) is None
+
+
+def test_unencodable_values_keep_the_old_save(tmp_path):
+    path = str(tmp_path / 'autosave.bin')
+    save_snapshot(path, _snapshot())
+    with pytest.raises(snapshot.struct.error):
+        save_snapshot(path, _snapshot(combo_count=300))
+    assert load_snapshot(path, *LIMITS) == _snapshot()
+    assert not (tmp_path / 'autosave.bin.tmp').exists()
+
+
+def test_autosave_survives_out_of_range_fields(tmp_path, monkeypatch):
+    monkeypatch.setattr(pygame.time, 'get_ticks', lambda: 1000)
+    game = main.Tetris()
+    game.save_high_score = lambda: None
+    game.reset_game(seed=1)
+    game.autosave_path = str(tmp_path / 'autosave.bin')
+    game.combo_count = 300
+    game.autosave()  # 只打印警告，不让游戏崩溃
+    assert not (tmp_path / 'autosave.bin').exists()
+
+
+def test_resume_ignores_invalid_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(pygame.time, 'get_ticks', lambda: 1000)
+    path = str(tmp_path / 'autosave.bin')
+    save_snapshot(path, _snapshot(state=9))
+    game = main.Tetris()
+    game.save_high_score = lambda: None
+    game.reset_game(seed=1)
+    game.autosave_path = path
+    assert game.resume_autosave() is False
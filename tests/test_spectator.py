@@ -0,0 +1,46 @@
+import random
+
+import main
+from spectator import StateStreamReader, StateStreamWriter
+
+
+def test_view_only_viewer_leaves_subsystems_off(monkeypatch):
+    for name in ('TETRIS_TRACE', 'TETRIS_ALLOC_PROFILE', 'TETRIS_LATENCY', 'TETRIS_PRACTICE'):
+        monkeypatch.setenv(name, '1')
+    viewer = main.Tetris(view_only=True)
+    assert viewer.sounds == {}
+    assert not viewer.live_gravity
+    assert not viewer.tracer.enabled
+    assert not viewer.latency.enabled
+    assert not viewer.rewind.enabled
+    assert type(viewer.alloc_profiler).__name__ == 'NullAllocProfiler'
+    assert viewer.high_score == 0
+
+
+def test_stream_rebuilds_the_game_in_a_viewer():
+    writer = StateStreamWriter(main.SHAPES, keyframe_interval=50)
+    game = main.Tetris(stream=writer)
+    game.save_high_score = lambda: None
+    rng = random.Random(1)
+    for _ in range(2000):
+        if game.state != main.GameState.PLAYING:
+            break
+        action = rng.choice('lrud')
+        if action == 'u':
+            game.rotate_piece()
+        else:
+            game.move_piece(*{'l': (-1, 0), 'r': (1, 0), 'd': (0, 1)}[action])
+    data = writer.flush()
+
+    viewer = main.Tetris(view_only=True)
+    reader = StateStreamReader(viewer)
+    offset = 0
+    while offset < len(data):
+        size = rng.randint(1, 40)
+        reader.feed(data[offset:offset + size])
+        offset += size
+    assert viewer.grid == game.grid
+    assert viewer.score == game.score
+    assert viewer.piece_pos == game.piece_pos
+    viewer.update_animations()
+    viewer.draw()
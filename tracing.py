@@ -0,0 +1,124 @@
+import json
+import os
+import sys
+import time
+from array import array
+
+import pygame
+
+# 帧时间线追踪：记录游戏循环各阶段的耗时，导出为 Chrome trace / Perfetto
+# 可以直接打开的 JSON。关闭时使用 NullTracer，几乎没有额外开销。
+
+TRACE_CAPACITY = 200000  # 预分配的事件条数，写满后覆盖最旧的记录
+
+_PHASE_SPAN = 0
+_PHASE_COUNTER = 1
+
+
+class NullTracer:
+    """未开启追踪时使用的空实现"""
+    enabled = False
+
+    def begin(self):
+        return 0
+
+    def end(self, name, start):
+        return 0
+
+    def counter(self, name, value):
+        pass
+
+    def write(self, path=None):
+        return None
+
+
+class Tracer:
+    enabled = True
+
+    def __init__(self, capacity=TRACE_CAPACITY, path=None):
+        self.capacity = capacity
+        self.path = path
+        # 预分配的环形缓冲区，记录时不再分配内存
+        self._names = [None] * capacity
+        self._phases = bytearray(capacity)
+        self._starts = array('q', bytes(8 * capacity))
+        self._values = array('d', bytes(8 * capacity))
+        self._count = 0
+        self._origin = time.perf_counter_ns()
+
+    def _now(self):
+        return (time.perf_counter_ns() - self._origin) // 1000
+
+    def begin(self):
+        """返回开始时间戳，与 end 配对使用"""
+        return self._now()
+
+    def end(self, name, start):
+        """记录一段从 start 到现在的区间，返回结束时间戳（可作为下一段的开始）"""
+        now = self._now()
+        i = self._count % self.capacity
+        self._names[i] = name
+        self._phases[i] = _PHASE_SPAN
+        self._starts[i] = start
+        self._values[i] = now - start
+        self._count += 1
+        return now
+
+    def counter(self, name, value):
+        """记录计数器轨道上的一个数值"""
+        i = self._count % self.capacity
+        self._names[i] = name
+        self._phases[i] = _PHASE_COUNTER
+        self._starts[i] = self._now()
+        self._values[i] = value
+        self._count += 1
+
+    def events(self):
+        """按时间顺序导出缓冲区中的 Chrome trace 事件"""
+        pid = os.getpid()
+        first = max(0, self._count - self.capacity)
+        result = []
+        for n in range(first, self._count):
+            i = n % self.capacity
+            if self._phases[i] == _PHASE_SPAN:
+                result.append({'name': self._names[i], 'ph': 'X', 'pid': pid, 'tid': 1,
+                               'ts': self._starts[i], 'dur': self._values[i]})
+            else:
+                result.append({'name': self._names[i], 'ph': 'C', 'pid': pid, 'tid': 1,
+                               'ts': self._starts[i], 'args': {'value': self._values[i]}})
+        return result
+
+    def write(self, path=None):
+        """写出 trace 文件，返回文件路径"""
+        path = path or self.path or time.strftime('trace-%Y%m%d-%H%M%S.json')
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events(), 'displayTimeUnit': 'ms'}, f)
+        print(f"Trace written to {path}")
+        return path
+
+
+class CountingSurface(pygame.Surface):
+    """统计 Surface 构造次数的子类，追踪模式下替换 pygame.Surface"""
+    created = 0
+    sites = None  # 设为 Counter 时按调用位置（文件:行号）分别计数
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        CountingSurface.created += 1
+        if CountingSurface.sites is not None:
+            caller = sys._getframe(1)
+            CountingSurface.sites[f'{caller.f_code.co_filename}:{caller.f_lineno}'] += 1
+
+
+def install_surface_counter():
+    if pygame.Surface is not CountingSurface:
+        pygame.Surface = CountingSurface
+
+
+def create_tracer():
+    """根据环境变量 TETRIS_TRACE 创建追踪器（值为输出文件路径或 1）"""
+    setting = os.environ.get('TETRIS_TRACE')
+    if not setting:
+        return NullTracer()
+    install_surface_counter()
+    return Tracer(path=None if setting == '1' else setting)
@@ -0,0 +1,159 @@
+import random
+
+# Zobrist 哈希与置换表：给每个格子、当前方块和下一个方块分配一个随机 64 位键，
+# 局面的哈希是所有已占用格子及两个方块的键的异或。落子时只异或新写入的格子，
+# 消行时只对移动过的行做“移出旧行、移入新行”，不需要重新扫描整个网格。
+# 只看格子是否被占用，不区分颜色（颜色不影响局面评估）。
+#
+# 置换表按哈希直接寻址，容量固定；同一位置冲突时保留搜索深度更大的结果，
+# 旧一轮搜索留下的条目总是可以被替换。
+
+ZOBRIST_SEED = 0x5EED7E7
+TABLE_SIZE = 1 << 16
+
+
+class ZobristKeys:
+    def __init__(self, width, height, pieces, seed=ZOBRIST_SEED):
+        rng = random.Random(seed)
+        self.width = width
+        self.height = height
+        self.cells = [[rng.getrandbits(64) for _ in range(width)] for _ in range(height)]
+        # 最后一项表示未知方块（搜索时下一个方块还没有生成）
+        self.current = [rng.getrandbits(64) for _ in range(pieces + 1)]
+        self.next = [rng.getrandbits(64) for _ in range(pieces + 1)]
+        self.unknown = pieces
+        # 每一行所有占用组合的哈希 {行: [位掩码 -> 哈希]}，由低位逐个递推
+        self.rows = []
+        for r in range(height):
+            table = [0] * (1 << width)
+            for mask in range(1, 1 << width):
+                low = mask & -mask
+                table[mask] = table[mask ^ low] ^ self.cells[r][low.bit_length() - 1]
+            self.rows.append(table)
+
+    def row(self, r, cells):
+        """一行（颜色元组）的哈希"""
+        h = 0
+        for c, cell in enumerate(cells):
+            if cell:
+                h ^= self.cells[r][c]
+        return h
+
+    def board(self, grid):
+        """从头计算整个网格的哈希（仅在恢复存档等无法增量更新时使用）"""
+        h = 0
+        for r, cells in enumerate(grid):
+            h ^= self.row(r, cells)
+        return h
+
+    def clear(self, h, grid, lines):
+        """grid 中 lines 被消除、上方各行下移后的哈希；grid 为消除前的网格"""
+        cleared = set(lines)
+        shift = 0
+        for r in range(len(grid) - 1, -1, -1):
+            if r in cleared:
+                h ^= self.row(r, grid[r])
+                shift += 1
+            elif shift:
+                row_hash = self.row(r, grid[r])
+                if row_hash:
+                    h ^= row_hash ^ self.row(r + shift, grid[r])
+        return h
+
+    def clear_masks(self, h, masks, lines):
+        """与 clear 相同，网格以每行的占用位掩码表示"""
+        cleared = set(lines)
+        shift = 0
+        rows = self.rows
+        for r in range(len(masks) - 1, -1, -1):
+            mask = masks[r]
+            if r in cleared:
+                h ^= rows[r][mask]
+                shift += 1
+            elif shift and mask:
+                h ^= rows[r][mask] ^ rows[r + shift][mask]
+        return h
+
+    def state(self, board_hash, current, next_piece):
+        """局面（网格 + 当前方块 + 下一个方块）的哈希，方块为 None 时视为未知"""
+        if current is None:
+            current = self.unknown
+        if next_piece is None:
+            next_piece = self.unknown
+        return board_hash ^ self.current[current] ^ self.next[next_piece]
+
+
+_default_keys = {}
+
+
+def default_keys(width, height, pieces):
+    """同一尺寸的网格在进程内共享一组键，不同对局的哈希可以互相比较"""
+    key = (width, height, pieces)
+    if key not in _default_keys:
+        _default_keys[key] = ZobristKeys(width, height, pieces)
+    return _default_keys[key]
+
+
+class TranspositionTable:
+    def __init__(self, size=TABLE_SIZE):
+        size = 1 << max(0, (size - 1).bit_length())  # 向上取 2 的幂，用位与代替取模
+        self.size = size
+        self._mask = size - 1
+        self._keys = [None] * size
+        self._depths = [0] * size
+        self._generations = [0] * size
+        self._values = [None] * size
+        self._moves = [None] * size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replaced = 0
+        self.rejected = 0
+
+    def new_search(self):
+        """开始新一轮搜索：之前的条目仍可命中，但冲突时总是让位给新条目"""
+        self.generation += 1
+
+    def lookup(self, key, depth):
+        """返回搜索深度不小于 depth 的缓存结果 (评估值, 最佳着法)，没有时返回 None"""
+        self.probes += 1
+        i = key & self._mask
+        if self._keys[i] == key and self._depths[i] >= depth:
+            self.hits += 1
+            self._generations[i] = self.generation
+            return self._values[i], self._moves[i]
+        return None
+
+    def store(self, key, depth, value, move=None):
+        i = key & self._mask
+        old = self._keys[i]
+        if old is not None:
+            if self._generations[i] == self.generation and self._depths[i] > depth:
+                self.rejected += 1  # 保留同一轮中更深的结果
+                return False
+            if old != key:
+                self.replaced += 1
+        self._keys[i] = key
+        self._depths[i] = depth
+        self._generations[i] = self.generation
+        self._values[i] = value
+        self._moves[i] = move
+        self.stores += 1
+        return True
+
+    def clear(self):
+        self.__init__(self.size)
+
+    def stats(self):
+        filled = sum(1 for key in self._keys if key is not None)
+        return {
+            'size': self.size,
+            'filled': filled,
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': round(self.hits / self.probes, 4) if self.probes else 0.0,
+            'stores': self.stores,
+            'replaced': self.replaced,
+            'rejected': self.rejected,
+        }
@@ -1,11 +1,17 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+from assetpack import build_pack, PACK_FILE
+
+# 资源不再作为 datas 打进 exe（单文件模式每次启动都要解压），
+# 而是打包成 assets.pak 放在 exe 旁边，运行时内存映射读取
+build_pack('assets', os.path.join(DISTPATH, PACK_FILE))
 
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('assets', 'assets')],
+    datas=[],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},